@@ -0,0 +1,185 @@
+import errno
+import os
+import re
+import logging
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# controllers enabled for the leaves when the deputy's cgroup delegates them
+CONTROLLERS = ('cpu', 'memory', 'io', 'pids')
+
+
+def read_cgroup_file(path, name):
+    try:
+        with open(os.path.join(path, name)) as f:
+            return f.read().strip()
+    except (OSError, TypeError):
+        return None
+
+
+def read_pressure(path, resource):
+    # "some avg10" of <resource>.pressure, -1 if the kernel has no PSI
+    data = read_cgroup_file(path, f'{resource}.pressure')
+    if not data:
+        return -1.0
+    for line in data.splitlines():
+        if line.startswith('some '):
+            for field in line.split()[1:]:
+                key, _, value = field.partition('=')
+                if key == 'avg10':
+                    return float(value)
+    return -1.0
+
+
+class CgroupManager:
+    # Gives every started process its own cgroup v2 leaf below the deputy's cgroup.
+    # The deputy moves itself into a "deputy" leaf first, because cgroup v2 only lets a
+    # cgroup without processes of its own hand controllers down to its children. The cgroup
+    # is only taken over when it is delegated to the deputy (a systemd service with
+    # Delegate=yes, or a cgroup owned by the deputy's user) and holds nothing but the deputy
+    # and leaves of a previous run; a login session scope or another unit is never touched.
+    # Otherwise available stays False and the process trees fall back to walking /proc.
+    def __init__(self, enabled=False):
+        self.available = False
+        self.base = None
+        self.controllers = set()
+        self.leaf_count = 0
+        if enabled:
+            self.setup()
+
+    def setup(self):
+        if not os.path.exists(os.path.join(CGROUP_ROOT, 'cgroup.controllers')):
+            logging.info("Cgroups: cgroup v2 not mounted, using the process tree for accounting.")
+            return
+
+        own = None
+        try:
+            with open('/proc/self/cgroup') as f:
+                for line in f:
+                    if line.startswith('0::'):
+                        own = line[3:].strip()
+        except OSError:
+            pass
+        if own is None:
+            logging.info("Cgroups: Deputy is not in a cgroup v2, using the process tree for accounting.")
+            return
+
+        base = os.path.join(CGROUP_ROOT, own.lstrip('/'))
+        reason = self.not_ours(base)
+        if reason:
+            logging.info(f"Cgroups: Cgroup {base} {reason}, using the process tree for accounting.")
+            return
+
+        deputy_leaf = os.path.join(base, 'deputy')
+        try:
+            os.makedirs(deputy_leaf, exist_ok=True)
+            with open(os.path.join(deputy_leaf, 'cgroup.procs'), 'w') as f:
+                f.write(str(os.getpid()))
+        except OSError as e:
+            logging.info(f"Cgroups: Cgroup {base} is not delegated ({e}), using the process tree for accounting.")
+            return
+
+        # accounting still works without controllers, only memory.current and io.stat are missing
+        available = set((read_cgroup_file(base, 'cgroup.controllers') or '').split())
+        for controller in CONTROLLERS:
+            if controller not in available:
+                continue
+            try:
+                with open(os.path.join(base, 'cgroup.subtree_control'), 'w') as f:
+                    f.write(f'+{controller}')
+                self.controllers.add(controller)
+            except OSError as e:
+                if e.errno == errno.EBUSY:
+                    # a process joined the cgroup meanwhile, it is not ours alone after all
+                    logging.warning(f"Cgroups: Cgroup {base} is busy ({e}), using the process tree for accounting.")
+                    try:
+                        with open(os.path.join(base, 'cgroup.procs'), 'w') as f:
+                            f.write(str(os.getpid()))
+                        os.rmdir(deputy_leaf)
+                    except OSError:
+                        pass
+                    self.controllers.clear()
+                    return
+                logging.warning(f"Cgroups: Failed to enable the {controller} controller in {base}: {e}")
+
+        self.base = base
+        self.available = True
+        logging.info(f"Cgroups: Managed processes get cgroup leaves in {base} "
+                     f"with controllers: {' '.join(sorted(self.controllers)) or 'none'}")
+
+    def not_ours(self, base):
+        # why base can not be taken over, None when it is delegated to the deputy and otherwise empty
+        delegated = False
+        for attr in ('trusted.delegate', 'user.delegate'):
+            # set by systemd on the cgroup of a unit with Delegate=yes
+            try:
+                delegated = os.getxattr(base, attr) == b'1'
+            except (OSError, AttributeError):
+                continue
+            if delegated:
+                break
+        if not delegated:
+            # a delegation to an unprivileged user chowns the cgroup to it; root owns every cgroup,
+            # so for root only the systemd flag counts
+            uid = os.getuid()
+            try:
+                owned = uid != 0 and all(os.stat(os.path.join(base, name)).st_uid == uid
+                                         for name in ('', 'cgroup.procs', 'cgroup.subtree_control'))
+            except OSError:
+                owned = False
+            if not owned:
+                return "is not delegated to the deputy"
+
+        procs = (read_cgroup_file(base, 'cgroup.procs') or '').split()
+        others = [pid for pid in procs if pid != str(os.getpid())]
+        if others:
+            return f"also holds processes {' '.join(others[:5])}"
+        try:
+            children = [name for name in os.listdir(base)
+                        if os.path.isdir(os.path.join(base, name)) and name != 'deputy' and not name.startswith('proc-')]
+        except OSError as e:
+            return f"can not be listed ({e})"
+        if children:
+            return f"also holds cgroups {' '.join(sorted(children)[:5])}"
+        return None
+
+    def create_leaf(self, process_name):
+        # a new leaf per start, the previous run may still have members winding down
+        if not self.available:
+            return None
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', process_name)
+        while True:
+            self.leaf_count += 1
+            path = os.path.join(self.base, f'proc-{name}-{self.leaf_count}')
+            try:
+                os.mkdir(path)
+                return path
+            except FileExistsError:
+                # left by a previous run of the deputy
+                continue
+            except OSError as e:
+                logging.warning(f"Cgroups: Failed to create cgroup {path}: {e}")
+                return None
+
+    def join(self, path, pid):
+        # moves pid into the leaf, returns False when it is not in it afterwards
+        try:
+            with open(os.path.join(path, 'cgroup.procs'), 'w') as f:
+                f.write(str(pid))
+        except OSError:
+            pass
+        return self.contains(path, pid)
+
+    def contains(self, path, pid):
+        data = read_cgroup_file(path, 'cgroup.procs')
+        return data is not None and str(pid) in data.split()
+
+    def remove_leaf(self, path):
+        # returns False while the leaf still has members
+        try:
+            os.rmdir(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        return True
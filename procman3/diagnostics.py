@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+
+from proc_sampler import ProcSampler
+
+# values keep this many significant bits, so a recorded value is off by less than 1/32 of itself
+SIGNIFICANT_BITS = 6
+
+# percentiles of a summary
+SUMMARY_PERCENTILES = (('p50', 50.0), ('p90', 90.0), ('p99', 99.0), ('p999', 99.9))
+
+
+def bucket_start(value):
+    # lowest value of the bucket of value: exact below 2**SIGNIFICANT_BITS, then
+    # 2**(SIGNIFICANT_BITS - 1) equal buckets per power of two
+    shift = value.bit_length() - SIGNIFICANT_BITS
+    return value if shift <= 0 else (value >> shift) << shift
+
+
+def bucket_end(start):
+    # highest value of the bucket starting at start
+    shift = start.bit_length() - SIGNIFICANT_BITS
+    return start if shift <= 0 else start + (1 << shift) - 1
+
+
+class Histogram:
+    # HDR style histogram of non-negative integers (us or bytes) with log-linear buckets: the memory
+    # depends on the range of the values, not on how many were recorded, and any percentile is
+    # answered within the bucket precision.
+    def __init__(self):
+        self.counts = {}        # bucket start -> values recorded in the bucket
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value):
+        value = max(0, int(value))
+        start = bucket_start(value)
+        self.counts[start] = self.counts.get(start, 0) + 1
+        if not self.count or value < self.min:
+            self.min = value
+        self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percentile):
+        # the highest value equivalent to the value at percentile, never above the max recorded
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percentile // 100))
+        seen = 0
+        for start in sorted(self.counts):
+            seen += self.counts[start]
+            if seen >= rank:
+                return min(bucket_end(start), self.max)
+        return self.max
+
+    def summary(self, name, msg):
+        # fills a histogram_summary_t
+        msg.name = name
+        msg.count = self.count
+        msg.total = self.total
+        msg.min = self.min
+        msg.max = self.max
+        for field, percentile in SUMMARY_PERCENTILES:
+            setattr(msg, field, self.percentile(percentile))
+        return msg
+
+
+class Diagnostics:
+    # The deputy's view of itself: latency histograms of every event loop callback and of every
+    # command type, size histograms of the messages published on every channel, and the cpu,
+    # memory, threads and descriptors of the deputy process. The histograms cover the time since
+    # the previous take(), which starts them over.
+    def __init__(self):
+        self.lock = threading.Lock()    # messages are also published from the spool thread
+        self.phases = {}
+        self.commands = {}
+        self.channels = {}
+        self.window_start = time.monotonic()
+        self.sampler = ProcSampler()
+
+    def record_phase(self, name, seconds):
+        self.histogram(self.phases, name).record(seconds * 1e6)
+
+    def record_command(self, command, seconds):
+        self.histogram(self.commands, command).record(seconds * 1e6)
+
+    def record_publish(self, channel, size):
+        with self.lock:
+            self.histogram(self.channels, channel).record(size)
+
+    def histogram(self, histograms, name):
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        return histogram
+
+    def take(self):
+        # (seconds covered, phases, commands, channels) with the histograms by name, starting new ones
+        now = time.monotonic()
+        with self.lock:
+            taken = (now - self.window_start, self.phases, self.commands, self.channels)
+            self.phases, self.commands, self.channels = {}, {}, {}
+            self.window_start = now
+        return taken
+
+    def usage(self):
+        # sample of the deputy process and its number of open descriptors
+        pid = os.getpid()
+        try:
+            num_fds = len(os.listdir(f'/proc/{pid}/fd'))
+        except OSError:
+            num_fds = -1
+        return self.sampler.sample(pid), num_fds
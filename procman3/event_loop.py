@@ -0,0 +1,101 @@
+import heapq
+import itertools
+import logging
+import selectors
+import time
+
+
+class TimerHandle:
+    def __init__(self, deadline, period, callback, name=None):
+        self.deadline = deadline
+        self.period = period
+        self.callback = callback
+        self.name = name
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class EventLoop:
+    # Single threaded reactor: file descriptors are multiplexed with a selector (epoll on linux)
+    # and timers are kept in a heap ordered by their monotonic deadline, so the loop sleeps
+    # until either a descriptor is readable or the next timer is due.
+    # With profile set, profile(name, seconds) is called after every callback, where name is the
+    # name given when the callback was added or the callback's own name.
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.timers = []
+        self.sequence = itertools.count()
+        self.running = False
+        self.profile = None
+        self.iterations = 0
+
+    def add_reader(self, fileobj, callback, name=None):
+        self.selector.register(fileobj, selectors.EVENT_READ, (callback, name))
+
+    def remove_reader(self, fileobj):
+        try:
+            self.selector.unregister(fileobj)
+        except (KeyError, ValueError):
+            pass
+
+    def call_later(self, delay, callback, name=None):
+        timer = TimerHandle(time.monotonic() + delay, None, callback, name)
+        self._push(timer)
+        return timer
+
+    def call_every(self, period, callback, name=None):
+        timer = TimerHandle(time.monotonic() + period, period, callback, name)
+        self._push(timer)
+        return timer
+
+    def _push(self, timer):
+        heapq.heappush(self.timers, (timer.deadline, next(self.sequence), timer))
+
+    def next_timeout(self):
+        while self.timers and self.timers[0][2].cancelled:
+            heapq.heappop(self.timers)
+        if not self.timers:
+            return None
+        return max(0.0, self.timers[0][0] - time.monotonic())
+
+    def run_once(self):
+        events = self.selector.select(self.next_timeout())
+        self.iterations += 1
+        registered = self.selector.get_map()
+        for key, _ in events:
+            # a previous callback in this batch may have unregistered the descriptor
+            if registered.get(key.fd) is not key:
+                continue
+            self._dispatch(key.data[0], key.data[1], key.fileobj)
+
+        now = time.monotonic()
+        while self.timers and self.timers[0][0] <= now:
+            _, _, timer = heapq.heappop(self.timers)
+            if timer.cancelled:
+                continue
+            if timer.period:
+                # keep a fixed cadence, but do not try to catch up on missed periods
+                timer.deadline += timer.period
+                if timer.deadline <= now:
+                    timer.deadline = now + timer.period
+                self._push(timer)
+            self._dispatch(timer.callback, timer.name)
+
+    def _dispatch(self, callback, name, *args):
+        start = time.perf_counter() if self.profile is not None else 0.0
+        try:
+            callback(*args)
+        except Exception:
+            logging.exception("Event Loop: Unhandled exception in callback")
+        if self.profile is not None:
+            self.profile(name or getattr(callback, '__name__', 'callback'), time.perf_counter() - start)
+
+    def run_forever(self):
+        self.running = True
+        while self.running:
+            self.run_once()
+
+    def stop(self):
+        self.running = False
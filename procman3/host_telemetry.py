@@ -0,0 +1,161 @@
+import glob
+import os
+import socket
+import time
+import psutil
+
+# partitions, loop and ram devices are not reported, only the disks listed in /sys/block
+IGNORED_DISKS = ('loop', 'ram', 'zram')
+
+# how often the primary IP is looked up again when the interfaces did not change
+IP_REFRESH_INTERVAL = 30.0
+
+
+def get_ip():
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.settimeout(0)
+    try:
+        # doesn't even have to be reachable
+        s.connect(('10.254.254.254', 1))
+        IP = s.getsockname()[0]
+    except Exception:
+        IP = '127.0.0.1'
+    finally:
+        s.close()
+    return IP
+
+
+def busy_time(prev, cur):
+    # (busy, total) seconds between two cpu_times samples of one core
+    idle = (cur.idle + getattr(cur, 'iowait', 0)) - (prev.idle + getattr(prev, 'iowait', 0))
+    total = sum(cur) - sum(prev)
+    return max(0.0, total - idle), max(0.0, total)
+
+
+class HostTelemetry:
+    # Collects the host metrics published by the deputy. Static facts (cpu count, boot time,
+    # primary IP, disk and throttle counter lists) are cached and only looked up again when
+    # they change. Every tick takes one snapshot of each counter and computes rates from the
+    # previous one.
+    def __init__(self):
+        self.cpu_count = psutil.cpu_count()
+        self.boot_time = psutil.boot_time()
+        self.ip = get_ip()
+        self.ip_time = time.monotonic()
+        self.interfaces = set()
+        self.disk_names = set()
+        self.disks = self.list_disks()
+        self.throttle_files = sorted(glob.glob('/sys/devices/system/cpu/cpu[0-9]*/thermal_throttle/core_throttle_count'))
+
+        self.last_time = None
+        self.last_cpu = None
+        self.last_net = {}
+        self.last_disk = {}
+
+        # latest snapshot
+        self.mem = None
+        self.cpu_usage = 0.0
+        self.core_usage = [0.0] * self.cpu_count
+        self.core_freq = [0.0] * self.cpu_count     # MHz
+        self.load_avg = (0.0, 0.0, 0.0)
+        self.net_rates = {}         # interface -> (sent, recv) bytes/s
+        self.disk_rates = {}        # disk -> (read, write) bytes/s, busy fraction
+        self.throttle_count = -1    # thermal throttle events since boot, -1 if unknown
+
+    @property
+    def uptime(self):
+        return int(time.time() - self.boot_time)
+
+    @property
+    def net_sent(self):
+        return sum(sent for sent, _ in self.net_rates.values())
+
+    @property
+    def net_recv(self):
+        return sum(recv for _, recv in self.net_rates.values())
+
+    def list_disks(self):
+        try:
+            return {name for name in os.listdir('/sys/block') if not name.startswith(IGNORED_DISKS)}
+        except OSError:
+            return None
+
+    def update(self):
+        now = time.monotonic()
+        dt = now - self.last_time if self.last_time is not None else 0.0
+        self.last_time = now
+
+        self.mem = psutil.virtual_memory()
+        self.load_avg = os.getloadavg()
+
+        # one read of /proc/stat, the host usage is the sum over the cores
+        cpu = psutil.cpu_times(percpu=True)
+        if self.last_cpu is not None and len(cpu) == len(self.last_cpu):
+            times = [busy_time(prev, cur) for prev, cur in zip(self.last_cpu, cpu)]
+            self.core_usage = [min(1.0, busy / total) if total > 0 else 0.0 for busy, total in times]
+            total = sum(total for _, total in times)
+            self.cpu_usage = min(1.0, sum(busy for busy, _ in times) / total) if total > 0 else 0.0
+        else:
+            # first sample or a core went on/offline
+            self.cpu_count = len(cpu)
+            self.core_usage = [0.0] * len(cpu)
+        self.last_cpu = cpu
+
+        freqs = psutil.cpu_freq(percpu=True) or []
+        self.core_freq = [freq.current for freq in freqs]
+
+        self.update_net(dt)
+        self.update_disks(dt)
+        self.update_throttle()
+
+    def update_net(self, dt):
+        counters = psutil.net_io_counters(pernic=True)
+        interfaces = set(counters)
+        if interfaces != self.interfaces or time.monotonic() - self.ip_time > IP_REFRESH_INTERVAL:
+            self.interfaces = interfaces
+            self.ip = get_ip()
+            self.ip_time = time.monotonic()
+
+        rates = {}
+        for name, io in counters.items():
+            last = self.last_net.get(name)
+            if last is not None and dt > 0:
+                rates[name] = (max(0, io.bytes_sent - last.bytes_sent) / dt, max(0, io.bytes_recv - last.bytes_recv) / dt)
+            else:
+                rates[name] = (0.0, 0.0)
+        self.last_net = counters
+        self.net_rates = rates
+
+    def update_disks(self, dt):
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        names = set(counters)
+        if names != self.disk_names:
+            # a disk was plugged in or removed
+            self.disk_names = names
+            self.disks = self.list_disks()
+
+        rates = {}
+        for name, io in counters.items():
+            if name.startswith(IGNORED_DISKS) or (self.disks is not None and name not in self.disks):
+                continue
+            last = self.last_disk.get(name)
+            if last is not None and dt > 0:
+                busy = getattr(io, 'busy_time', 0) - getattr(last, 'busy_time', 0)
+                rates[name] = (max(0, io.read_bytes - last.read_bytes) / dt, max(0, io.write_bytes - last.write_bytes) / dt,
+                               min(1.0, max(0.0, busy / 1000 / dt)))
+            else:
+                rates[name] = (0.0, 0.0, 0.0)
+        self.last_disk = counters
+        self.disk_rates = rates
+
+    def update_throttle(self):
+        if not self.throttle_files:
+            return
+        count = 0
+        for path in self.throttle_files:
+            try:
+                with open(path) as f:
+                    count += int(f.read())
+            except (OSError, ValueError):
+                pass
+        self.throttle_count = count
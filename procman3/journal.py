@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import time
+import psutil
+
+
+def make_output_fifo(path):
+    # A named pipe for one output stream of a child, so a later run of the deputy can open it
+    # again by path. Returns the read end, opened first so the write end opens without blocking.
+    os.mkfifo(path, 0o600)
+    try:
+        return os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+    except OSError:
+        remove_output_fifo(path)
+        raise
+
+
+def open_output_fifo(path):
+    # the read end of the fifo of an adopted child, None if it is gone
+    try:
+        return os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+    except OSError:
+        return None
+
+
+def remove_output_fifo(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class AdoptedProcess(psutil.Process):
+    # Stands in for the psutil.Popen of a child started by a previous run of the deputy.
+    # It is no longer our child, so its exit code goes to its new parent. Its output is read
+    # again from the fifos it was started with.
+    stdout = None
+    stderr = None
+
+    def __init__(self, pid):
+        super().__init__(pid)
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None:
+            try:
+                if self.is_running() and self.status() != psutil.STATUS_ZOMBIE:
+                    return None
+            except psutil.NoSuchProcess:
+                pass
+            self.returncode = -1    # unknown
+        return self.returncode
+
+
+class ProcessJournal:
+    # Append-only JSON lines journal of the process table, replayed when the deputy starts.
+    # Records are buffered and written with a single fsync per flush; the deputy flushes at
+    # the end of the loop iteration that produced them. The file is rewritten as a snapshot
+    # of the table at startup and whenever it grows well beyond it.
+    def __init__(self, path):
+        self.path = path
+        self.pending = []
+        self.records = 0        # records in the file
+        self.file = None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def replay(self):
+        # name -> {'spec': create record, 'start': start record or None}
+        table = {}
+        if not os.path.exists(self.path):
+            return table
+
+        with open(self.path, 'rb') as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # a write cut short by a crash, only the last line can be affected
+                    logging.warning(f"Journal: Skipping unreadable record {number} of {self.path}")
+                    continue
+                self.records += 1
+                op = record.get('op')
+                name = record.get('name')
+                if op == 'create':
+                    table[name] = {'spec': record, 'start': None}
+                elif op == 'delete':
+                    table.pop(name, None)
+                elif op == 'start' and name in table:
+                    table[name]['start'] = record
+                elif op == 'exit' and name in table:
+                    start = table[name]['start']
+                    if start is not None and start.get('pid') == record.get('pid'):
+                        table[name]['start'] = None
+        return table
+
+    def append(self, record):
+        record['time'] = time.time()
+        self.pending.append(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.file is None:
+            self.file = open(self.path, 'a')
+        self.file.write(''.join(self.pending))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.records += len(self.pending)
+        self.pending = []
+
+    def compact(self, records):
+        # replace the journal with the given snapshot records, atomically
+        tmp_path = self.path + '.tmp'
+        self.pending = []
+        for record in records:
+            self.append(record)
+        with open(tmp_path, 'w') as f:
+            f.write(''.join(self.pending))
+            f.flush()
+            os.fsync(f.fileno())
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        os.replace(tmp_path, self.path)
+
+        dir_fd = os.open(os.path.dirname(self.path), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        self.records = len(self.pending)
+        self.pending = []
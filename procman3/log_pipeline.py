@@ -0,0 +1,104 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line. The "Component: message" prefix used across the deputy is split
+    # into its own field so the logs can be filtered by component.
+    def format(self, record):
+        message = record.getMessage()
+        component, sep, text = message.partition(': ')
+        if not sep or len(component) > 40:
+            component, text = '', message
+
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'component': component,
+            'message': text,
+        }
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RotatingLogHandler(logging.handlers.RotatingFileHandler):
+    # Size based rotation plus a rollover every rotate_interval seconds (0 to rotate by size only).
+    def __init__(self, filename, max_bytes, backup_count, rotate_interval):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.rotate_interval = rotate_interval
+        self.rollover_at = time.time() + rotate_interval if rotate_interval > 0 else None
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.rollover_at is not None:
+            self.rollover_at = time.time() + self.rotate_interval
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    # Never blocks the caller: with the queue full records are counted and dropped, and the
+    # count is logged once the writer has caught up.
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # merge the arguments and the traceback here, the record is formatted on the writer thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': 'root', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': f"Logging: Dropped {self.dropped} records, the log writer fell behind."}))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(config, base_dir):
+    # Records are put on a bounded queue by the deputy and written to the rotating log file by a
+    # background thread, so a slow disk never stalls the event loop. Returns the log file path.
+    log_file = config.get('log_file') or 'log/procman3.log'
+    log_file = os.path.join(base_dir, log_file)
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+    file_handler = RotatingLogHandler(log_file, config.get('log_max_bytes', 10 * 1024 * 1024),
+                                      config.get('log_backup_count', 5), config.get('log_rotate_interval', 86400))
+    if config.get('log_format', 'json') == 'json':
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.Queue(config.get('log_queue_size', 10000))
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(config.get('log_level', 'INFO'))
+    return log_file
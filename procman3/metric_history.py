@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+
+# columns of the history of a process and of the host, in the units of proc_info_t and host_info_t
+PROC_FIELDS = ('cpu', 'mem_rss', 'num_threads', 'io_read', 'io_write')
+HOST_FIELDS = ('cpu_usage', 'mem_usage', 'mem_used', 'load_avg', 'network_sent', 'network_recv')
+
+# percentiles answered by a query, over the raw samples in the range
+PERCENTILES = (50.0, 90.0, 99.0)
+
+
+class MetricRing:
+    # The latest samples of a fixed set of fields in preallocated NumPy arrays: float64 times in s
+    # since the epoch and a float32 row of values per sample. A new sample overwrites the oldest
+    # one, so the memory of a ring never grows however long the deputy runs.
+    def __init__(self, fields, capacity):
+        self.fields = fields
+        self.times = np.zeros(capacity, np.float64)
+        self.values = np.zeros((capacity, len(fields)), np.float32)
+        self.next = 0
+        self.count = 0
+
+    def append(self, timestamp, values):
+        self.times[self.next] = timestamp
+        self.values[self.next] = values
+        self.next = (self.next + 1) % len(self.times)
+        self.count = min(self.count + 1, len(self.times))
+
+    def window(self, start_time, end_time):
+        # (times, values) of the samples in [start_time, end_time] (0 for unbounded), oldest first
+        if self.count < len(self.times):
+            times, values = self.times[:self.count], self.values[:self.count]
+        else:
+            times = np.concatenate((self.times[self.next:], self.times[:self.next]))
+            values = np.concatenate((self.values[self.next:], self.values[:self.next]))
+        # a mask instead of a binary search, the wall clock may have been set back
+        mask = np.ones(len(times), bool)
+        if start_time > 0:
+            mask &= times >= start_time
+        if end_time > 0:
+            mask &= times <= end_time
+        return times[mask], values[mask]
+
+    def query(self, start_time, end_time, max_points):
+        times, values = self.window(start_time, end_time)
+        result = {'num_samples': len(times), 'first_time': 0.0, 'last_time': 0.0,
+                  'times': times, 'values': values,
+                  'percentiles': np.zeros((len(PERCENTILES), len(self.fields)), np.float32),
+                  'mean': np.zeros(len(self.fields), np.float32), 'max': np.zeros(len(self.fields), np.float32)}
+        if not len(times):
+            return result
+
+        result['first_time'] = float(times[0])
+        result['last_time'] = float(times[-1])
+        result['percentiles'] = np.percentile(values, PERCENTILES, axis=0).astype(np.float32)
+        result['mean'] = values.mean(axis=0, dtype=np.float64).astype(np.float32)
+        result['max'] = values.max(axis=0)
+        result['times'], result['values'] = downsample(times, values, max_points)
+        return result
+
+
+def downsample(times, values, max_points):
+    # averages the samples of max_points equal time buckets, empty buckets are left out
+    if max_points <= 0 or len(times) <= max_points:
+        return times, values
+    span = times[-1] - times[0]
+    if span <= 0:
+        return times[-1:], values[-1:]
+    buckets = np.minimum(((times - times[0]) / span * max_points).astype(np.int64), max_points - 1)
+    counts = np.bincount(buckets, minlength=max_points)
+    used = counts > 0
+    counts = counts[used]
+    bucket_times = np.bincount(buckets, weights=times, minlength=max_points)[used] / counts
+    bucket_values = np.empty((len(counts), values.shape[1]), np.float32)
+    for column in range(values.shape[1]):
+        bucket_values[:, column] = np.bincount(buckets, weights=values[:, column], minlength=max_points)[used] / counts
+    return bucket_times, bucket_values
+
+
+def ring_capacity(retention, interval):
+    # samples taken every interval s in retention s, plus one for the sample that is being replaced
+    return max(2, math.ceil(retention / max(interval, 1e-3)) + 1)
+
+
+class MetricHistory:
+    # The metric history of the host and of every managed process for the last retention s,
+    # recorded as host_info_t and host_procs_t are published and kept after a process stopped,
+    # so its last run can still be looked at. A process's history goes away when it is deleted.
+    def __init__(self, retention, procs_interval, host_interval):
+        self.proc_capacity = ring_capacity(retention, procs_interval)
+        self.host = MetricRing(HOST_FIELDS, ring_capacity(retention, host_interval))
+        self.procs = {}
+
+    def record_host(self, timestamp, values):
+        self.host.append(timestamp, values)
+
+    def record_proc(self, process_name, timestamp, values):
+        ring = self.procs.get(process_name)
+        if ring is None:
+            ring = self.procs[process_name] = MetricRing(PROC_FIELDS, self.proc_capacity)
+        ring.append(timestamp, values)
+
+    def forget_proc(self, process_name):
+        self.procs.pop(process_name, None)
+
+    def ring(self, process_name):
+        # the host's ring for an empty name, None for a process without history
+        if not process_name:
+            return self.host
+        return self.procs.get(process_name)
@@ -0,0 +1,123 @@
+import http.server
+import logging
+import math
+import threading
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# host_info_t fields: metric name, type, help and a function of the message
+HOST_METRICS = (
+    ('procman3_host_cpus', 'gauge', 'Number of cpus.', lambda msg: msg.cpus),
+    ('procman3_host_cpu_usage', 'gauge', 'Cpu usage of the host, fraction of all cpus.', lambda msg: msg.cpu_usage),
+    ('procman3_host_memory_total_bytes', 'gauge', 'Total memory.', lambda msg: msg.mem_total),
+    ('procman3_host_memory_used_bytes', 'gauge', 'Used memory.', lambda msg: msg.mem_used),
+    ('procman3_host_memory_usage', 'gauge', 'Used memory, fraction of the total.', lambda msg: msg.mem_usage),
+    ('procman3_host_network_sent_bytes_per_second', 'gauge', 'Bytes sent on all interfaces.', lambda msg: msg.network_sent * 1024),
+    ('procman3_host_network_received_bytes_per_second', 'gauge', 'Bytes received on all interfaces.', lambda msg: msg.network_recv * 1024),
+    ('procman3_host_uptime_seconds', 'gauge', 'Seconds since the host booted.', lambda msg: msg.uptime),
+)
+
+# proc_info_t fields and the output counter: metric name, type, help and a function of (proc_info_t, output bytes)
+PROC_METRICS = (
+    ('procman3_process_running', 'gauge', '1 while the process is running.', lambda msg, _: int(msg.state == 'R')),
+    ('procman3_process_ready', 'gauge', '1 once the readiness probe of the running process passed.', lambda msg, _: int(msg.ready)),
+    ('procman3_process_cpu_usage', 'gauge', 'Cpu usage of the process tree, fraction of one cpu.', lambda msg, _: msg.cpu),
+    ('procman3_process_memory_rss_bytes', 'gauge', 'Resident memory of the process tree.', lambda msg, _: msg.mem_rss * 1024),
+    ('procman3_process_memory_vms_bytes', 'gauge', 'Virtual memory of the process tree.', lambda msg, _: msg.mem_vms * 1024),
+    ('procman3_process_tree_processes', 'gauge', 'Processes in the tree of the process.', lambda msg, _: msg.num_tree_procs),
+    ('procman3_process_io_read_bytes_per_second', 'gauge', 'Bytes read by the cgroup of the process.', lambda msg, _: msg.io_read * 1024),
+    ('procman3_process_io_write_bytes_per_second', 'gauge', 'Bytes written by the cgroup of the process.', lambda msg, _: msg.io_write * 1024),
+    ('procman3_process_restarts', 'gauge', 'Auto restarts since the process was last started on purpose.', lambda msg, _: msg.restart_count),
+    ('procman3_process_start_time_seconds', 'gauge', 'Start time of the running process, seconds since the epoch.', lambda msg, _: msg.start_time / 1e6),
+    ('procman3_process_output_bytes', 'counter', 'Bytes of output of the process since it was created.', lambda _, output_bytes: output_bytes),
+)
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return 'NaN' if math.isnan(value) else ('+Inf' if value > 0 else '-Inf')
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsExporter:
+    # Serves the latest host_info_t and process table in the OpenMetrics text format on
+    # http://<address>:<port>/metrics. The deputy hands over the messages it just published,
+    # nothing is sampled per scrape: the text is rendered on the first scrape after an update
+    # and served again as is until the next one.
+    def __init__(self, hostname, address, port):
+        self.hostname = hostname
+        self.lock = threading.Lock()
+        self.host_msg = None
+        self.procs = []         # (proc_info_t, group, output bytes) of every managed process
+        self.body = None
+
+        exporter = self
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = exporter.render()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((address, port), MetricsHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='metrics-exporter', daemon=True).start()
+        logging.info(f"Metrics Exporter: Serving OpenMetrics on http://{address}:{self.server.server_address[1]}/metrics")
+
+    def update_host(self, msg):
+        with self.lock:
+            self.host_msg = msg
+            self.body = None
+
+    def update_procs(self, procs):
+        with self.lock:
+            self.procs = procs
+            self.body = None
+
+    def render(self):
+        with self.lock:
+            if self.body is None:
+                self.body = self.render_text().encode('utf-8')
+            return self.body
+
+    def render_text(self):
+        host = escape_label(self.hostname)
+        lines = []
+        if self.host_msg is not None:
+            for name, kind, help_text, value in HOST_METRICS:
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'{name}{{hostname="{host}"}} {format_value(value(self.host_msg))}')
+
+        labels = [f'hostname="{host}",name="{escape_label(msg.name)}",group="{escape_label(group)}"'
+                  for msg, group, _ in self.procs]
+        lines.append('# TYPE procman3_process_state info')
+        lines.append('# HELP procman3_process_state Procman3 state and os status of the process.')
+        for (msg, _, _), label in zip(self.procs, labels):
+            lines.append(f'procman3_process_state_info{{{label},state="{escape_label(msg.state)}",'
+                         f'status="{escape_label(msg.status)}"}} 1')
+        for name, kind, help_text, value in PROC_METRICS:
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'# HELP {name} {help_text}')
+            suffix = '_total' if kind == 'counter' else ''
+            for (msg, _, output_bytes), label in zip(self.procs, labels):
+                lines.append(f'{name}{suffix}{{{label}}} {format_value(value(msg, output_bytes))}')
+        lines.append('# EOF\n')
+        return '\n'.join(lines)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,105 @@
+import codecs
+
+
+def is_continuation_byte(byte):
+    return (byte & 0xC0) == 0x80
+
+
+class OutputBuffer:
+    # Fixed size byte ring holding the merged stdout/stderr of a managed process.
+    # Every stream goes through its own incremental utf-8 decoder, so a character split across
+    # two reads (or interleaved with the other stream) reaches the ring whole. When the ring is
+    # full the oldest bytes are dropped instead of letting the child block on a full pipe.
+    #
+    # Bytes are addressed by their offset in the output stream of the process. Published bytes
+    # stay in the ring until they are overwritten, so subscribers can ask for a range again.
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buf = bytearray(capacity)
+        self.start = 0          # index in buf of the oldest retained byte
+        self.size = 0           # number of retained bytes
+        self.end_offset = 0     # stream offset after the newest byte
+        self.sent_offset = 0    # stream offset of the first byte not published yet
+        self.truncated = False
+        self.decoders = {}
+
+        # counters
+        self.bytes_read = 0
+        self.bytes_dropped = 0
+
+    @property
+    def start_offset(self):
+        return self.end_offset - self.size
+
+    def pending(self):
+        return self.end_offset - self.sent_offset
+
+    def feed(self, stream, data):
+        # returns the bytes that went into the ring
+        self.bytes_read += len(data)
+        decoder = self.decoders.get(stream)
+        if decoder is None:
+            decoder = self.decoders[stream] = codecs.getincrementaldecoder('utf-8')('replace')
+        data = decoder.decode(data).encode('utf-8')
+        self.write(data)
+        return data
+
+    def write(self, data):
+        n = len(data)
+        if n == 0:
+            return
+
+        if n >= self.capacity:
+            # only the newest bytes fit, replace the whole ring
+            self.buf[:] = data[n - self.capacity:]
+            self.start = 0
+            self.size = self.capacity
+        else:
+            overflow = self.size + n - self.capacity
+            if overflow > 0:
+                self.start = (self.start + overflow) % self.capacity
+                self.size -= overflow
+
+            end = (self.start + self.size) % self.capacity
+            first = min(n, self.capacity - end)
+            self.buf[end:end + first] = data[:first]
+            if first < n:
+                self.buf[:n - first] = data[first:]
+            self.size += n
+        self.end_offset += n
+
+        # bytes overwritten before they were published are lost
+        if self.sent_offset < self.start_offset:
+            self.bytes_dropped += self.start_offset - self.sent_offset
+            self.sent_offset = self.start_offset
+            self.truncated = True
+
+    def byte_at(self, offset):
+        return self.buf[(self.start + offset - self.start_offset) % self.capacity]
+
+    def read(self, offset, max_bytes):
+        # Returns (offset, data) with up to max_bytes retained bytes from offset on, trimmed to
+        # whole characters. The offset moves forward if the bytes it points to were overwritten.
+        offset = max(offset, self.start_offset)
+
+        # the oldest retained byte may be in the middle of a character
+        while offset < self.end_offset and is_continuation_byte(self.byte_at(offset)):
+            offset += 1
+
+        n = min(max_bytes, self.end_offset - offset)
+        while n > 0 and offset + n < self.end_offset and is_continuation_byte(self.byte_at(offset + n)):
+            n -= 1
+        if n <= 0:
+            return offset, b''
+
+        i = (self.start + offset - self.start_offset) % self.capacity
+        if i + n <= self.capacity:
+            data = bytes(self.buf[i:i + n])
+        else:
+            data = bytes(self.buf[i:]) + bytes(self.buf[:i + n - self.capacity])
+        return offset, data
+
+    def read_pending(self, max_bytes):
+        offset, data = self.read(self.sent_offset, max_bytes)
+        self.sent_offset = offset + len(data)
+        return offset, data
@@ -0,0 +1,317 @@
+import json
+import logging
+import os
+import queue
+import socketserver
+import struct
+import threading
+import urllib.parse
+
+from output_buffer import is_continuation_byte
+
+# index entry: spool offset of a chunk and the time it arrived, in us since the epoch
+INDEX_ENTRY = struct.Struct('<qq')
+
+# an index entry is also written for the first chunk after this many us without one
+INDEX_TIME_STEP = 1000000
+
+
+def spool_dir_name(process_name):
+    # percent-encoded, so every process name gets a directory of its own and the name can be read
+    # back; a leading dot is encoded too, so "." and ".." stay inside the spool
+    name = urllib.parse.quote(process_name, safe='')
+    return '%2E' + name[1:] if name.startswith('.') else name
+
+
+def segment_path(path, start, suffix):
+    return os.path.join(path, f'{start:016d}{suffix}')
+
+
+def list_segments(path):
+    # start offsets of the segments in path, oldest first
+    try:
+        names = os.listdir(path)
+    except FileNotFoundError:
+        return []
+    starts = []
+    for name in names:
+        if name.endswith('.out') and name[:-4].isdigit():
+            starts.append(int(name[:-4]))
+    return sorted(starts)
+
+
+def segment_size(path, start):
+    try:
+        return os.path.getsize(segment_path(path, start, '.out'))
+    except OSError:
+        return 0
+
+
+def read_index(path, start):
+    try:
+        with open(segment_path(path, start, '.idx'), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return []
+    # an entry cut short by a crash is ignored
+    return [INDEX_ENTRY.unpack_from(data, i) for i in range(0, len(data) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size)]
+
+
+class SegmentWriter:
+    # Appends the output of one process to its spool directory. The output is split in segments
+    # named after the spool offset of their first byte: <offset>.out holds the bytes and
+    # <offset>.idx the (offset, time) of a chunk every index_bytes bytes or every second.
+    # Offsets keep counting across deputy restarts, so a spool offset always means the same byte.
+    # They are not the offsets of proc_output_t and resend_output, which count from the start of
+    # the process in the running deputy; the two only meet through the arrival times.
+    def __init__(self, path, segment_bytes, max_segments, index_bytes):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.index_bytes = index_bytes
+        os.makedirs(path, exist_ok=True)
+
+        starts = list_segments(path)
+        self.segment_start = starts[-1] if starts else 0
+        self.segment_size = segment_size(path, self.segment_start)
+        self.open_segment()
+
+    def open_segment(self):
+        self.out = open(segment_path(self.path, self.segment_start, '.out'), 'ab')
+        self.idx = open(segment_path(self.path, self.segment_start, '.idx'), 'ab')
+        if self.idx.tell() % INDEX_ENTRY.size:
+            self.idx.truncate(self.idx.tell() - self.idx.tell() % INDEX_ENTRY.size)
+        self.index_offset = None    # offset of the last index entry, the first chunk always gets one
+        self.index_time = 0
+
+    @property
+    def end_offset(self):
+        return self.segment_start + self.segment_size
+
+    def write(self, data, timestamp):
+        if self.segment_size >= self.segment_bytes:
+            self.rotate()
+
+        offset = self.end_offset
+        if (self.index_offset is None or offset - self.index_offset >= self.index_bytes
+                or timestamp - self.index_time >= INDEX_TIME_STEP):
+            self.idx.write(INDEX_ENTRY.pack(offset, timestamp))
+            self.index_offset = offset
+            self.index_time = timestamp
+        self.out.write(data)
+        self.segment_size += len(data)
+
+    def rotate(self):
+        self.close()
+        self.segment_start = self.end_offset
+        self.segment_size = 0
+        self.open_segment()
+
+        starts = list_segments(self.path)
+        for start in starts[:max(0, len(starts) - self.max_segments)]:
+            for suffix in ('.out', '.idx'):
+                try:
+                    os.remove(segment_path(self.path, start, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def flush(self):
+        # the bytes first, so an index entry never points past the end of its segment
+        self.out.flush()
+        self.idx.flush()
+
+    def close(self):
+        self.out.close()
+        self.idx.close()
+
+
+def query_spool(path, start_time, end_time, offset, length, max_bytes):
+    # Returns the spooled output of a process in the intersection of the time range
+    # [start_time, end_time] (us since the epoch, 0 for unbounded) and the byte range
+    # [offset, offset + length) (length <= 0 up to the end), at most max_bytes of it.
+    # Times are resolved through the index, so the range may start up to one index step early.
+    result = {'first_offset': 0, 'end_offset': 0, 'offset': 0, 'data': b'', 'marks': [], 'truncated': False}
+    starts = list_segments(path)
+    if not starts:
+        return result
+
+    sizes = [segment_size(path, start) for start in starts]
+    first_offset = starts[0]
+    end_offset = starts[-1] + sizes[-1]
+    begin = max(offset, first_offset)
+    end = end_offset if length <= 0 else min(end_offset, offset + length)
+
+    marks = []
+    for start in starts:
+        marks.extend(read_index(path, start))
+    if start_time > 0:
+        # the last chunk that arrived before start_time may still hold bytes written after it
+        earlier = [mark_offset for mark_offset, mark_time in marks if mark_time <= start_time]
+        begin = max(begin, earlier[-1] if earlier else first_offset)
+    if end_time > 0:
+        later = [mark_offset for mark_offset, mark_time in marks if mark_time > end_time]
+        end = min(end, later[0] if later else end_offset)
+
+    result['first_offset'] = first_offset
+    result['end_offset'] = end_offset
+    result['offset'] = begin
+    if begin >= end:
+        return result
+
+    # one byte more than needed to tell whether the last character is cut
+    read_end = min(end, begin + max_bytes + 1)
+    data = bytearray()
+    for start, size in zip(starts, sizes):
+        lo, hi = max(begin + len(data), start), min(read_end, start + size)
+        if lo >= hi:
+            continue
+        try:
+            with open(segment_path(path, start, '.out'), 'rb') as f:
+                f.seek(lo - start)
+                data += f.read(hi - lo)
+        except OSError:
+            break
+
+    # whole characters only
+    skip = 0
+    while skip < len(data) and is_continuation_byte(data[skip]):
+        skip += 1
+    n = min(len(data), max_bytes + skip)
+    while n > skip and n < len(data) and is_continuation_byte(data[n]):
+        n -= 1
+
+    result['offset'] = begin + skip
+    result['data'] = bytes(data[skip:n])
+    result['truncated'] = result['offset'] + len(result['data']) < end
+    result['marks'] = [(mark_offset, mark_time) for mark_offset, mark_time in marks
+                       if result['offset'] <= mark_offset < result['offset'] + len(result['data'])]
+    return result
+
+
+class OutputSpool:
+    # Keeps the output of every managed process on disk, so it can be looked at after it left
+    # the output ring or after the deputy went down. The deputy hands the bytes over through a
+    # bounded queue and a background thread writes them; with the queue full chunks are dropped
+    # and counted, like log records. Queries go through the same queue, so they see every byte
+    # queued before them, and their callback runs on the spool thread.
+    def __init__(self, path, segment_bytes, max_segments, index_bytes, max_query_bytes, queue_size):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.max_segments = max(1, max_segments)
+        self.index_bytes = index_bytes
+        self.max_query_bytes = max_query_bytes
+        self.queue = queue.Queue(queue_size)
+        self.writers = {}
+        self.dropped = 0
+        self.server = None
+        os.makedirs(path, exist_ok=True)
+
+        self.thread = threading.Thread(target=self.run, name='output-spool', daemon=True)
+        self.thread.start()
+
+    def write(self, process_name, data, timestamp):
+        self.put(('write', process_name, data, timestamp))
+
+    def close_process(self, process_name):
+        # the files stay, only the writer goes away
+        self.put(('close', process_name))
+
+    def query(self, process_name, start_time, end_time, offset, length, callback):
+        # callback(result) with the dict of query_spool, or None if the spool fell behind
+        if not self.put(('query', process_name, (start_time, end_time, offset, length), callback)):
+            callback(None)
+
+    def put(self, item):
+        try:
+            if self.dropped and item[0] == 'write':
+                logging.warning(f"Output Spool: Dropped {self.dropped} output chunks, the spool writer fell behind.")
+                self.dropped = 0
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def run(self):
+        while True:
+            items = [self.queue.get()]
+            # write everything that piled up, then flush once
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            dirty = set()
+            for item in items:
+                try:
+                    if item[0] == 'write':
+                        writer = self.writer(item[1])
+                        writer.write(item[2], item[3])
+                        dirty.add(writer)
+                    elif item[0] == 'close':
+                        writer = self.writers.pop(item[1], None)
+                        if writer is not None:
+                            writer.close()
+                            dirty.discard(writer)
+                    elif item[0] == 'query':
+                        for writer in dirty:
+                            writer.flush()
+                        dirty.clear()
+                        item[3](self.run_query(item[1], *item[2]))
+                except Exception as e:
+                    logging.error(f"Output Spool: Failed to {item[0]} the spool of process {item[1]}: {e}")
+
+            for writer in dirty:
+                try:
+                    writer.flush()
+                except OSError as e:
+                    logging.error(f"Output Spool: Failed to flush {writer.path}: {e}")
+
+    def writer(self, process_name):
+        writer = self.writers.get(process_name)
+        if writer is None:
+            writer = self.writers[process_name] = SegmentWriter(
+                os.path.join(self.path, spool_dir_name(process_name)), self.segment_bytes,
+                self.max_segments, self.index_bytes)
+        return writer
+
+    def run_query(self, process_name, start_time, end_time, offset, length):
+        return query_spool(os.path.join(self.path, spool_dir_name(process_name)), start_time, end_time,
+                           offset, length, self.max_query_bytes)
+
+    def serve(self, socket_path):
+        # Answers queries on a local unix socket. A client sends one JSON line with name and
+        # optionally start_time, end_time, offset and length, and gets back one JSON line with
+        # first_offset, end_offset, offset, size, truncated and marks (or error), then size bytes.
+        spool = self
+
+        class QueryHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    request = json.loads(self.rfile.readline())
+                    params = [int(request.get(key, 0)) for key in ('start_time', 'end_time', 'offset', 'length')]
+                    name = str(request['name'])
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    self.wfile.write((json.dumps({'error': f"bad request: {e}"}) + '\n').encode())
+                    return
+
+                done = threading.Event()
+                answer = {}
+                spool.query(name, *params, lambda result: (answer.update(result=result), done.set()))
+                result = answer.get('result') if done.wait(10) else None
+                if result is None:
+                    self.wfile.write((json.dumps({'error': "spool busy, try again"}) + '\n').encode())
+                    return
+                header = {key: result[key] for key in ('first_offset', 'end_offset', 'offset', 'truncated', 'marks')}
+                header['size'] = len(result['data'])
+                self.wfile.write((json.dumps(header) + '\n').encode() + result['data'])
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.server = socketserver.ThreadingUnixStreamServer(socket_path, QueryHandler)
+        # the output of every process can be read through it, only the deputy's user may connect
+        os.chmod(socket_path, 0o600)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='output-spool-socket', daemon=True).start()
+        logging.info(f"Output Spool: Answering history queries on {socket_path}")
@@ -0,0 +1,119 @@
+import os
+import time
+import psutil
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+# /proc/<pid>/stat state letters to the names psutil uses
+STATUS_NAMES = {
+    'R': psutil.STATUS_RUNNING,
+    'S': psutil.STATUS_SLEEPING,
+    'D': psutil.STATUS_DISK_SLEEP,
+    'Z': psutil.STATUS_ZOMBIE,
+    'T': psutil.STATUS_STOPPED,
+    't': psutil.STATUS_TRACING_STOP,
+    'X': psutil.STATUS_DEAD,
+    'x': psutil.STATUS_DEAD,
+    'I': 'idle',
+    'W': 'waking',
+    'K': 'wake-kill',
+    'P': 'parked',
+}
+
+
+class ProcSample:
+    __slots__ = ['pid', 'ppid', 'status', 'nice', 'num_threads', 'cpu', 'cpu_time', 'rss', 'vms', 'start_time']
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ppid = 0
+        self.status = ''
+        self.nice = 0
+        self.num_threads = 0
+        self.cpu = 0.0          # fraction of one cpu since the previous sample
+        self.cpu_time = 0.0     # user + system seconds
+        self.rss = 0            # bytes
+        self.vms = 0            # bytes
+        self.start_time = 0.0   # seconds since the epoch
+
+
+class ProcSampler:
+    # Samples the metrics of the managed processes with a single read of /proc/<pid>/stat per
+    # process and tick. The file is opened once and re-read with pread, and cpu usage is computed
+    # from the utime + stime delta between two samples. stat already carries vsize and rss, so
+    # statm is not read. Without procfs it falls back to psutil.Process.oneshot().
+    def __init__(self):
+        self.use_procfs = os.path.exists('/proc/self/stat')
+        self.boot_time = psutil.boot_time()
+        self.fds = {}           # pid -> open /proc/<pid>/stat
+        self.procs = {}         # pid -> psutil.Process, fallback only
+        self.last = {}          # pid -> (cpu_time, monotonic time)
+
+    def sample(self, pid):
+        # returns None if the process is gone
+        now = time.monotonic()
+        try:
+            sample = self.read_procfs(pid) if self.use_procfs else self.read_psutil(pid)
+        except (OSError, psutil.Error):
+            self.forget(pid)
+            return None
+
+        last = self.last.get(pid)
+        if last is not None and now > last[1]:
+            sample.cpu = max(0.0, (sample.cpu_time - last[0]) / (now - last[1]))
+        self.last[pid] = (sample.cpu_time, now)
+        return sample
+
+    def read_procfs(self, pid):
+        fd = self.fds.get(pid)
+        if fd is None:
+            fd = self.fds[pid] = os.open(f'/proc/{pid}/stat', os.O_RDONLY)
+        data = os.pread(fd, 4096, 0)
+        if not data:
+            raise ProcessLookupError(pid)
+
+        # the command name is in parentheses and may contain spaces or parentheses itself
+        fields = data[data.rindex(b')') + 2:].split()
+        sample = ProcSample(pid)
+        sample.status = STATUS_NAMES.get(chr(fields[0][0]), '?')
+        sample.ppid = int(fields[1])
+        sample.cpu_time = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        sample.nice = int(fields[16])
+        sample.num_threads = int(fields[17])
+        sample.start_time = self.boot_time + int(fields[19]) / CLOCK_TICKS
+        sample.vms = int(fields[20])
+        sample.rss = int(fields[21]) * PAGE_SIZE
+        return sample
+
+    def read_psutil(self, pid):
+        proc = self.procs.get(pid)
+        if proc is None:
+            proc = self.procs[pid] = psutil.Process(pid)
+
+        sample = ProcSample(pid)
+        with proc.oneshot():
+            cpu_times = proc.cpu_times()
+            mem_info = proc.memory_info()
+            sample.status = proc.status()
+            sample.ppid = proc.ppid()
+            sample.nice = proc.nice()
+            sample.num_threads = proc.num_threads()
+            sample.start_time = proc.create_time()
+        sample.cpu_time = cpu_times.user + cpu_times.system
+        sample.rss = mem_info.rss
+        sample.vms = mem_info.vms
+        return sample
+
+    def forget(self, pid):
+        fd = self.fds.pop(pid, None)
+        if fd is not None:
+            os.close(fd)
+        self.procs.pop(pid, None)
+        self.last.pop(pid, None)
+
+    def prune(self, pids):
+        # drop the state of every pid not in pids
+        for pid in list(self.last.keys() | self.fds.keys() | self.procs.keys()):
+            if pid not in pids:
+                self.forget(pid)
@@ -0,0 +1,144 @@
+import os
+import signal
+import time
+import psutil
+
+from cgroups import read_cgroup_file, read_pressure
+
+
+def read_ppid_map():
+    # pid -> (ppid, start time in clock ticks) of every live process on the host, from one pass over /proc.
+    # Zombies are left out, they are gone already and only wait to be reaped.
+    ppids = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        entries = None
+
+    if entries is None:
+        for proc in psutil.process_iter(['ppid', 'create_time', 'status']):
+            if proc.info['status'] != psutil.STATUS_ZOMBIE:
+                ppids[proc.pid] = (proc.info['ppid'], proc.info['create_time'])
+        return ppids
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        fields = data[data.rindex(b')') + 2:].split()
+        if fields[0] != b'Z':
+            ppids[int(entry)] = (int(fields[1]), int(fields[19]))
+    return ppids
+
+
+class ProcTree:
+    # The processes started by one managed process: the child itself and everything it forked.
+    # With a cgroup v2 leaf the members are read from the cgroup, which also keeps cpu, memory,
+    # pressure and io accounting for the whole tree, exited members included. Without cgroups
+    # the tree is rebuilt from the parent pids, and descendants seen once are remembered by pid
+    # and start time so they stay in the tree after being reparented to init.
+    def __init__(self, pid, cgroup=None):
+        self.pid = pid
+        self.cgroup = cgroup
+        self.known = {}         # pid -> start time, fallback only
+
+        # cgroup accounting since the previous sample
+        self.last_time = None
+        self.last_cpu_usec = 0
+        self.last_io = (0, 0)
+        self.cpu = 0.0          # fraction of one cpu
+        self.io_read = 0.0      # bytes/s
+        self.io_write = 0.0     # bytes/s
+
+    def pids(self, ppids=None):
+        # live members, the managed process first if it is still around
+        if self.cgroup is not None:
+            data = read_cgroup_file(self.cgroup, 'cgroup.procs')
+            members = [int(pid) for pid in data.split()] if data else []
+            members.sort(key=lambda pid: pid != self.pid)
+            return members
+
+        if ppids is None:
+            ppids = read_ppid_map()
+
+        # remembered members that are still the same process
+        members = [pid for pid, start in self.known.items() if pid in ppids and ppids[pid][1] == start]
+        if self.pid in ppids and self.pid not in self.known:
+            members.insert(0, self.pid)
+
+        children = {}
+        for pid, (ppid, _) in ppids.items():
+            children.setdefault(ppid, []).append(pid)
+        stack = list(members)
+        seen = set(members)
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    members.append(child)
+                    stack.append(child)
+
+        self.known = {pid: ppids[pid][1] for pid in members}
+        members.sort(key=lambda pid: pid != self.pid)
+        return members
+
+    def signal(self, sig, ppids=None):
+        # returns the number of processes signalled
+        if self.cgroup is not None and sig == signal.SIGKILL and os.path.exists(os.path.join(self.cgroup, 'cgroup.kill')):
+            members = self.pids()
+            try:
+                with open(os.path.join(self.cgroup, 'cgroup.kill'), 'w') as f:
+                    f.write('1')
+                return len(members)
+            except OSError:
+                pass
+
+        count = 0
+        for pid in self.pids(ppids):
+            try:
+                os.kill(pid, sig)
+                count += 1
+            except ProcessLookupError:
+                pass
+        return count
+
+    def update_cgroup_stats(self):
+        # cpu and io rates of the cgroup since the previous call
+        now = time.monotonic()
+        cpu_usec = 0
+        for line in (read_cgroup_file(self.cgroup, 'cpu.stat') or '').splitlines():
+            key, _, value = line.partition(' ')
+            if key == 'usage_usec':
+                cpu_usec = int(value)
+                break
+
+        rbytes = wbytes = 0
+        for line in (read_cgroup_file(self.cgroup, 'io.stat') or '').splitlines():
+            for field in line.split()[1:]:
+                key, _, value = field.partition('=')
+                if key == 'rbytes':
+                    rbytes += int(value)
+                elif key == 'wbytes':
+                    wbytes += int(value)
+
+        if self.last_time is not None and now > self.last_time:
+            dt = now - self.last_time
+            self.cpu = max(0.0, (cpu_usec - self.last_cpu_usec) / 1e6 / dt)
+            self.io_read = max(0, rbytes - self.last_io[0]) / dt
+            self.io_write = max(0, wbytes - self.last_io[1]) / dt
+        self.last_time = now
+        self.last_cpu_usec = cpu_usec
+        self.last_io = (rbytes, wbytes)
+
+    def memory_current(self):
+        # bytes charged to the cgroup, -1 without the memory controller
+        data = read_cgroup_file(self.cgroup, 'memory.current')
+        return int(data) if data else -1
+
+    def pressure(self, resource):
+        # % of the last 10 s some member was stalled on the resource, -1 if unknown
+        return read_pressure(self.cgroup, resource)
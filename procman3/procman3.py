@@ -3,50 +3,70 @@ import os
 import time
 import lcm
 import psutil
-from subprocess import PIPE
+from subprocess import DEVNULL, PIPE
 import logging
 import socket
 import yaml
 import fcntl
+import signal
+import random
 import sys
+import zlib
+from collections import OrderedDict
 
-# Import LCM message types from ../procman3_messages
+# Import LCM message types from ../procman3_messages and the shared helpers from ../procman3_client
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from procman3_messages import command_t, host_info_t, host_procs_t, proc_info_t, proc_output_t
-
-def get_ip():
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    s.settimeout(0)
-    try:
-        # doesn't even have to be reachable
-        s.connect(('10.254.254.254', 1))
-        IP = s.getsockname()[0]
-    except Exception:
-        IP = '127.0.0.1'
-    finally:
-        s.close()
-    return IP
-
-class Timer:
-    def __init__(self, timeout):
-        now = time.time()
-        self.t0 = now
-        self.period = timeout
-        self.next = now + timeout
-
-    def timeout(self):
-        now = time.time()
-        if now > self.next:
-            self.next +=self.period
-            return True
-        else:
-            return False
+from procman3_client import fill_settings, settings_from_msg, settings_from_yaml
+from procman3_messages import (command_batch_t, command_result_t, command_results_t, command_t, histogram_summary_t, host_diagnostics_t, host_info_t,
+                               host_outputs_t, host_procs_t, host_specs_t, host_stats_t, metric_history_t, output_history_t, proc_info_t, proc_output_t, proc_spec_t)
+from cgroups import CgroupManager
+from diagnostics import Diagnostics
+from event_loop import EventLoop
+from host_telemetry import HostTelemetry
+from journal import AdoptedProcess, ProcessJournal, make_output_fifo, open_output_fifo, remove_output_fifo
+from log_pipeline import setup_logging
+from metric_history import PERCENTILES, MetricHistory
+from metrics_exporter import MetricsExporter
+from output_buffer import OutputBuffer
+from output_spool import OutputSpool, spool_dir_name
+from proc_sampler import ProcSampler
+from proc_tree import ProcTree, read_ppid_map
+from readiness import LogProbe, make_probe
+from spawn import apply_settings, has_settings, sched_params, spawn_command, write_cgroup_limits
 
 def set_nonblocking(fd):
     fl = fcntl.fcntl(fd, fcntl.F_GETFL)
     fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
 
 
+def proc_info_key(msg_proc):
+    # fields compared to decide if a proc goes into a delta, cpu and memory are quantized
+    # so measurement noise does not put every running proc in every delta
+    return (msg_proc.state, msg_proc.status, msg_proc.errors, round(msg_proc.cpu, 2), msg_proc.mem_rss >> 10,
+            msg_proc.mem_vms >> 10, msg_proc.priority, msg_proc.pid, msg_proc.ppid, msg_proc.exit_code,
+            msg_proc.start_time, msg_proc.ready, msg_proc.restart_count, msg_proc.next_restart, msg_proc.num_tree_procs, msg_proc.mem_cgroup >> 10, round(msg_proc.cpu_pressure),
+            round(msg_proc.mem_pressure), round(msg_proc.io_pressure), int(msg_proc.io_read) >> 6,
+            int(msg_proc.io_write) >> 6)
+
+
+def pidfd_supported():
+    # pidfd_open needs python >= 3.9 and linux >= 5.3
+    if not hasattr(os, 'pidfd_open'):
+        return False
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+        return True
+    except OSError:
+        return False
+
+
+def default_state_dir():
+    # what outlives the deputy goes here: /var/lib/procman3 for root, $XDG_STATE_HOME/procman3 otherwise
+    if os.geteuid() == 0:
+        return '/var/lib/procman3'
+    return os.path.join(os.environ.get('XDG_STATE_HOME') or os.path.expanduser('~/.local/state'), 'procman3')
+
+
 def is_running(proc):
     if proc is None:    
         return False
@@ -70,59 +90,205 @@ class Procman3:
         self.lc = lcm.LCM()
         
         self.command_channel = config['command_channel']
+        self.command_batch_channel = config.get('command_batch_channel', 'procman3/command_batches')
+        self.command_results_channel = config.get('command_results_channel', 'procman3/command_results')
         self.deputy_info_channel = config['deputy_info_channel']
         self.proc_outputs_channel = config['proc_outputs_channel']
         self.deputy_procs_channel = config['deputy_procs_channel']
+        self.deputy_specs_channel = config.get('deputy_specs_channel', 'procman3/host_specs')
+        self.deputy_stats_channel = config.get('deputy_stats_channel', 'procman3/host_stats')
+        self.output_history_channel = config.get('output_history_channel', 'procman3/output_history')
+        self.metric_history_channel = config.get('metric_history_channel', 'procman3/metric_history')
+        self.deputy_diagnostics_channel = config.get('deputy_diagnostics_channel', 'procman3/host_diagnostics')
         self.stop_timeout = config['stop_timeout']
+        self.restart_backoff_initial = config.get('restart_backoff_initial', 0.5)
+        self.restart_backoff_max = config.get('restart_backoff_max', 30)
+        self.restart_limit = config.get('restart_limit', 5)
+        self.restart_window = config.get('restart_window', 60)
+        self.output_buffer_size = config.get('output_buffer_size', 256 * 1024)
+        self.output_chunk_size = max(4, config.get('output_chunk_size', 8192))
+        self.output_flush_bytes = config.get('output_flush_bytes', 32 * 1024)
+        self.output_compression = config.get('output_compression', True)
+        self.output_sync_every = max(1, config.get('output_sync_every', 10))
         
-        self.last_publish_time = 0
-        self.last_net_tx = 0
-        self.last_net_rx = 0
+        self.output_batch_seq = 0
+        self.output_publish_count = 0
+        self.output_pending_bytes = 0
+        self.output_flush_scheduled = False
         
-        self.monitor_timer = Timer(config['monitor_interval'])
-        self.output_timer = Timer(config['output_interval'])
-        self.host_status_timer = Timer(config['deputy_status_interval'])
-        self.procs_status_timer = Timer(config['procs_status_interval'])
+        self.telemetry = HostTelemetry()
+        
+        self.monitor_interval = config['monitor_interval']
+        self.output_interval = config['output_interval']
+        self.host_status_interval = config['deputy_status_interval']
+        self.procs_status_interval = config['procs_status_interval']
+        self.procs_keyframe_every = max(1, config.get('procs_keyframe_every', 10))
+        self.ready_check_interval = config.get('ready_check_interval', 0.1)
+        
+        # every sample published in host_info_t and host_procs_t is also kept for query_metrics
+        self.metrics = MetricHistory(config.get('metrics_retention', 3600), self.procs_status_interval, self.host_status_interval)
+        self.metrics_max_points = config.get('metrics_max_points', 600)
+        self.probe_timer = None
+        
+        self.spec_version = 0
+        self.specs_update_scheduled = False
+        self.command_results = OrderedDict()    # command_id -> command_result_t of the latest commands
+        self.command_history_size = max(1, config.get('command_history_size', 1024))
+        self.pending_results = []
+        self.procs_seq = 0
+        self.last_proc_keys = {}
+        self.sampler = ProcSampler()
+        self.stopping = {}      # proc -> name of the processes waiting to exit after a SIGTERM
+        self.group_ops = []     # group commands waiting for their members to stop
+        self.stale_trees = []   # trees of deleted or restarted processes with members left
+        self.ppids = None       # read_ppid_map() of the loop iteration ppids_iteration
+        self.ppids_iteration = None
         
         self.hostname = socket.gethostname() 
         self.subscription = self.lc.subscribe(self.command_channel, self.command_handler)
+        self.batch_subscription = self.lc.subscribe(self.command_batch_channel, self.command_batch_handler)
         
-        # Configure logging
-        #get the directory of the current file
-        current_dir = os.path.dirname(os.path.realpath(__file__))
-        log_dir = os.path.join(current_dir, './log/')
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-            
-        log_file = os.path.join(log_dir, "procman3.log")
-        logging.basicConfig(
-            filename=log_file,
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+        # the loop wakes up only when a command arrives, a child writes output or a timer is due
+        self.loop = EventLoop()
+        self.loop.add_reader(self.lc.fileno(), self.handle_lcm)
+        
+        # the deputy times its own loop callbacks and commands and counts what it publishes
+        self.diagnostics_interval = config.get('diagnostics_interval', 10)
+        self.diagnostics = None
+        self.diagnostics_iterations = 0
+        if self.diagnostics_interval > 0:
+            self.diagnostics = Diagnostics()
+            self.loop.profile = self.diagnostics.record_phase
+        
+        # Configure logging, records are written to the rotating log file by a background thread
+        self.log_file = setup_logging(config, current_dir)
+        
+        # child exits are detected through a pidfd per child, or a SIGCHLD self-pipe on older kernels
+        self.use_pidfd = pidfd_supported()
+        if not self.use_pidfd:
+            self.setup_sigchld()
+        
+        # relative paths of the journal and the spool are below the state dir, outside the package
+        self.state_dir = os.path.expanduser(config.get('state_dir', '') or default_state_dir())
+        
+        # every started process gets a cgroup v2 leaf when the deputy's cgroup is delegated
+        self.cgroups = CgroupManager(config.get('use_cgroups', False))
+        
+        # the process table survives deputy restarts through the journal, replayed in run(); the
+        # children then write their output to fifos next to it, which the next run opens again
+        journal_file = config.get('journal_file', 'procman3.journal')
+        self.journal = None
+        self.fifo_dir = None
+        if journal_file:
+            journal_file = os.path.join(self.state_dir, journal_file)
+            try:
+                self.journal = ProcessJournal(journal_file)
+                self.fifo_dir = os.path.join(os.path.dirname(journal_file), 'output_fifos')
+                os.makedirs(self.fifo_dir, exist_ok=True)
+            except OSError as e:
+                logging.error(f"Journal: Failed to create {journal_file}, processes are not re-adopted after a restart: {e}")
+                self.journal = None
+                self.fifo_dir = None
+        self.journal_flush_scheduled = False
+        
+        # processes launched at startup without waiting for a GUI, in the GUI's yaml format
+        boot_manifest = config.get('boot_manifest', '')
+        self.boot_manifest = os.path.join(current_dir, boot_manifest) if boot_manifest else None
+        
+        # the output of every process is also written to disk, for queries after it left the ring
+        spool_dir = config.get('output_spool_dir', '')
+        self.spool = None
+        if spool_dir:
+            spool_dir = os.path.join(self.state_dir, spool_dir)
+            try:
+                self.spool = OutputSpool(spool_dir, config.get('output_spool_segment_bytes', 4 * 1024 * 1024),
+                                         config.get('output_spool_segments', 16), config.get('output_spool_index_bytes', 4096),
+                                         config.get('output_history_max_bytes', 256 * 1024), config.get('output_spool_queue_size', 4096))
+            except OSError as e:
+                logging.error(f"Output Spool: Failed to create {spool_dir}, output is not spooled: {e}")
+        if self.spool is not None:
+            spool_socket = config.get('output_spool_socket', '')
+            if spool_socket:
+                try:
+                    self.spool.serve(os.path.join(self.state_dir, spool_socket))
+                except OSError as e:
+                    logging.error(f"Output Spool: Failed to listen on {spool_socket}: {e}")
+        
+        # the latest host and process metrics are served over http for scrapers, localhost only by default
+        self.exporter = None
+        exporter_port = config.get('metrics_exporter_port', 0)
+        if exporter_port:
+            try:
+                self.exporter = MetricsExporter(self.hostname, config.get('metrics_exporter_address', '127.0.0.1'), exporter_port)
+            except OSError as e:
+                logging.error(f"Metrics Exporter: Failed to listen on port {exporter_port}: {e}")
         
         logging.info(f"Deputy initialized with channels: "
                      f"command_channel={self.command_channel}, "
+                     f"command_batch_channel={self.command_batch_channel}, "
+                     f"command_results_channel={self.command_results_channel}, "
                      f"deputy_info_channel={self.deputy_info_channel}, "
                      f"proc_outputs_channel={self.proc_outputs_channel}, "
-                     f"deputy_procs_channel={self.deputy_procs_channel}")
+                     f"deputy_procs_channel={self.deputy_procs_channel}, "
+                     f"deputy_specs_channel={self.deputy_specs_channel}, "
+                     f"deputy_stats_channel={self.deputy_stats_channel}, "
+                     f"output_history_channel={self.output_history_channel}, "
+                     f"metric_history_channel={self.metric_history_channel}, "
+                     f"deputy_diagnostics_channel={self.deputy_diagnostics_channel}")
 
 
+    def publish(self, channel, data):
+        if self.diagnostics is not None:
+            self.diagnostics.record_publish(channel, len(data))
+        self.lc.publish(channel, data)
+
     def command_handler(self, channel, data):
         msg = command_t.decode(data)
         if msg.hostname != self.hostname:
-            logging.info(f"Command handler: Ignored command for deputy {msg.deputy}")
+            logging.info(f"Command handler: Ignored command for deputy {msg.hostname}")
+            return
+        self.execute_command(msg)
+
+    def command_batch_handler(self, channel, data):
+        msg = command_batch_t.decode(data)
+        if msg.hostname != self.hostname:
+            logging.info(f"Command handler: Ignored batch of {msg.num_commands} commands for deputy {msg.hostname}")
             return
 
+        # the specs and the journal are written once for the whole batch, at the end of this loop iteration
+        logging.info(f"Command handler: Received batch of {msg.num_commands} commands")
+        for command in msg.commands:
+            self.execute_command(command)
+
+    def execute_command(self, msg):
+        if msg.command_id and msg.command_id in self.command_results:
+            # a retry of a command whose answer was lost, answer again without executing it twice
+            logging.info(f"Command handler: Duplicate command {msg.command_id} ({msg.command}), sending its result again.")
+            self.command_results.move_to_end(msg.command_id)
+            result = command_result_t.decode(self.command_results[msg.command_id].encode())
+            result.duplicate = True
+            self.queue_command_result(result)
+            return
+        
         logging.info(f"Command handler: Received command: {msg.command} for process: {msg.proc_command}")
+        received = time.monotonic()
+        command = msg.command
         group = msg.group
-        
+        done, ok, error = True, True, ''
+        if msg.command in ("start_process", "stop_process", "delete_process", "resend_output") and msg.name not in self.processes:
+            ok, error = False, f"Process {msg.name} not found"
         
         if msg.command == "create_process":
-            self.create_process(msg.name, msg.proc_command, msg.auto_restart, msg.realtime, group)
+            self.create_process(msg.name, msg.proc_command, msg.auto_restart, msg.realtime, group, settings_from_msg(msg))
         
         elif msg.command == "start_process":
             self.start_process(msg.name)
+            proc_info = self.processes.get(msg.name)
+            if proc_info is not None:
+                # errors of a running process are settings that could not be applied
+                ok, error = proc_info['state'] == 'R', proc_info['errors']
+                if not ok and not error:
+                    error = f"Process {msg.name} is in state {proc_info['state']}"
             
         elif msg.command == "stop_process":
             self.stop_process(msg.name)
@@ -130,10 +296,75 @@ class Procman3:
         elif msg.command == "delete_process":
             self.delete_process(msg.name)
             
+        elif msg.command in ("start_group", "stop_group", "restart_group"):
+            op = self.group_command(msg.command, group, msg.command_id)
+            if op is None:
+                ok, error = False, f"No processes in group {group}"
+            elif 'ok' in op:
+                done = False    # answered by finish_group_command
+            else:
+                # the members are stopping, acknowledge now and answer when they settled
+                done = False
+                self.command_result(msg.command_id, msg.command, '', group, False, True, '', received)
+            
+        elif msg.command == "resend_output":
+            self.resend_output(msg.name, msg.offset, msg.length)
+            
+        elif msg.command == "query_output":
+            self.query_output(msg.name, msg.start_time, msg.end_time, msg.offset, msg.length)
+            
+        elif msg.command == "query_metrics":
+            error = self.query_metrics(msg.name, msg.start_time, msg.end_time, msg.max_points)
+            ok = not error
+            
+        elif msg.command == "publish_specs":
+            self.publish_host_specs()
+            
         else:
             logging.warning(f"Command handler: Unknown command: {msg.command} for process: {msg.proc_command}")
+            ok, error = False, f"Unknown command {msg.command}"
+            command = "unknown"     # the names of the histograms are not up to the senders
+        
+        if done:
+            self.command_result(msg.command_id, msg.command, msg.name, group, True, ok, error, received)
+        if self.diagnostics is not None:
+            self.diagnostics.record_command(command, time.monotonic() - received)
+    
+    def command_result(self, command_id, command, name, group, done, ok, error, received):
+        # remembered for duplicates and published at the end of the loop iteration, with the
+        # results of the other commands handled in it
+        if not command_id:
+            return
+        result = command_result_t()
+        result.command_id = command_id
+        result.command = command
+        result.name = name
+        result.group = group
+        result.done = done
+        result.ok = ok
+        result.error = error
+        result.duration = int((time.monotonic() - received) * 1e6)
+        self.command_results[command_id] = result
+        self.command_results.move_to_end(command_id)
+        while len(self.command_results) > self.command_history_size:
+            self.command_results.popitem(last=False)
+        self.queue_command_result(result)
+    
+    def queue_command_result(self, result):
+        if not self.pending_results:
+            self.loop.call_later(0, self.publish_command_results)
+        self.pending_results.append(result)
+    
+    def publish_command_results(self):
+        msg = command_results_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.hostname = self.hostname
+        msg.results = self.pending_results
+        msg.num_results = len(msg.results)
+        self.pending_results = []
+        self.publish(self.command_results_channel, msg.encode())
 
-    def create_process(self, process_name, proc_command, restart_on_failure, realtime, group):
+    def create_process(self, process_name, proc_command, restart_on_failure, realtime, group, settings):
         
         # if proc exist first we stop it, then we modify the process
         if process_name in self.processes:
@@ -141,15 +372,24 @@ class Procman3:
             proc = proc_info['proc']
             if is_running(proc):
                 self.stop_process(process_name)
+            self.disarm_probe(proc_info)
+            self.cancel_restart(proc_info)
+            # members still winding down are kept track of, and their cgroup removed once they are gone
+            self.release_tree(proc_info)
                 
         self.processes[process_name] = {'proc': None, 'cmd': proc_command,'restart': restart_on_failure, 'realtime': realtime,
-                                        'exit_code': -1, 'group': group, 'errors': '', 'state': 'T', 'status': 'S', 'runtime': 0,
-                                        'stdout': '', 'stderr': ''} 
+                                        'exit_code': -1, 'exit_time': 0, 'group': group, 'errors': '', 'state': 'T', 'status': 'S', 'runtime': 0,
+                                        'output': OutputBuffer(self.output_buffer_size), 'output_seq': 0, 'settings': settings,
+                                        'ready_time': 0, 'restart_count': 0, 'restart_times': [], 'backoff': 0,
+                                        'next_restart': 0}
         
         logging.info(f"Create Process: Created process: {process_name} with command: {proc_command} auto_restart: {restart_on_failure} and realtime: {realtime}")
+        self.journal_record({'op': 'create', 'name': process_name, 'cmd': proc_command, 'restart': restart_on_failure,
+                             'realtime': realtime, 'group': group, 'settings': settings})
+        self.update_specs()
             
             
-    def start_process(self, process_name):
+    def start_process(self, process_name, auto_restart=False):
         
         if process_name not in self.processes:
             logging.warning(f"Start Process: Process {process_name} not found in the process table. Ignoring command.")
@@ -157,6 +397,12 @@ class Procman3:
        
         # here the process exists in the process table, check if it is running
         proc_info = self.processes[process_name]
+        if not auto_restart:
+            # started on purpose, the crash loop detection and the backoff start over
+            self.cancel_restart(proc_info)
+            proc_info['restart_count'] = 0
+            proc_info['restart_times'] = []
+            proc_info['backoff'] = 0
         proc = proc_info['proc']
         proc_command = proc_info['cmd']
         realtime = proc_info['realtime']
@@ -167,73 +413,271 @@ class Procman3:
         else:
             #start the process
             logging.info(f"Start Process: Starting process: {process_name} with command: {proc_command}")      
+            tree = proc_info.get('tree')
+            if tree is not None:
+                # a previous run that crashed may have left its workload behind
+                count = tree.signal(signal.SIGKILL, self.ppid_map(tree))
+                if count:
+                    logging.warning(f"Start Process: Killed {count} leftover processes of the previous run of {process_name}.")
+            self.release_tree(proc_info)
+            settings = proc_info['settings']
+            spawn_errors = []
+            leaf = self.cgroups.create_leaf(process_name)
+            if leaf:
+                try:
+                    write_cgroup_limits(leaf, settings)
+                except OSError as e:
+                    spawn_errors.append(f"cgroup limits: {e}")
+            elif settings['cpu_quota'] > 0 or settings['mem_max'] > 0:
+                spawn_errors.append("cgroup limits need a delegated cgroup v2, not applied")
+            
+            gate = None
             try:
-                proc = psutil.Popen([proc_command], stdout=PIPE, stderr=PIPE)
-                set_nonblocking(proc.stdout) # Set non-blocking mode for stdout
-                set_nonblocking(proc.stderr) # Set non-blocking mode for stderr
+                # no preexec_fn, the deputy has threads: a child with a cgroup leaf or settings starts as
+                # a shell wrapper that waits at a gate until the deputy moved it and applied them
+                sched = sched_params(settings, realtime)
+                if leaf or has_settings(settings, sched):
+                    gate = os.pipe()
+                proc, pipes, fifos = self.spawn(process_name, spawn_command(proc_command, gate is not None),
+                                                gate[0] if gate else DEVNULL)
+                if leaf and not self.cgroups.join(leaf, proc.pid):
+                    logging.warning(f"Start Process: Process {process_name} did not join cgroup {leaf}, "
+                                    f"using the process tree for accounting.")
+                    self.cgroups.remove_leaf(leaf)
+                    leaf = None
+                spawn_errors.extend(apply_settings(proc.pid, settings, sched))
+                if gate:
+                    # opens the gate, the wrapper execs the command
+                    for fd in gate:
+                        os.close(fd)
+                    gate = None
+                self.processes[process_name]['tree'] = ProcTree(proc.pid, leaf)
+                # the map of this iteration does not have the new child yet
+                self.ppids_iteration = None
+                self.processes[process_name]['fifos'] = fifos
+                self.journal_record({'op': 'start', 'name': process_name, 'pid': proc.pid,
+                                     'create_time': proc.create_time(), 'cgroup': leaf, 'fifos': fifos})
+                self.watch_output(process_name, pipes, fifos)
+                self.watch_exit(process_name, proc)
                 
                 # update the process table with the new process
                 self.processes[process_name]['proc'] = proc
                 self.processes[process_name]['state'] = 'R'                
+                self.processes[process_name]['start_mono'] = time.monotonic()
                 logging.info(f"Start Process: Started process: {process_name} with PID {proc.pid}")
+                probe_error = self.arm_probe(process_name)
+                if probe_error:
+                    spawn_errors.append(probe_error)
 
-                if realtime:
-                    try:
-                        os.sched_setscheduler(proc.pid, os.SCHED_FIFO, os.sched_param(40))
-                        logging.info(f"Start Process: Set real-time priority and FIFO scheduler for process: {process_name} with PID {proc.pid}")
-                    except PermissionError:
-                        logging.error(f"Start Process: Failed to set real-time priority for process {process_name}: Permission denied.")
-                        self.processes[process_name]['errors'] = f"Failed to set real-time priority for process {process_name}: Permission denied."
-                    except Exception as e:
-                        logging.error(f"Start Process: Failed to set real-time priority for process {process_name}: {e}")
-                        self.processes[process_name]['errors'] = str(e)
+                # errors of the previous run (a crash loop, an exit while the deputy was down, a failed
+                # start) do not carry over to this one
+                self.processes[process_name]['errors'] = "; ".join(spawn_errors)
+                if spawn_errors:
+                    # the process runs anyway, like it always did when the realtime priority could not be set
+                    logging.error(f"Start Process: Failed to apply settings to process {process_name}: {'; '.join(spawn_errors)}")
 
             except Exception as e:
                 logging.error(f"Start Process: Failed to start process {process_name}: {e}")
+                for fd in gate or ():
+                    os.close(fd)
+                if leaf:
+                    self.cgroups.remove_leaf(leaf)
                 self.processes[process_name]['state'] = 'F'
                 self.processes[process_name]['proc'] = None
                 self.processes[process_name]['errors'] = str(e)
+                if proc_info['restart']:
+                    # e.g. a binary on a file system that is not mounted yet, retried like a crash
+                    self.schedule_restart(process_name)
+        
+    
+    def spawn(self, process_name, args, stdin):
+        # Returns the child, its (stdout, stderr) read ends and their fifos (None for plain pipes).
+        # With the journal on, the output goes through fifos that outlive the deputy. The child holds
+        # a read end of them too, so while the deputy is down its writes fill the pipe buffer and then
+        # block until the next run reads them, instead of killing it with SIGPIPE.
+        if self.fifo_dir is None:
+            proc = psutil.Popen(args, stdin=stdin, stdout=PIPE, stderr=PIPE)
+            return proc, (proc.stdout, proc.stderr), None
         
+        stamp = f'{spool_dir_name(process_name)}.{time.time_ns()}'
+        fifos = [os.path.join(self.fifo_dir, f'{stamp}.{stream}') for stream in ('stdout', 'stderr')]
+        read_fds, write_fds = [], []
+        try:
+            for fifo in fifos:
+                read_fds.append(make_output_fifo(fifo))
+                write_fds.append(os.open(fifo, os.O_WRONLY | os.O_CLOEXEC))
+            proc = psutil.Popen(args, stdin=stdin, stdout=write_fds[0], stderr=write_fds[1], pass_fds=read_fds)
+        except Exception:
+            for fd in read_fds:
+                os.close(fd)
+            for fifo in fifos:
+                remove_output_fifo(fifo)
+            raise
+        finally:
+            for fd in write_fds:
+                os.close(fd)
+        return proc, tuple(os.fdopen(fd, 'rb', buffering=0) for fd in read_fds), fifos
+    
+    def watch_output(self, process_name, pipes, fifos):
+        # drain the pipes as soon as the child writes to them
+        for stream, pipe, fifo in zip(('stdout', 'stderr'), pipes, fifos or (None, None)):
+            set_nonblocking(pipe)
+            self.loop.add_reader(pipe, lambda pipe, stream=stream, fifo=fifo: self.read_output(process_name, stream, pipe, fifo),
+                                 'read_output')
     
     def stop_process(self, process_name):
+        # SIGTERM now, SIGKILL after stop_timeout; the exit itself is handled by handle_exit
         if process_name in self.processes:
             proc_info = self.processes[process_name]
             proc = proc_info['proc']
+            tree = proc_info.get('tree')
+            self.cancel_restart(proc_info)
+            
+            if proc_info['state'] not in ('R', 'S') and tree is not None:
+                # the process is gone but the processes it forked are still around
+                count = tree.signal(signal.SIGKILL, self.ppid_map(tree))
+                if count:
+                    logging.warning(f"Stop Process: Killed {count} leftover processes of {process_name}.")
             
-            if(proc and proc_info['state'] == 'T'):
+            if(proc and proc_info['state'] in ('T', 'K')):
                 logging.info(f"Stop Process: Process {process_name} is already stopped.")
                 return
             
             if proc is None:
                 logging.info(f"Stop Process: Process {process_name} not running, ignoring command.")
                 return
-            try:
-                proc.terminate()
-                proc.wait(timeout=self.stop_timeout)  # Use the stop timeout variable
-                logging.info(f"Stop Process: Gracefully stopped process: {process_name} with PID {proc.pid}")
-                self.processes[process_name]['exit_code'] = proc.returncode
-                self.processes[process_name]['state'] = 'T'
-                
-            except psutil.TimeoutExpired:
-                proc.kill()  # Force kill
-                logging.warning(f"Stop Process: Forcefully killed process: {process_name} with PID {proc.pid}")
-                self.processes[process_name]['exit_code'] = proc.returncode
-                self.processes[process_name]['state'] = 'K'
+            
+            if proc_info['state'] == 'S':
+                logging.info(f"Stop Process: Process {process_name} is already stopping.")
+                return
+            
+            proc_info['state'] = 'S'
+            self.stopping[proc] = process_name
+            # the whole tree, so launcher scripts do not leave their workload behind
+            count = tree.signal(signal.SIGTERM, self.ppid_map(tree))
+            logging.info(f"Stop Process: Sent SIGTERM to process: {process_name} with PID {proc.pid} "
+                         f"and {max(0, count - 1)} descendants")
+            
+            proc_info['kill_timer'] = self.loop.call_later(self.stop_timeout, lambda: self.kill_process(process_name, proc, tree),
+                                                        'kill_process')
+            
+            # it may have exited already, e.g. if it was never reaped
+            self.handle_exit(process_name, proc)
             
         else:
             logging.warning(f"Stop Process: Process {process_name} not found, ignoring command.")
+    
+    def kill_process(self, process_name, proc, tree):
+        # SIGKILL whatever is left of the tree, the process itself may have exited already
+        running = proc.poll() is None
+        count = tree.signal(signal.SIGKILL, self.ppid_map(tree))
+        if not count:
+            return
+        
+        if running:
+            logging.warning(f"Stop Process: Forcefully killed process: {process_name} with PID {proc.pid}")
+            proc_info = self.processes.get(process_name)
+            if proc_info is not None and proc_info['proc'] is proc:
+                proc_info['killed'] = True
+        else:
+            logging.warning(f"Stop Process: Forcefully killed {count} leftover processes of {process_name}.")
 
     def delete_process(self, process_name):
         if process_name in self.processes:
             if self.processes[process_name]['proc'] is not None:
+                # the entry goes away now, the stop keeps going in the background
                 self.stop_process(process_name)
                 
+            self.release_tree(self.processes[process_name])
+            self.disarm_probe(self.processes[process_name])
+            self.cancel_restart(self.processes[process_name])
             del self.processes[process_name]
+            self.last_proc_keys.pop(process_name, None)
+            self.journal_record({'op': 'delete', 'name': process_name})
+            if self.spool is not None:
+                self.spool.close_process(process_name)
+            self.metrics.forget_proc(process_name)
             logging.info(f"Delete Process: Deleted process: {process_name}")
+            self.update_specs()
         else:
             logging.warning(f"Delete Process: Process {process_name} not found, ignoring command.")
         
     
+    def group_command(self, command, group, command_id=''):
+        # start, stop or restart every member of the group owned by this deputy at once,
+        # with a single result once all of them have settled
+        members = [name for name, procces in self.processes.items() if procces['group'] == group]
+        if not members:
+            logging.warning(f"Group Command: No processes in group {group}, ignoring {command}.")
+            return None
+        
+        logging.info(f"Group Command: {command} for group {group} with {len(members)} processes.")
+        op = {'command': command, 'group': group, 'members': members, 'pending': set(),
+              'start_time': time.monotonic(), 'results': {}, 'command_id': command_id}
+        if command == 'start_group':
+            self.start_group_members(op)
+        else:
+            self.stop_group_members(op)
+        return op
+    
+    def stop_group_members(self, op):
+        # stop_process does not wait, every member gets SIGTERM right away
+        for name in op['members']:
+            self.stop_process(name)
+            if self.processes[name]['state'] == 'S':
+                op['pending'].add(name)
+        
+        if op['pending']:
+            self.group_ops.append(op)
+        else:
+            self.group_stopped(op)
+    
+    def group_member_stopped(self, process_name):
+        for op in list(self.group_ops):
+            op['pending'].discard(process_name)
+            if not op['pending']:
+                self.group_ops.remove(op)
+                self.group_stopped(op)
+    
+    def group_stopped(self, op):
+        if op['command'] == 'restart_group':
+            self.start_group_members(op)
+        else:
+            self.finish_group_command(op)
+    
+    def start_group_members(self, op):
+        # spawning does not wait for the child either, the members come up side by side
+        for name in op['members']:
+            if name in self.processes:
+                self.start_process(name)
+        self.finish_group_command(op)
+    
+    def finish_group_command(self, op):
+        failed = []
+        for name in op['members']:
+            procces = self.processes.get(name)
+            state = procces['state'] if procces is not None else ''
+            op['results'][name] = state
+            if op['command'] == 'stop_group':
+                ok = state not in ('R', 'S')
+            else:
+                ok = state == 'R'
+            if not ok:
+                reason = procces['errors'] or f"state {state}" if procces is not None else "deleted"
+                failed.append(f"{name} ({reason})")
+        
+        elapsed = (time.monotonic() - op['start_time']) * 1000
+        op['ok'] = not failed
+        if failed:
+            logging.warning(f"Group Command: {op['command']} for group {op['group']} finished in {elapsed:.1f} ms, "
+                            f"{len(failed)} of {len(op['members'])} processes failed: {', '.join(failed)}")
+        else:
+            logging.info(f"Group Command: {op['command']} for group {op['group']} finished in {elapsed:.1f} ms, "
+                         f"{len(op['members'])} processes ok.")
+        self.command_result(op['command_id'], op['command'], '', op['group'], True, op['ok'],
+                            ', '.join(failed), op['start_time'])
+        return op
+    
     def monitor_process(self, process_name):
         
         #check if process_name is in the process table
@@ -249,111 +693,461 @@ class Procman3:
             procces['exit_code'] = proc.poll()
             return
     
-        # check if the process should be running
-        if procces['state'] == 'R':
-            if not is_running(proc):
-                logging.warning(f"Monitor Process: Process {process_name} found stopped.")
-                procces['state'] = 'F'
-                procces['exit_code'] = proc.poll()
-                procces['proc'] = None
-
-                if procces['restart']:
-                    logging.info(f"Monitor Process: Restarting process {process_name}.")
-                    self.start_process(process_name)
-            else:
-                #logging.info(f"Monitor Process: Process {process_name} is running.")
-                procces['stdout'] = proc.stdout.read1().decode('utf-8')
-                procces['stderr'] = proc.stderr.read1().decode('utf-8')
+        # exits are normally caught by watch_exit, this is only a safety net
+        if procces['state'] in ('R', 'S') and not is_running(proc):
+            logging.warning(f"Monitor Process: Process {process_name} found stopped.")
+            self.handle_exit(process_name, proc)
     
-    def publish_host_info(self):
+    def setup_sigchld(self):
+        # SIGCHLD only wakes the loop through the wakeup fd, the children are polled from the loop
+        self.sigchld_r, self.sigchld_w = os.pipe()
+        os.set_blocking(self.sigchld_r, False)
+        os.set_blocking(self.sigchld_w, False)
+        try:
+            signal.set_wakeup_fd(self.sigchld_w)
+            signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        except ValueError:
+            logging.warning("Deputy: SIGCHLD handler can only be installed from the main thread, "
+                            "exits will be detected by the monitor timer.")
+            return
+        self.loop.add_reader(self.sigchld_r, self.handle_sigchld)
+        logging.info("Deputy: pidfd not supported, using SIGCHLD to detect process exits.")
+    
+    def handle_sigchld(self, fd):
+        try:
+            while os.read(fd, 512):
+                pass
+        except BlockingIOError:
+            pass
+        
+        for process_name, procces in list(self.processes.items()):
+            proc = procces['proc']
+            if proc is not None and proc.poll() is not None:
+                self.handle_exit(process_name, proc)
         
-        #time
-        current_time = time.time()
-        time_diff = current_time - self.last_publish_time 
-        self.last_publish_time = current_time
+        # processes still being stopped after they were deleted or replaced
+        for proc, process_name in list(self.stopping.items()):
+            if proc.poll() is not None:
+                self.handle_exit(process_name, proc)
+    
+    def watch_exit(self, process_name, proc):
+        if not self.use_pidfd:
+            return
+        try:
+            pidfd = os.pidfd_open(proc.pid)
+        except OSError as e:
+            # the child may already be gone, let the loop find out on the next tick
+            logging.warning(f"Watch Exit: Failed to open pidfd for process {process_name} with PID {proc.pid}: {e}")
+            self.loop.call_later(0, lambda: self.handle_exit(process_name, proc), 'handle_exit')
+            return
         
-        # net io
-        net_io = psutil.net_io_counters()
-        net_tx = net_io.bytes_sent
-        net_tx_diff = net_tx - self.last_net_tx
-        self.last_net_tx = net_tx
+        def on_exit(fd):
+            self.loop.remove_reader(fd)
+            os.close(fd)
+            self.handle_exit(process_name, proc)
         
-        net_rx = net_io.bytes_recv
-        net_rx_diff = net_rx - self.last_net_rx
-        self.last_net_rx = net_rx
+        self.loop.add_reader(pidfd, on_exit, 'watch_exit')
+    
+    def handle_exit(self, process_name, proc):
+        exit_code = proc.poll()  # reap the child
+        if exit_code is None:
+            return
         
-        sent_kbps = net_tx_diff/time_diff
-        recv_kbps = net_rx_diff/time_diff
+        exit_time = time.time()
+        was_stopping = self.stopping.pop(proc, None) is not None
+        procces = self.processes.get(process_name)
+        if procces is None or procces['proc'] is not proc:
+            # the process was deleted or replaced meanwhile
+            if was_stopping:
+                self.group_member_stopped(process_name)
+            return
         
-
-        # Gather system metrics
-        cpu_usage = psutil.cpu_percent(interval=None) / 100.0  # Non-blocking
+        procces['exit_code'] = exit_code
+        procces['exit_time'] = exit_time
+        if procces['state'] in ('R', 'S'):
+            self.journal_record({'op': 'exit', 'name': process_name, 'pid': proc.pid, 'exit_code': exit_code})
         
-        uptime = int(time.time() - psutil.boot_time())  # Convert to milliseconds
+        if procces['state'] == 'S':
+            # stopped on purpose
+            kill_timer = procces.pop('kill_timer', None)
+            tree = procces.get('tree')
+            if kill_timer is not None and not (tree and tree.pids(self.ppid_map(tree))):
+                # descendants that outlive the process still get the SIGKILL at the deadline
+                kill_timer.cancel()
+            if procces.pop('killed', False):
+                procces['state'] = 'K'
+            else:
+                procces['state'] = 'T'
+                logging.info(f"Stop Process: Gracefully stopped process: {process_name} with PID {proc.pid}")
+            self.group_member_stopped(process_name)
+            return
         
-        mem_total = psutil.virtual_memory().total
-        mem_used = psutil.virtual_memory().used
-        mem_free = psutil.virtual_memory().free
-        mem_usage = psutil.virtual_memory().percent / 100.0
+        if procces['state'] != 'R':
+            return
+        
+        logging.warning(f"Process Exit: Process {process_name} with PID {proc.pid} exited with code {exit_code} "
+                        f"at {exit_time:.6f}.")
+        procces['state'] = 'F'
+        procces['proc'] = None
+        
+        if procces['restart']:
+            self.schedule_restart(process_name)
+    
+    def schedule_restart(self, process_name):
+        # Auto restart after a delay that doubles with every crash up to restart_backoff_max, with
+        # equal jitter so processes that crashed together do not come back in lockstep. A run that
+        # lasted restart_window resets the delay. More than restart_limit restarts within
+        # restart_window is a crash loop: the process goes to state 'C' until it is started again.
+        procces = self.processes[process_name]
+        now = time.monotonic()
+        procces['restart_times'] = [t for t in procces['restart_times'] if now - t < self.restart_window]
+        if len(procces['restart_times']) >= self.restart_limit:
+            procces['state'] = 'C'
+            procces['next_restart'] = 0
+            procces['errors'] = (f"Crash loop: {len(procces['restart_times'])} restarts within {self.restart_window:g} s, "
+                                 f"auto restart suspended until started again.")
+            logging.error(f"Process Exit: Process {process_name} is crash looping, {len(procces['restart_times'])} restarts "
+                          f"within {self.restart_window:g} s; auto restart suspended.")
+            return
+        
+        if now - procces.get('start_mono', now) >= self.restart_window:
+            procces['backoff'] = 0
+        procces['backoff'] = min(self.restart_backoff_max, procces['backoff'] * 2 or self.restart_backoff_initial)
+        delay = procces['backoff'] / 2 + random.uniform(0, procces['backoff'] / 2)
+        procces['next_restart'] = time.time() + delay
+        procces['restart_timer'] = self.loop.call_later(delay, lambda: self.auto_restart(process_name, procces), 'auto_restart')
+        logging.info(f"Process Exit: Restarting process {process_name} in {delay:.2f} s.")
+    
+    def auto_restart(self, process_name, procces):
+        procces.pop('restart_timer', None)
+        procces['next_restart'] = 0
+        if self.processes.get(process_name) is not procces or procces['state'] != 'F':
+            return
+        procces['restart_times'].append(time.monotonic())
+        procces['restart_count'] += 1
+        self.start_process(process_name, auto_restart=True)
+    
+    def cancel_restart(self, procces):
+        timer = procces.pop('restart_timer', None)
+        if timer is not None:
+            timer.cancel()
+        procces['next_restart'] = 0
+    
+    def read_output(self, process_name, stream, pipe, fifo=None):
+        try:
+            data = os.read(pipe.fileno(), 65536)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logging.warning(f"Read Output: Failed to read {stream} of process {process_name}: {e}")
+            data = b''
+            
+        if not data:
+            # EOF, every writer closed its end of the pipe
+            self.loop.remove_reader(pipe)
+            pipe.close()
+            if fifo:
+                remove_output_fifo(fifo)
+            return
+        
+        # the process may have been deleted while the pipe was still open
+        procces = self.processes.get(process_name)
+        if procces is None:
+            return
+        data = procces['output'].feed(stream, data)
+        probe = procces.get('probe')
+        if isinstance(probe, LogProbe):
+            probe.feed(data)
+        if self.spool is not None and data:
+            self.spool.write(process_name, data, int(time.time() * 1e6))
+        
+        # flush early instead of letting a burst pile up until the next output interval
+        self.output_pending_bytes += len(data)
+        if self.output_pending_bytes >= self.output_flush_bytes and not self.output_flush_scheduled:
+            self.output_flush_scheduled = True
+            self.loop.call_later(0, self.publish_procs_outputs)
+    
+    def arm_probe(self, process_name, adopted=False):
+        # Called when the process started. Without a probe it is ready right away, otherwise the probe
+        # is checked every ready_check_interval until it passes. Returns an error for a probe that can
+        # not be used. Adopted processes were started by a previous run of the deputy, their output
+        # is not captured anymore so a log probe counts as passed.
+        proc_info = self.processes[process_name]
+        self.disarm_probe(proc_info)
+        settings = proc_info['settings']
+        proc_info['ready_time'] = 0
+        if not settings['ready_probe'] or (adopted and settings['ready_probe'] == 'log'):
+            proc_info['ready_time'] = time.time()
+            return None
+        
+        try:
+            proc_info['probe'] = make_probe(settings['ready_probe'], settings['ready_arg'], self.lc)
+        except ValueError as e:
+            return f"readiness probe: {e}"
+        proc_info['probe_start'] = time.monotonic()
+        if self.probe_timer is None:
+            self.probe_timer = self.loop.call_every(self.ready_check_interval, self.check_probes)
+        return None
+    
+    def disarm_probe(self, proc_info):
+        probe = proc_info.pop('probe', None)
+        if probe is not None:
+            probe.close()
+        late_error = proc_info.pop('probe_error', None)
+        if late_error and proc_info['errors'].endswith(late_error):
+            proc_info['errors'] = proc_info['errors'][:-len(late_error)].rstrip('; ')
+    
+    def check_probes(self):
+        now = time.monotonic()
+        pending = 0
+        for process_name, proc_info in self.processes.items():
+            probe = proc_info.get('probe')
+            if probe is None:
+                continue
+            if proc_info['state'] != 'R':
+                self.disarm_probe(proc_info)
+                continue
+            
+            if probe.check():
+                proc_info['ready_time'] = time.time()
+                logging.info(f"Readiness: Process {process_name} ready after {now - proc_info['probe_start']:.2f} s.")
+                self.disarm_probe(proc_info)
+                continue
+            
+            # reported once, the probe keeps going and the error goes away if it passes later
+            settings = proc_info['settings']
+            timeout = settings['ready_timeout']
+            if timeout > 0 and now - proc_info['probe_start'] > timeout and 'probe_error' not in proc_info:
+                error = f"Not ready after {timeout:g} s ({settings['ready_probe']} {settings['ready_arg']})"
+                logging.warning(f"Readiness: Process {process_name}: {error}")
+                proc_info['probe_error'] = error
+                proc_info['errors'] = f"{proc_info['errors']}; {error}" if proc_info['errors'] else error
+            pending += 1
+        
+        if not pending:
+            self.probe_timer.cancel()
+            self.probe_timer = None
+    
+    def handle_lcm(self, fd):
+        self.lc.handle_timeout(0)
+    
+    def monitor_processes(self):
+        for process_name in list(self.processes.keys()):
+            self.monitor_process(process_name)
+        
+        # remove the cgroups of old trees once their last member is gone
+        for tree in list(self.stale_trees):
+            if not tree.pids(self.ppid_map(tree)):
+                self.stale_trees.remove(tree)
+                if tree.cgroup:
+                    self.cgroups.remove_leaf(tree.cgroup)
+    
+    def ppid_map(self, tree):
+        # the parent pids for a tree without a cgroup, read from /proc once per loop iteration: stopping
+        # or deleting many processes in one command batch costs one pass over /proc, not one per process
+        if tree.cgroup is not None:
+            return None
+        if self.ppids_iteration != self.loop.iterations:
+            self.ppids = read_ppid_map()
+            self.ppids_iteration = self.loop.iterations
+        return self.ppids
+    
+    def release_tree(self, proc_info):
+        # detach the tree of the previous run; members still alive are kept track of until they exit
+        tree = proc_info.pop('tree', None)
+        if tree is None:
+            return
+        if tree.pids(self.ppid_map(tree)):
+            self.stale_trees.append(tree)
+        elif tree.cgroup:
+            self.cgroups.remove_leaf(tree.cgroup)
+    
+    def publish_host_info(self):
+        telemetry = self.telemetry
+        telemetry.update()
+        mem = telemetry.mem
         
-
         # Create status message
         msg = host_info_t()
         msg.timestamp = int(time.time() * 1e6)
         msg.hostname = self.hostname
-        msg.ip = get_ip()
+        msg.ip = telemetry.ip
         
         #cpu info
-        msg.cpus = psutil.cpu_count()
-        msg.cpu_usage = cpu_usage
+        msg.cpus = telemetry.cpu_count
+        msg.cpu_usage = telemetry.cpu_usage
         
         #memory info
-        msg.mem_total = mem_total
-        msg.mem_free = mem_free
-        msg.mem_used = mem_used
-        msg.mem_usage = mem_usage
+        msg.mem_total = mem.total
+        msg.mem_free = mem.free
+        msg.mem_used = mem.used
+        msg.mem_usage = mem.percent / 100.0
         
         #network info
-        msg.network_sent = sent_kbps/1024
-        msg.network_recv = recv_kbps/1024
+        msg.network_sent = telemetry.net_sent / 1024
+        msg.network_recv = telemetry.net_recv / 1024
         
         #uptime
-        msg.uptime = uptime
+        msg.uptime = telemetry.uptime
+        
+        self.metrics.record_host(msg.timestamp / 1e6, (msg.cpu_usage, msg.mem_usage, msg.mem_used / 1024,
+                                                       telemetry.load_avg[0], msg.network_sent, msg.network_recv))
 
         # Send status message over LCM
-        self.lc.publish(self.deputy_info_channel, msg.encode())
+        self.publish(self.deputy_info_channel, msg.encode())
+        if self.exporter is not None:
+            self.exporter.update_host(msg)
+        self.publish_host_stats(msg.timestamp)
+    
+    def publish_host_stats(self, timestamp):
+        # detailed metrics from the same telemetry snapshot as host_info_t
+        telemetry = self.telemetry
+        msg = host_stats_t()
+        msg.timestamp = timestamp
+        msg.hostname = self.hostname
+        msg.load_avg = list(telemetry.load_avg)
+        msg.throttle_count = telemetry.throttle_count
+        
+        msg.core_usage = telemetry.core_usage
+        msg.core_freq = (telemetry.core_freq + [0.0] * len(msg.core_usage))[:len(msg.core_usage)]
+        msg.num_cores = len(msg.core_usage)
+        
+        msg.interfaces = list(telemetry.net_rates)
+        msg.net_sent = [sent / 1024 for sent, _ in telemetry.net_rates.values()]
+        msg.net_recv = [recv / 1024 for _, recv in telemetry.net_rates.values()]
+        msg.num_interfaces = len(msg.interfaces)
+        
+        msg.disks = list(telemetry.disk_rates)
+        msg.disk_read = [read / 1024 for read, _, _ in telemetry.disk_rates.values()]
+        msg.disk_write = [write / 1024 for _, write, _ in telemetry.disk_rates.values()]
+        msg.disk_busy = [busy for _, _, busy in telemetry.disk_rates.values()]
+        msg.num_disks = len(msg.disks)
+        
+        self.publish(self.deputy_stats_channel, msg.encode())
+    
+    def publish_diagnostics(self):
+        interval, phases, commands, channels = self.diagnostics.take()
+        sample, num_fds = self.diagnostics.usage()
+        
+        msg = host_diagnostics_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.hostname = self.hostname
+        msg.interval = interval
+        if sample is not None:
+            msg.cpu = sample.cpu
+            msg.mem_rss = sample.rss // 1024
+            msg.mem_vms = sample.vms // 1024
+            msg.num_threads = sample.num_threads
+        msg.num_fds = num_fds
+        msg.loop_iterations = self.loop.iterations - self.diagnostics_iterations
+        self.diagnostics_iterations = self.loop.iterations
+        
+        msg.phases = [histogram.summary(name, histogram_summary_t()) for name, histogram in sorted(phases.items())]
+        msg.num_phases = len(msg.phases)
+        msg.commands = [histogram.summary(name, histogram_summary_t()) for name, histogram in sorted(commands.items())]
+        msg.num_commands = len(msg.commands)
+        msg.channels = [histogram.summary(name, histogram_summary_t()) for name, histogram in sorted(channels.items())]
+        msg.num_channels = len(msg.channels)
+        self.publish(self.deputy_diagnostics_channel, msg.encode())
+    
+    def update_specs(self):
+        # coalesced, so a batch of commands or a boot manifest publishes the specs once
+        if not self.specs_update_scheduled:
+            self.specs_update_scheduled = True
+            self.loop.call_later(0, self.check_specs)
+    
+    def check_specs(self):
+        self.specs_update_scheduled = False
+        specs = sorted((name, info['group'], info['cmd'], info['restart'], info['realtime'], sorted(info['settings'].items()))
+                       for name, info in self.processes.items())
+        spec_version = zlib.crc32(repr(specs).encode('utf-8'))
+        if spec_version != self.spec_version:
+            self.spec_version = spec_version
+            self.publish_host_specs()
+    
+    def publish_host_specs(self):
+        msg = host_specs_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.hostname = self.hostname
+        msg.spec_version = self.spec_version
+        
+        for process_name, proc_info in self.processes.items():
+            spec = proc_spec_t()
+            spec.name = process_name
+            spec.group = proc_info['group']
+            spec.cmd = proc_info['cmd']
+            spec.auto_restart = proc_info['restart']
+            spec.realtime = proc_info['realtime']
+            fill_settings(spec, proc_info['settings'])
+            msg.specs.append(spec)
+        msg.num_specs = len(msg.specs)
+        
+        self.publish(self.deputy_specs_channel, msg.encode())
     
     def publish_host_procs(self):
         msg = host_procs_t()
         msg.timestamp = int(time.time() * 1e6)
         msg.hostname = self.hostname
+        msg.seq = self.procs_seq
+        msg.keyframe = self.procs_seq % self.procs_keyframe_every == 0
+        msg.spec_version = self.spec_version
         msg.procs = []
         msg.num_procs = 0
+        self.procs_seq += 1
+        running_pids = set()
+        exported = []
         
         for process_name, proc_info in self.processes.items():
             msg_proc = proc_info_t()
             msg_proc.name = process_name
-                        
+            msg_proc.mem_cgroup = -1
+            msg_proc.cpu_pressure = msg_proc.mem_pressure = msg_proc.io_pressure = -1.0
+            
+            # usage of the whole tree, so the workload forked by a launcher script is accounted
+            # for, and leftovers of a run that already exited stay visible
             proc = proc_info['proc']
-            if proc and is_running(proc):
+            tree = proc_info.get('tree')
+            samples = []
+            if tree is not None:
+                for pid in tree.pids(self.ppid_map(tree)):
+                    tree_sample = self.sampler.sample(pid)
+                    if tree_sample is not None:
+                        samples.append(tree_sample)
+                        running_pids.add(pid)
+                msg_proc.num_tree_procs = len(samples)
+                msg_proc.cpu = sum(tree_sample.cpu for tree_sample in samples)
+                msg_proc.mem_rss = sum(tree_sample.rss for tree_sample in samples) // 1024  # Convert to KB
+                msg_proc.mem_vms = sum(tree_sample.vms for tree_sample in samples) // 1024  # Convert to KB
                 
-                msg_proc.cpu = proc.cpu_percent(interval=None) / 100.0  # Non-blocking
-                mem_info = proc.memory_info()
-                msg_proc.mem_rss = mem_info.rss // 1024  # Convert to KB
-                msg_proc.mem_vms = mem_info.vms // 1024  # Convert to KB
+                if tree.cgroup:
+                    # the cgroup also accounts for members that exited since the last sample
+                    tree.update_cgroup_stats()
+                    msg_proc.cpu = tree.cpu
+                    mem_current = tree.memory_current()
+                    msg_proc.mem_cgroup = mem_current // 1024 if mem_current >= 0 else -1
+                    msg_proc.cpu_pressure = tree.pressure('cpu')
+                    msg_proc.mem_pressure = tree.pressure('memory')
+                    msg_proc.io_pressure = tree.pressure('io')
+                    msg_proc.io_read = tree.io_read / 1024
+                    msg_proc.io_write = tree.io_write / 1024
                 
-                msg_proc.priority = proc.nice()
+                if samples:
+                    self.metrics.record_proc(process_name, msg.timestamp / 1e6, (
+                        msg_proc.cpu, msg_proc.mem_rss, sum(tree_sample.num_threads for tree_sample in samples),
+                        msg_proc.io_read, msg_proc.io_write))
+                elif proc_info['state'] not in ('R', 'S'):
+                    self.release_tree(proc_info)
+            
+            sample = samples[0] if proc and samples and samples[0].pid == proc.pid else None
+            if sample is not None:
+                msg_proc.priority = sample.nice
                 msg_proc.pid = proc.pid
-                msg_proc.ppid = proc.ppid()
+                msg_proc.ppid = sample.ppid
                 msg_proc.exit_code = -1  # Indicate that the process is still running
                 msg_proc.errors = proc_info["errors"]
-                msg_proc.status = proc.status()
+                msg_proc.status = sample.status
                 msg_proc.state = proc_info['state']
-                msg_proc.group = proc_info['group']
-                msg_proc.cmd = proc_info['cmd']
-                msg_proc.realtime = proc_info['realtime']
-                msg_proc.auto_restart = proc_info['restart']
-                msg_proc.runtime = int(time.time() - proc.create_time())
+                msg_proc.start_time = int(sample.start_time * 1e6)
         
             else:
                 msg_proc.pid = -1
@@ -361,51 +1155,370 @@ class Procman3:
                 msg_proc.errors = proc_info["errors"]
                 msg_proc.status = proc_info['status']
                 msg_proc.state = proc_info['state']
-                msg_proc.group = proc_info['group']
-                msg_proc.cmd = proc_info['cmd']
                 
-
-            msg.procs.append(msg_proc)
-            msg.num_procs += 1
+            msg_proc.restart_count = proc_info['restart_count']
+            msg_proc.next_restart = int(proc_info['next_restart'] * 1e6)
+            if proc_info['state'] == 'R' and proc_info['ready_time']:
+                msg_proc.ready = True
+                msg_proc.ready_time = int(proc_info['ready_time'] * 1e6)
+            
+            if self.exporter is not None:
+                exported.append((msg_proc, proc_info['group'], proc_info['output'].bytes_read))
+            
+            # deltas only carry the procs that changed since they were last sent
+            key = proc_info_key(msg_proc)
+            if msg.keyframe or self.last_proc_keys.get(process_name) != key:
+                self.last_proc_keys[process_name] = key
+                msg.procs.append(msg_proc)
+                msg.num_procs += 1
             proc_info["Errors"] = ""
 
-        self.lc.publish(self.deputy_procs_channel, msg.encode())
+        self.sampler.prune(running_pids)
+        self.publish(self.deputy_procs_channel, msg.encode())
+        if self.exporter is not None:
+            self.exporter.update_procs(exported)
         #logging.info(f"Proc Status Publish: Published status for process {process_name}")
         
 
+    def make_output_msg(self, process_name, proc_info, offset, data, resend=False):
+        msg = proc_output_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.name = process_name
+        msg.hostname = self.hostname
+        msg.group = proc_info['group']
+        msg.stdout = data.decode('utf-8')
+        msg.seq = proc_info['output_seq']
+        msg.offset = offset
+        msg.length = len(data)
+        msg.retained_offset = proc_info['output'].start_offset
+        msg.resend = resend
+        
+        if not resend:
+            proc_info['output_seq'] += 1
+        return msg
+    
+    def publish_outputs(self, outputs):
+        # pack the outputs in host_outputs_t batches of about output_flush_bytes each
+        batch = []
+        batch_size = 0
+        for msg in outputs:
+            encoded = msg.encode()
+            batch.append((msg, encoded))
+            batch_size += len(encoded)
+            if batch_size >= self.output_flush_bytes:
+                self.publish_output_batch(batch)
+                batch = []
+                batch_size = 0
+        if batch:
+            self.publish_output_batch(batch)
+    
+    def publish_output_batch(self, batch):
+        msg = host_outputs_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.hostname = self.hostname
+        msg.seq = self.output_batch_seq
+        
+        raw = b''.join(encoded for _, encoded in batch)
+        msg.raw_size = len(raw)
+        data = zlib.compress(raw, 1) if self.output_compression else raw
+        if len(data) < len(raw):
+            msg.compression = 1
+            msg.data = data
+            msg.data_size = len(data)
+        else:
+            msg.outputs = [output for output, _ in batch]
+            msg.num_outputs = len(msg.outputs)
+        
+        self.publish(self.proc_outputs_channel, msg.encode())
+        self.output_batch_seq += 1
+
     def publish_procs_outputs(self):
+        self.output_flush_scheduled = False
+        self.output_pending_bytes = 0
+        
+        # every output_sync_every publishes all processes are sent, even without new output,
+        # so subscribers learn the current offset of idle streams
+        sync = self.output_publish_count % self.output_sync_every == 0
+        self.output_publish_count += 1
+        
+        outputs = []
         for process_name, proc_info in self.processes.items():
-            msg = proc_output_t()
-            msg.timestamp = int(time.time() * 1e6)
-            msg.name = process_name
-            msg.hostname = self.hostname
-            msg.stdout = proc_info['stdout'] + proc_info['stderr'] 
-            self.lc.publish(self.proc_outputs_channel, msg.encode())
+            output = proc_info['output']
+            if output.truncated:
+                logging.warning(f"Output Publish: Output buffer of process {process_name} overflowed, "
+                                f"{output.bytes_dropped} of {output.bytes_read} bytes dropped so far.")
+                output.truncated = False
             
-            proc_info['stdout'] = ''
-            proc_info['stderr'] = ''
-                    
-    def run(self):
-        logging.info("Deputy running.")
-        while True:
-            self.lc.handle_timeout(50)
+            if not output.pending() and not sync:
+                continue
             
-            if self.monitor_timer.timeout():
-                # Periodically check the status of processes
-                for process_name in list(self.processes.keys()):
-                    self.monitor_process(process_name)
+            # bursts larger than a chunk are split in consecutive messages
+            while True:
+                offset, data = output.read_pending(self.output_chunk_size)
+                outputs.append(self.make_output_msg(process_name, proc_info, offset, data))
+                if not data or not output.pending():
+                    break
+        
+        if outputs:
+            self.publish_outputs(outputs)
+    
+    def resend_output(self, process_name, offset, length):
+        if process_name not in self.processes:
+            logging.warning(f"Resend Output: Process {process_name} not found, ignoring command.")
+            return
+        
+        proc_info = self.processes[process_name]
+        output = proc_info['output']
+        # bytes not published yet will go out with the next regular publish
+        end = output.sent_offset
+        if length > 0:
+            end = min(end, offset + length)
+        
+        logging.info(f"Resend Output: Resending output of process {process_name} from offset {offset} to {end}.")
+        outputs = []
+        while offset < end:
+            offset, data = output.read(offset, min(self.output_chunk_size, end - offset))
+            if not data:
+                break
+            outputs.append(self.make_output_msg(process_name, proc_info, offset, data, resend=True))
+            offset += len(data)
+        
+        if outputs:
+            self.publish_outputs(outputs)
+                    
+    def query_output(self, process_name, start_time, end_time, offset, length):
+        # answered from the spool thread, so reading the segments never stalls the loop;
+        # works for deleted processes too, their segments stay on disk
+        msg = output_history_t()
+        msg.hostname = self.hostname
+        msg.name = process_name
+        msg.start_time = start_time
+        msg.end_time = end_time
+        msg.query_offset = offset
+        msg.query_length = length
+        if self.spool is None:
+            msg.error = "output spool disabled"
+            self.publish_output_history(msg, None)
+            return
+        
+        logging.info(f"Query Output: History of process {process_name} for time {start_time}-{end_time} "
+                     f"and bytes {offset}+{length}.")
+        self.spool.query(process_name, start_time, end_time, offset, length,
+                         lambda result: self.publish_output_history(msg, result))
+    
+    def publish_output_history(self, msg, result):
+        # runs on the spool thread, publishing is thread safe in LCM
+        msg.timestamp = int(time.time() * 1e6)
+        if result is not None:
+            msg.first_offset = result['first_offset']
+            msg.end_offset = result['end_offset']
+            msg.offset = result['offset']
+            msg.truncated = result['truncated']
+            msg.mark_offsets = [mark_offset for mark_offset, _ in result['marks']]
+            msg.mark_times = [mark_time for _, mark_time in result['marks']]
+            msg.num_marks = len(result['marks'])
+            raw = result['data']
+            msg.raw_size = len(raw)
+            data = zlib.compress(raw, 1) if self.output_compression else raw
+            if len(data) < len(raw):
+                msg.compression = 1
+            else:
+                data = raw
+            msg.data = data
+            msg.data_size = len(data)
+        elif not msg.error:
+            msg.error = "output spool busy, try again"
+        self.publish(self.output_history_channel, msg.encode())
+    
+    def query_metrics(self, process_name, start_time, end_time, max_points):
+        # answers with the series and statistics of the metric history, returns an error message or ''
+        msg = metric_history_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.hostname = self.hostname
+        msg.name = process_name
+        msg.start_time = start_time
+        msg.end_time = end_time
+        
+        ring = self.metrics.ring(process_name)
+        if ring is None:
+            msg.error = f"No metric history for process {process_name}"
+            self.publish(self.metric_history_channel, msg.encode())
+            return msg.error
+        
+        if max_points <= 0:
+            max_points = self.metrics_max_points
+        result = ring.query(start_time / 1e6, end_time / 1e6, min(max_points, self.metrics_max_points))
+        msg.num_samples = result['num_samples']
+        msg.first_time = int(result['first_time'] * 1e6)
+        msg.last_time = int(result['last_time'] * 1e6)
+        msg.fields = list(ring.fields)
+        msg.num_fields = len(msg.fields)
+        msg.times = (result['times'] * 1e6).astype('int64').tolist()
+        msg.num_points = len(msg.times)
+        msg.values = result['values'].T.tolist()
+        msg.percentiles = list(PERCENTILES)
+        msg.num_percentiles = len(msg.percentiles)
+        msg.percentile_values = result['percentiles'].T.tolist()
+        msg.mean = result['mean'].tolist()
+        msg.max = result['max'].tolist()
+        self.publish(self.metric_history_channel, msg.encode())
+        return ''
+    
+    def journal_record(self, record):
+        # written and fsynced together with the other records of this loop iteration
+        if self.journal is None:
+            return
+        self.journal.append(record)
+        if not self.journal_flush_scheduled:
+            self.journal_flush_scheduled = True
+            self.loop.call_later(0, self.flush_journal)
+    
+    def flush_journal(self):
+        self.journal_flush_scheduled = False
+        try:
+            self.journal.flush()
+            if self.journal.records > 1000 + 10 * len(self.processes):
+                self.compact_journal()
+        except OSError as e:
+            logging.error(f"Journal: Failed to write {self.journal.path}: {e}")
+    
+    def compact_journal(self):
+        records = []
+        for process_name, proc_info in self.processes.items():
+            records.append({'op': 'create', 'name': process_name, 'cmd': proc_info['cmd'], 'restart': proc_info['restart'],
+                            'realtime': proc_info['realtime'], 'group': proc_info['group'], 'settings': proc_info['settings']})
+            proc = proc_info['proc']
+            if proc is not None and proc_info['state'] in ('R', 'S'):
+                tree = proc_info.get('tree')
+                records.append({'op': 'start', 'name': process_name, 'pid': proc.pid, 'create_time': proc.create_time(),
+                                'cgroup': tree.cgroup if tree else None, 'fifos': proc_info.get('fifos')})
+        self.journal.compact(records)
+    
+    def restore_processes(self):
+        # Rebuilds the process table from the journal. Children that outlived the previous run are
+        # adopted again, matched by pid and start time so a reused pid is never taken for them.
+        if self.journal is None:
+            return
+        try:
+            table = self.journal.replay()
+        except OSError as e:
+            logging.error(f"Journal: Failed to read {self.journal.path}: {e}")
+            return
+        
+        adopted = 0
+        for process_name, entry in table.items():
+            spec, start = entry['spec'], entry['start']
+            # settings added since the journal was written get their defaults
+            self.create_process(process_name, spec['cmd'], spec['restart'], spec['realtime'], spec['group'],
+                                settings_from_yaml(spec['settings']))
+            if start is None:
+                continue
             
-            if self.output_timer.timeout():
-                # Periodically publish process outputs
-                self.publish_procs_outputs()
-
-            if self.host_status_timer.timeout():
-                # Periodically publish deputy status
-                self.publish_host_info()
+            proc_info = self.processes[process_name]
+            try:
+                proc = AdoptedProcess(start['pid'])
+                alive = abs(proc.create_time() - start['create_time']) < 0.01 and proc.poll() is None
+            except psutil.Error:
+                alive = False
             
-            if self.procs_status_timer.timeout():
-                # Periodically gather and publish the status of individual processes
-                self.publish_host_procs()
+            if alive:
+                cgroup = start.get('cgroup')
+                if cgroup and not self.cgroups.contains(cgroup, proc.pid):
+                    cgroup = None
+                proc_info['proc'] = proc
+                proc_info['state'] = 'R'
+                proc_info['tree'] = ProcTree(proc.pid, cgroup)
+                fifos = start.get('fifos')
+                pipes = [open_output_fifo(fifo) for fifo in fifos or ()]
+                if fifos and None not in pipes:
+                    proc_info['fifos'] = fifos
+                    self.watch_output(process_name, [os.fdopen(fd, 'rb', buffering=0) for fd in pipes], fifos)
+                else:
+                    for fd in pipes:
+                        if fd is not None:
+                            os.close(fd)
+                    # started with plain pipes, which went with the previous run
+                    proc_info['errors'] = "Adopted after a deputy restart, output is not captured and writing it kills the process."
+                self.watch_exit(process_name, proc)
+                self.arm_probe(process_name, adopted=True)
+                adopted += 1
+                logging.info(f"Journal: Adopted process {process_name} with PID {proc.pid}")
+            else:
+                proc_info['state'] = 'F'
+                proc_info['errors'] = "Exited while the deputy was down."
+                logging.warning(f"Journal: Process {process_name} with PID {start['pid']} exited while the deputy was down.")
+                if proc_info['restart']:
+                    self.start_process(process_name)
+        
+        # fifos of children that exited while the deputy was down
+        in_use = {fifo for proc_info in self.processes.values() for fifo in proc_info.get('fifos') or ()}
+        for name in os.listdir(self.fifo_dir):
+            if os.path.join(self.fifo_dir, name) not in in_use:
+                remove_output_fifo(os.path.join(self.fifo_dir, name))
+        
+        try:
+            self.compact_journal()
+        except OSError as e:
+            logging.error(f"Journal: Failed to write {self.journal.path}: {e}")
+        logging.info(f"Journal: Restored {len(table)} processes, {adopted} adopted.")
+    
+    def launch_boot_manifest(self):
+        # Creates and starts this host's entries of the manifest (the Processes list of a GUI yaml
+        # file; entries without a host belong to every deputy) in one pass before the loop runs, so
+        # they come up together instead of one command round trip each. Processes adopted from the
+        # journal keep running, every other entry replaces what the journal had under its name.
+        if self.boot_manifest is None:
+            return
+        try:
+            with open(self.boot_manifest, 'r') as file:
+                entries = (yaml.safe_load(file) or {}).get('Processes') or []
+        except (OSError, yaml.YAMLError, AttributeError) as e:
+            logging.error(f"Boot Manifest: Failed to read {self.boot_manifest}: {e}")
+            return
+        
+        started = 0
+        for entry in entries:
+            try:
+                if entry.get('host', self.hostname) not in (self.hostname, None, ''):
+                    continue
+                process_name = entry['name']
+                settings = settings_from_yaml(entry)
+                settings['sched_policy'] = settings['sched_policy'].strip().lower()
+                settings['ready_probe'] = settings['ready_probe'].strip().lower()
+                if process_name in self.processes and is_running(self.processes[process_name]['proc']):
+                    logging.info(f"Boot Manifest: Process {process_name} is already running, leaving it.")
+                    continue
+                self.create_process(process_name, entry['cmd'], bool(entry.get('auto_restart', False)),
+                                    bool(entry.get('realtime', False)), entry.get('group', ''), settings)
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                logging.error(f"Boot Manifest: Skipping invalid entry {entry}: {e}")
+                continue
+            self.start_process(process_name)
+            started += 1
+        logging.info(f"Boot Manifest: Launched {started} processes from {self.boot_manifest}")
+    
+    def start(self):
+        # everything before the event loop takes over, for harnesses that drive the loop themselves
+        logging.info("Deputy running.")
+        self.restore_processes()
+        self.launch_boot_manifest()
+        self.check_specs()
+        
+        # Periodically check the status of processes
+        self.loop.call_every(self.monitor_interval, self.monitor_processes)
+        # Periodically publish process outputs
+        self.loop.call_every(self.output_interval, self.publish_procs_outputs)
+        # Periodically publish deputy status
+        self.loop.call_every(self.host_status_interval, self.publish_host_info)
+        # Periodically gather and publish the status of individual processes
+        self.loop.call_every(self.procs_status_interval, self.publish_host_procs)
+        # Periodically publish the deputy's own latencies and usage
+        if self.diagnostics is not None:
+            self.loop.call_every(self.diagnostics_interval, self.publish_diagnostics)
+    
+    def run(self):
+        self.start()
+        self.loop.run_forever()
 
 
 def daemonize():
@@ -0,0 +1,103 @@
+import os
+import re
+
+# probe kinds: a file exists, a tcp port is listening, a channel is publishing, a line of output matches
+PROBE_KINDS = ('file', 'tcp', 'lcm', 'log')
+
+# longest partial line kept by a log probe while waiting for its end
+MAX_LOG_LINE = 4096
+
+
+def listening_ports():
+    # tcp ports in LISTEN state, from the kernel's socket tables instead of connecting to them
+    ports = set()
+    for path in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(path) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    if fields[3] == '0A':
+                        ports.add(int(fields[1].rsplit(':', 1)[1], 16))
+        except (OSError, StopIteration, IndexError, ValueError):
+            continue
+    return ports
+
+
+class FileProbe:
+    def __init__(self, path):
+        self.path = path
+
+    def check(self):
+        return os.path.exists(self.path)
+
+    def close(self):
+        pass
+
+
+class TcpProbe:
+    def __init__(self, port):
+        # "8080" or "host:8080", only the port is checked
+        self.port = int(port.rsplit(':', 1)[-1])
+
+    def check(self):
+        return self.port in listening_ports()
+
+    def close(self):
+        pass
+
+
+class LcmProbe:
+    # ready on the first message on the channel after the process started
+    def __init__(self, lc, channel):
+        self.lc = lc
+        self.ready = False
+        self.subscription = lc.subscribe(re.escape(channel), self.handler)
+
+    def handler(self, channel, data):
+        self.ready = True
+
+    def check(self):
+        return self.ready
+
+    def close(self):
+        if self.subscription is not None:
+            self.lc.unsubscribe(self.subscription)
+            self.subscription = None
+
+
+class LogProbe:
+    # ready once a line of the output matches the regex, fed by the deputy as output arrives
+    def __init__(self, pattern):
+        self.regex = re.compile(pattern.encode('utf-8'))
+        self.partial = b''
+        self.ready = False
+
+    def feed(self, data):
+        if self.ready:
+            return
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()[-MAX_LOG_LINE:]
+        self.ready = any(self.regex.search(line) for line in lines)
+
+    def check(self):
+        return self.ready or bool(self.partial and self.regex.search(self.partial))
+
+    def close(self):
+        pass
+
+
+def make_probe(kind, arg, lc):
+    # raises ValueError for an unknown kind or an argument it can not use
+    if kind == 'file':
+        return FileProbe(arg)
+    if kind == 'tcp':
+        return TcpProbe(arg)
+    if kind == 'lcm':
+        return LcmProbe(lc, arg)
+    if kind == 'log':
+        try:
+            return LogProbe(arg)
+        except re.error as e:
+            raise ValueError(f"bad regex {arg}: {e}")
+    raise ValueError(f"Unknown readiness probe {kind}, expected one of: {', '.join(PROBE_KINDS)}")
@@ -0,0 +1,109 @@
+import errno
+import os
+import shutil
+
+import psutil
+
+SCHED_POLICIES = {
+    'other': os.SCHED_OTHER,
+    'batch': os.SCHED_BATCH,
+    'idle': os.SCHED_IDLE,
+    'fifo': os.SCHED_FIFO,
+    'rr': os.SCHED_RR,
+}
+
+# priority used by the realtime flag when no policy is given
+REALTIME_PRIORITY = 40
+
+# cgroup v2 cpu.max period in us
+CPU_PERIOD = 100000
+
+
+def sched_params(settings, realtime):
+    # (policy, priority) to apply, None to inherit the deputy's; raises ValueError on bad settings
+    name = settings['sched_policy']
+    if not name:
+        return (os.SCHED_FIFO, REALTIME_PRIORITY) if realtime else None
+    if name not in SCHED_POLICIES:
+        raise ValueError(f"Unknown scheduler policy {name}, expected one of: {', '.join(SCHED_POLICIES)}")
+
+    policy = SCHED_POLICIES[name]
+    priority = settings['sched_priority'] if policy in (os.SCHED_FIFO, os.SCHED_RR) else 0
+    low, high = os.sched_get_priority_min(policy), os.sched_get_priority_max(policy)
+    if not low <= priority <= high:
+        raise ValueError(f"Priority {priority} out of range {low}-{high} for scheduler policy {name}")
+    return policy, priority
+
+
+def write_cgroup_limits(cgroup, settings):
+    # written to the leaf before the child joins it, so the limits hold from the first instruction
+    if settings['cpu_quota'] > 0:
+        with open(os.path.join(cgroup, 'cpu.max'), 'w') as f:
+            f.write(f"{max(1000, int(settings['cpu_quota'] * CPU_PERIOD))} {CPU_PERIOD}")
+    if settings['mem_max'] > 0:
+        with open(os.path.join(cgroup, 'memory.max'), 'w') as f:
+            f.write(str(settings['mem_max']))
+
+
+def has_settings(settings, sched):
+    # whether apply_settings has anything to do
+    return bool(settings['cpu_affinity'] or sched or settings['nice'] or settings['ionice_class'])
+
+
+def spawn_command(proc_command, gated=False):
+    # argv of the child: the command itself, or a shell that waits until the deputy closes the gate,
+    # a pipe on its stdin, and then execs the command. Meanwhile the deputy moves the shell into its
+    # cgroup leaf and applies its settings, so the program and everything it forks start with them,
+    # and nothing runs in the deputy between fork and exec. Children get /dev/null as stdin.
+    if not gated:
+        return [proc_command]
+    executable = shutil.which(proc_command)
+    if executable is None:
+        # fail like Popen would without the wrapper, instead of a shell exiting with 127
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), proc_command)
+    return ['/bin/sh', '-c', 'read _; exec "$1" < /dev/null', 'procman3-spawn', executable]
+
+
+def apply_settings(pid, settings, sched):
+    # Applies affinity, scheduler, nice and ionice from the deputy to every thread of pid, the
+    # wrapper of spawn_command waiting at its gate. Failures do not abort the start, they are
+    # returned for the deputy to report, like the realtime flag always did.
+    errors = []
+    affinity = settings['cpu_affinity']
+    nice = settings['nice']
+    ionice_class = settings['ionice_class']
+    ionice_level = settings['ionice_level']
+    if not (affinity or sched or nice or ionice_class):
+        return errors
+
+    try:
+        tids = [int(tid) for tid in os.listdir(f'/proc/{pid}/task')]
+    except OSError:
+        tids = [pid]
+    failed = set()
+
+    def apply(what, function):
+        for tid in tids:
+            try:
+                function(tid)
+            except ProcessLookupError:
+                # a thread that exited meanwhile
+                continue
+            except Exception as e:
+                if what not in failed:
+                    failed.add(what)
+                    errors.append(f"{what}: {e}")
+
+    if affinity:
+        apply(f"cpu affinity {affinity}", lambda tid: os.sched_setaffinity(tid, affinity))
+    if sched is not None:
+        apply(f"scheduler policy {settings['sched_policy'] or 'fifo'}",
+              lambda tid: os.sched_setscheduler(tid, sched[0], os.sched_param(sched[1])))
+    if nice:
+        apply(f"nice {nice}", lambda tid: os.setpriority(os.PRIO_PROCESS, tid, nice))
+    if ionice_class:
+        if ionice_class in (psutil.IOPRIO_CLASS_RT, psutil.IOPRIO_CLASS_BE):
+            apply(f"ionice class {ionice_class}", lambda tid: psutil.Process(tid).ionice(ionice_class, ionice_level))
+        else:
+            apply(f"ionice class {ionice_class}", lambda tid: psutil.Process(tid).ionice(ionice_class))
+    return errors
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# Scale benchmark of the procman3 deputy.
+# Runs a real Procman3 on LCM's in-process provider with N cheap children: sleepers, output
+# spammers and crash loopers with auto restart. The harness drives the deputy's event loop
+# itself and talks to it over LCM like a GUI would, and measures
+#   - create and start latency: command sent until its result says the process is running
+#   - crash detection latency: a crash looper's exit until the deputy marks it failed
+#   - publish cycle time of the loop callbacks, from the deputy's own diagnostics
+#   - messages and bytes per second on every channel
+#   - cpu, memory and wake ups of the deputy
+# The harness shares the process with the deputy; it only decodes the command results.
+#
+#   ./bench_deputy.py                          # 10, 100 and 500 processes
+#   ./bench_deputy.py -n 1000 -d 30 -o results.json
+#   ./bench_deputy.py --lcm-url udpm://239.255.76.67:7667?ttl=0 --json
+
+import argparse
+import json
+import os
+import platform
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'procman3'))
+import procman3
+from procman3_messages import command_batch_t, command_results_t, command_t
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# children, written to the benchmark directory; a command is run as is, without arguments
+SLEEPER = "#!/bin/sh\nexec sleep 3600\n"
+SPAMMER = """#!/bin/sh
+while :; do
+    i=0
+    while [ $i -lt {lines} ]; do
+        echo "spam line $i of a benchmark child that writes its output in bursts every 100 ms"
+        i=$((i + 1))
+    done
+    sleep 0.1
+done
+"""
+# the exit time goes to a file named after the pid, the deputy knows the pid when it sees the exit
+CRASHER = """#!/bin/sh
+sleep {runtime}
+date +%s.%N > {exit_dir}/$$
+exit 3
+"""
+
+# commands per command_batch_t
+BATCH_SIZE = 100
+
+
+def summarize(values, scale=1e3):
+    # percentiles of values in s, in ms
+    if not values:
+        return {'count': 0}
+    values = sorted(values)
+
+    def at(percentile):
+        return values[min(len(values) - 1, int(len(values) * percentile / 100))] * scale
+
+    return {'count': len(values), 'p50': at(50), 'p90': at(90), 'p99': at(99), 'max': values[-1] * scale}
+
+
+def write_script(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def git_version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+class DeputyBench:
+    def __init__(self, args, work_dir):
+        self.args = args
+        self.work_dir = work_dir
+        self.exit_dir = os.path.join(work_dir, 'exits')
+        os.makedirs(self.exit_dir)
+
+        # the repo's configuration, with everything written to disk moved to the benchmark directory
+        with open(os.path.join(REPO_DIR, 'procman3', 'procman3.yaml')) as f:
+            config = yaml.safe_load(f)
+        config.update({
+            'journal_file': '', 'boot_manifest': '', 'metrics_exporter_port': 0, 'output_spool_socket': '',
+            'log_file': os.path.join(work_dir, 'log', 'procman3.log'), 'use_cgroups': args.cgroups,
+            'output_spool_dir': os.path.join(work_dir, 'spool') if args.spool else '',
+            # the harness reads the diagnostics itself
+            'diagnostics_interval': 86400,
+        })
+        config_file = os.path.join(work_dir, 'procman3.yaml')
+        with open(config_file, 'w') as f:
+            yaml.safe_dump(config, f)
+
+        os.environ['LCM_DEFAULT_URL'] = args.lcm_url
+        self.deputy = procman3.Procman3(config_file)
+        self.deputy.lc.subscribe(self.deputy.command_results_channel, self.results_handler)
+
+        # crash loopers are timed at the exit the deputy sees, against the time they wrote before exiting
+        self.crash_latencies = []
+        handle_exit = self.deputy.handle_exit
+
+        def traced_exit(process_name, proc):
+            procces = self.deputy.processes.get(process_name)
+            was_running = procces is not None and procces['proc'] is proc and procces['state'] == 'R'
+            handle_exit(process_name, proc)
+            if was_running and procces['state'] != 'R':
+                self.crash_exit(proc.pid, time.time())
+
+        self.deputy.handle_exit = traced_exit
+
+        self.sent = {}          # command_id -> time sent
+        self.results = {}       # command_id -> (time answered, command_result_t)
+        self.sequence = 0
+
+    def results_handler(self, channel, data):
+        now = time.monotonic()
+        for result in command_results_t.decode(data).results:
+            if result.done and result.command_id in self.sent and result.command_id not in self.results:
+                self.results[result.command_id] = (now, result)
+
+    def crash_exit(self, pid, detected):
+        path = os.path.join(self.exit_dir, str(pid))
+        try:
+            with open(path) as f:
+                exited = float(f.read())
+            os.remove(path)
+        except (OSError, ValueError):
+            return
+        self.crash_latencies.append(detected - exited)
+
+    def spin(self, seconds, until=None):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline and not (until and until()):
+            self.deputy.loop.run_once()
+
+    def command(self, command, name, proc_command='', auto_restart=False):
+        msg = command_t()
+        msg.hostname = self.deputy.hostname
+        msg.command = command
+        msg.name = name
+        msg.group = 'bench'
+        msg.proc_command = proc_command
+        msg.auto_restart = auto_restart
+        self.sequence += 1
+        msg.command_id = f'bench-{self.sequence}'
+        return msg
+
+    def send(self, msg):
+        self.sent[msg.command_id] = time.monotonic()
+        self.deputy.lc.publish(self.deputy.command_channel, msg.encode())
+
+    def send_batches(self, commands):
+        # returns the seconds until every command was answered
+        start = time.monotonic()
+        for i in range(0, len(commands), BATCH_SIZE):
+            batch = command_batch_t()
+            batch.timestamp = int(time.time() * 1e6)
+            batch.hostname = self.deputy.hostname
+            batch.commands = commands[i:i + BATCH_SIZE]
+            batch.num_commands = len(batch.commands)
+            for msg in batch.commands:
+                self.sent[msg.command_id] = time.monotonic()
+            self.deputy.lc.publish(self.deputy.command_batch_channel, batch.encode())
+            self.spin(0)
+        ids = [msg.command_id for msg in commands]
+        self.spin(self.args.timeout, lambda: all(command_id in self.results for command_id in ids))
+        return time.monotonic() - start
+
+    def send_windowed(self, commands):
+        # one command_t each, at most --window waiting for their result; returns the seconds until all were answered
+        start = time.monotonic()
+        pending = list(commands)
+        waiting = []
+        deadline = start + self.args.timeout
+        while (pending or waiting) and time.monotonic() < deadline:
+            waiting = [msg for msg in waiting if msg.command_id not in self.results]
+            while pending and len(waiting) < self.args.window:
+                msg = pending.pop(0)
+                self.send(msg)
+                waiting.append(msg)
+            self.deputy.loop.run_once()
+        return time.monotonic() - start
+
+    def latencies(self, commands):
+        # end to end latencies and the deputy side durations of the answered commands, failures
+        latencies, durations, failed = [], [], 0
+        for msg in commands:
+            answer = self.results.get(msg.command_id)
+            if answer is None or not answer[1].ok:
+                failed += 1
+                continue
+            latencies.append(answer[0] - self.sent[msg.command_id])
+            durations.append(answer[1].duration / 1e6)
+        return latencies, durations, failed
+
+    def run(self, num_procs):
+        args = self.args
+        num_crashers = int(num_procs * args.crashers)
+        num_spammers = int(num_procs * args.spammers)
+        num_sleepers = num_procs - num_crashers - num_spammers
+        sleeper = write_script(os.path.join(self.work_dir, 'sleeper.sh'), SLEEPER)
+        spammer = write_script(os.path.join(self.work_dir, 'spammer.sh'), SPAMMER.format(lines=args.spam_lines))
+        crasher = write_script(os.path.join(self.work_dir, 'crasher.sh'),
+                               CRASHER.format(runtime=args.crash_runtime, exit_dir=self.exit_dir))
+        children = ([(f'sleeper-{i}', sleeper, False) for i in range(num_sleepers)]
+                    + [(f'spammer-{i}', spammer, False) for i in range(num_spammers)]
+                    + [(f'crasher-{i}', crasher, True) for i in range(num_crashers)])
+
+        deputy = self.deputy
+        deputy.start()
+        report = {'num_procs': num_procs, 'sleepers': num_sleepers, 'spammers': num_spammers, 'crashers': num_crashers}
+
+        creates = [self.command('create_process', name, path, restart) for name, path, restart in children]
+        report['create_all_s'] = self.send_batches(creates)
+        _, durations, failed = self.latencies(creates)
+        report['create_execute_ms'] = summarize(durations)
+        report['create_failed'] = failed
+
+        # command to running: the deputy answers a start once the process runs
+        starts = [self.command('start_process', name) for name, _, _ in children]
+        report['start_all_s'] = self.send_windowed(starts)
+        latencies, durations, failed = self.latencies(starts)
+        report['start_latency_ms'] = summarize(latencies)
+        report['start_execute_ms'] = summarize(durations)
+        report['start_failed'] = failed
+
+        # steady state
+        self.crash_latencies = []
+        deputy.diagnostics.take()
+        deputy.diagnostics.usage()
+        iterations = deputy.loop.iterations
+        self.spin(args.duration)
+        interval, phases, commands, channels = deputy.diagnostics.take()
+        sample, num_fds = deputy.diagnostics.usage()
+
+        report['duration_s'] = interval
+        report['crash_detection_ms'] = summarize(self.crash_latencies)
+        report['phases_ms'] = {name: {'count': histogram.count, 'p50': histogram.percentile(50) / 1e3,
+                                      'p99': histogram.percentile(99) / 1e3, 'max': histogram.max / 1e3}
+                               for name, histogram in sorted(phases.items())}
+        report['channels'] = {name: {'msgs_per_s': histogram.count / interval, 'bytes_per_s': histogram.total / interval,
+                                     'max_bytes': histogram.max}
+                              for name, histogram in sorted(channels.items())}
+        report['deputy'] = {'cpu': sample.cpu if sample else -1, 'mem_rss_kb': sample.rss // 1024 if sample else -1,
+                            'num_threads': sample.num_threads if sample else -1, 'num_fds': num_fds,
+                            'wakeups_per_s': (deputy.loop.iterations - iterations) / interval}
+        report['states'] = {}
+        for procces in deputy.processes.values():
+            report['states'][procces['state']] = report['states'].get(procces['state'], 0) + 1
+
+        deletes = [self.command('delete_process', name) for name, _, _ in children]
+        report['delete_all_s'] = self.send_batches(deletes)
+        report['delete_failed'] = self.latencies(deletes)[2]
+        self.shutdown()
+        return report
+
+    def shutdown(self):
+        # deleted processes stop in the background, wait for them and kill what is left
+        deputy = self.deputy
+        self.spin(deputy.stop_timeout + 1, lambda: not deputy.stopping and not deputy.stale_trees)
+        for child in psutil.Process().children(recursive=True):
+            try:
+                child.kill()
+            except psutil.Error:
+                pass
+        self.spin(0.2)
+        deputy.loop.selector.close()
+
+
+def print_report(report):
+    for result in report['results']:
+        print(f"\n{result['num_procs']} processes ({result['sleepers']} sleepers, {result['spammers']} spammers, "
+              f"{result['crashers']} crash loopers), states after {result['duration_s']:.1f} s: {result['states']}")
+        print(f"  create all {result['create_all_s']*1e3:.0f} ms, start all {result['start_all_s']*1e3:.0f} ms, "
+              f"delete all {result['delete_all_s']*1e3:.0f} ms, failed: {result['create_failed']} creates, "
+              f"{result['start_failed']} starts, {result['delete_failed']} deletes")
+        for name in ('start_latency_ms', 'start_execute_ms', 'crash_detection_ms'):
+            stats = result[name]
+            if stats['count']:
+                print(f"  {name:<22} n={stats['count']:<5} p50 {stats['p50']:8.2f}  p90 {stats['p90']:8.2f}  "
+                      f"p99 {stats['p99']:8.2f}  max {stats['max']:8.2f}")
+        deputy = result['deputy']
+        print(f"  deputy cpu {deputy['cpu']*100:.1f}%, rss {deputy['mem_rss_kb']} kB, {deputy['num_threads']} threads, "
+              f"{deputy['num_fds']} fds, {deputy['wakeups_per_s']:.1f} wake ups/s")
+        print(f"  {'phase':<24} {'count':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for name, stats in result['phases_ms'].items():
+            print(f"  {name:<24} {stats['count']:>6} {stats['p50']:>8.2f} {stats['p99']:>8.2f} {stats['max']:>8.2f}")
+        print(f"  {'channel':<28} {'msgs/s':>8} {'kB/s':>9} {'max B':>8}")
+        for name, stats in result['channels'].items():
+            print(f"  {name:<28} {stats['msgs_per_s']:>8.1f} {stats['bytes_per_s']/1024:>9.1f} {stats['max_bytes']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scale benchmark of the procman3 deputy")
+    parser.add_argument('-n', '--num-procs', type=int, action='append', help="number of processes (repeatable)")
+    parser.add_argument('-d', '--duration', type=float, default=10, help="s of steady state measured per run")
+    parser.add_argument('--spammers', type=float, default=0.1, help="fraction of the processes that spam output")
+    parser.add_argument('--crashers', type=float, default=0.05, help="fraction of the processes that crash and auto restart")
+    parser.add_argument('--spam-lines', type=int, default=10, help="lines a spammer writes every 100 ms")
+    parser.add_argument('--crash-runtime', type=float, default=0.5, help="s a crash looper runs before it exits")
+    parser.add_argument('--window', type=int, default=16,
+                        help="start commands waiting for their result at a time, 1 for the latency of a lone command")
+    parser.add_argument('--timeout', type=float, default=120, help="s to wait for the answers of a phase")
+    parser.add_argument('--lcm-url', default='memq://', help="LCM provider of the deputy and the harness")
+    parser.add_argument('--cgroups', action='store_true', help="let the deputy use cgroups when it can")
+    parser.add_argument('--no-spool', dest='spool', action='store_false', help="do not spool the output to disk")
+    parser.add_argument('--json', action='store_true', help="print the results as json")
+    parser.add_argument('-o', '--output', help="also write the results as json to this file")
+    args = parser.parse_args()
+
+    report = {
+        'benchmark': 'procman3_deputy',
+        'version': git_version(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'params': {key: value for key, value in vars(args).items() if key not in ('json', 'output')},
+        'results': [],
+    }
+    for num_procs in args.num_procs or [10, 100, 500]:
+        with tempfile.TemporaryDirectory(prefix='procman3-bench-') as work_dir:
+            report['results'].append(DeputyBench(args, work_dir).run(num_procs))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Micro-benchmark of the per-process sampling cost of the deputy.
+# Compares the per-call psutil sampling the deputy used to do with ProcSampler
+# (single pread of /proc/<pid>/stat) and its psutil oneshot fallback.
+#
+#   ./bench_sampler.py                 # 10, 100 and 1000 processes
+#   ./bench_sampler.py -n 50 -n 500 --json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'procman3'))
+from proc_sampler import ProcSampler
+
+
+def sample_psutil_calls(procs):
+    # what publish_host_procs did before the sampler: one psutil call per metric
+    for proc in procs:
+        proc.cpu_percent(interval=None)
+        proc.memory_info()
+        proc.nice()
+        proc.ppid()
+        proc.status()
+        proc.create_time()
+
+
+def sample_procfs(sampler, pids):
+    for pid in pids:
+        sampler.sample(pid)
+
+
+def measure(func, rounds):
+    func()  # warm up, opens files and primes the cpu deltas
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - t0) / rounds
+
+
+def run(num_procs, rounds):
+    children = [subprocess.Popen(['sleep', '600']) for _ in range(num_procs)]
+    try:
+        pids = [child.pid for child in children]
+        procs = [psutil.Process(pid) for pid in pids]
+
+        procfs = ProcSampler()
+        oneshot = ProcSampler()
+        oneshot.use_procfs = False
+
+        results = {
+            'psutil_calls': measure(lambda: sample_psutil_calls(procs), rounds),
+            'procfs': measure(lambda: sample_procfs(procfs, pids), rounds),
+            'psutil_oneshot': measure(lambda: sample_procfs(oneshot, pids), rounds),
+        }
+        procfs.prune(set())
+        oneshot.prune(set())
+    finally:
+        for child in children:
+            child.kill()
+        for child in children:
+            child.wait()
+
+    return {name: {'tick_ms': t * 1e3, 'per_proc_us': t * 1e6 / num_procs} for name, t in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per process sampling cost of the procman3 deputy")
+    parser.add_argument('-n', '--num-procs', type=int, action='append', help="number of processes (repeatable)")
+    parser.add_argument('-r', '--rounds', type=int, default=20, help="sampling rounds per measurement")
+    parser.add_argument('--json', action='store_true', help="print the results as json")
+    args = parser.parse_args()
+
+    report = {}
+    for num_procs in args.num_procs or [10, 100, 1000]:
+        report[num_procs] = run(num_procs, args.rounds)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'procs':>6} {'method':>15} {'tick (ms)':>10} {'per proc (us)':>14}")
+    for num_procs, results in report.items():
+        for name, result in results.items():
+            print(f"{num_procs:>6} {name:>15} {result['tick_ms']:>10.2f} {result['per_proc_us']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+# Synthetic fleet of procman3 deputies, to load test sheriffs and monitors without the robots.
+# Impersonates hundreds of hosts in one process: every simulated deputy publishes host_info_t,
+# host_stats_t, host_specs_t, host_procs_t keyframes and deltas and host_outputs_t batches on the
+# channels and at the intervals of procman3.yaml, and answers command_t and command_batch_t
+# like a deputy, with command results, so a GUI can create, start and stop simulated processes.
+# Failures are injected: crashes (restarted with backoff if auto restart is set, down to the
+# crash loop state), failing starts, hosts that go silent for a while and lost commands.
+#
+#   ./sim_fleet.py                                  # 40 hosts with 30 processes each
+#   ./sim_fleet.py --hosts 400 --procs 50 --output-rate 10 --crash-rate 5
+#   ./sim_fleet.py --hosts 10 --host-dropout 20 --command-loss 0.2 --duration 60
+
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+from collections import OrderedDict
+
+import lcm
+import yaml
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'procman3'))
+from event_loop import EventLoop
+from output_buffer import OutputBuffer
+from procman3 import proc_info_key
+from procman3_client import DEFAULT_SETTINGS, fill_settings, settings_from_msg
+from procman3_messages import (command_batch_t, command_result_t, command_results_t, command_t, host_info_t, host_outputs_t,
+                               host_procs_t, host_specs_t, host_stats_t, proc_info_t, proc_output_t, proc_spec_t)
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'procman3', 'procman3.yaml')
+
+# exit codes of simulated crashes: error, abort, segfault
+CRASH_EXIT_CODES = (1, -6, -11)
+
+# commands the simulator can not answer for real
+UNSUPPORTED_COMMANDS = ('query_output', 'query_metrics')
+
+
+class SimProcess:
+    def __init__(self, name, group, cmd, restart, realtime, settings, output_rate, output_buffer_size):
+        self.name = name
+        self.group = group
+        self.cmd = cmd
+        self.restart = restart
+        self.realtime = realtime
+        self.settings = settings
+        self.output_rate = output_rate     # lines/s while running
+        self.output_carry = 0.0
+        self.line = 0
+
+        self.state = 'T'
+        self.status = 'S'
+        self.pid = -1
+        self.start_time = 0
+        self.exit_code = -1
+        self.errors = ''
+        self.cpu = 0.0
+        self.base_cpu = random.uniform(0.01, 0.6)
+        self.mem_rss = 0
+        self.base_mem = random.randint(8 * 1024, 512 * 1024)  # kB
+        self.restart_count = 0
+        self.restart_times = []
+        self.backoff = 0.0
+        self.next_restart = 0.0
+        self.restart_timer = None
+        self.stop_timer = None
+        self.output = OutputBuffer(output_buffer_size)
+        self.output_seq = 0
+
+
+class SimHost:
+    # One simulated deputy: the process table, the messages it publishes and the commands it answers.
+    def __init__(self, fleet, index):
+        self.fleet = fleet
+        self.hostname = f'{fleet.args.prefix}-{index:03d}'
+        self.index = index
+        self.ip = f'10.{index // 250 % 250}.{index % 250}.{random.randint(1, 254)}'
+        self.cpus = random.choice((4, 8, 16))
+        self.mem_total = random.choice((8, 16, 32)) * 1024 ** 3
+        self.boot_time = time.time() - random.uniform(600, 30 * 86400)
+        self.processes = {}
+        self.spec_version = 0
+        self.specs_scheduled = False
+        self.procs_seq = 0
+        self.last_proc_keys = {}
+        self.output_batch_seq = 0
+        self.output_publish_count = 0
+        self.command_results = OrderedDict()
+        self.pending_results = []
+        self.next_pid = random.randint(1000, 30000)
+        self.silent_until = 0.0
+
+    @property
+    def silent(self):
+        return time.monotonic() < self.silent_until
+
+    # process table
+
+    def create_process(self, name, cmd, restart, realtime, group, settings):
+        process = self.processes.get(name)
+        if process is not None:
+            self.cancel_timers(process)
+        output_rate = self.fleet.args.output_rate
+        if random.random() < self.fleet.args.noisy:
+            output_rate = self.fleet.args.noisy_rate
+        self.processes[name] = SimProcess(name, group, cmd, restart, realtime, settings, output_rate,
+                                          self.fleet.output_buffer_size)
+        self.update_specs()
+
+    def start_process(self, name, auto_restart=False):
+        process = self.processes[name]
+        if not auto_restart:
+            self.cancel_timers(process)
+            process.restart_count = 0
+            process.restart_times = []
+            process.backoff = 0.0
+        process.next_restart = 0.0
+        if process.state in ('R', 'S'):
+            return
+        if random.random() < self.fleet.args.start_failure:
+            process.state = 'F'
+            process.exit_code = 127
+            process.errors = "simulated spawn failure"
+            if process.restart:
+                self.schedule_restart(process)
+            return
+        process.state = 'R'
+        process.status = 'running'
+        process.errors = ''
+        process.exit_code = -1
+        process.pid = self.next_pid
+        self.next_pid = self.next_pid + 1 if self.next_pid < 4000000 else 1000
+        process.start_time = int(time.time() * 1e6)
+        process.cpu = process.base_cpu
+        process.mem_rss = process.base_mem
+
+    def stop_process(self, name):
+        # SIGTERM and an exit after a short while, like a well behaved child
+        process = self.processes[name]
+        self.cancel_timers(process)
+        process.next_restart = 0.0
+        if process.state != 'R':
+            return False
+        process.state = 'S'
+        process.stop_timer = self.fleet.loop.call_later(self.fleet.args.stop_delay, lambda: self.stopped(process), 'stopped')
+        return True
+
+    def stopped(self, process):
+        process.stop_timer = None
+        if process.state == 'S':
+            process.state = 'T'
+            process.status = 'S'
+            process.exit_code = 0
+            process.pid = -1
+            process.cpu = 0.0
+            process.mem_rss = 0
+
+    def delete_process(self, name):
+        self.cancel_timers(self.processes.pop(name))
+        self.last_proc_keys.pop(name, None)
+        self.update_specs()
+
+    def crash(self, process):
+        process.state = 'F'
+        process.status = 'S'
+        process.exit_code = random.choice(CRASH_EXIT_CODES)
+        process.pid = -1
+        process.cpu = 0.0
+        process.mem_rss = 0
+        process.output.write(f"simulated crash with exit code {process.exit_code}\n".encode())
+        if process.restart:
+            self.schedule_restart(process)
+
+    def schedule_restart(self, process):
+        # the deputy's backoff and crash loop detection, without the jitter
+        config = self.fleet.config
+        now = time.monotonic()
+        window = config.get('restart_window', 60)
+        process.restart_times = [t for t in process.restart_times if now - t < window]
+        if len(process.restart_times) >= config.get('restart_limit', 5):
+            process.state = 'C'
+            process.errors = f"crash loop: {len(process.restart_times)} restarts within {window} s"
+            return
+        process.backoff = min(config.get('restart_backoff_max', 30),
+                              max(config.get('restart_backoff_initial', 0.5), process.backoff * 2))
+        process.next_restart = time.time() + process.backoff
+        process.restart_timer = self.fleet.loop.call_later(process.backoff, lambda: self.auto_restart(process), 'auto_restart')
+
+    def auto_restart(self, process):
+        process.restart_timer = None
+        if self.processes.get(process.name) is not process or process.state != 'F':
+            return
+        process.restart_times.append(time.monotonic())
+        process.restart_count += 1
+        self.start_process(process.name, auto_restart=True)
+
+    def cancel_timers(self, process):
+        for timer in (process.restart_timer, process.stop_timer):
+            if timer is not None:
+                timer.cancel()
+        process.restart_timer = process.stop_timer = None
+
+    # commands
+
+    def execute_command(self, msg):
+        args = self.fleet.args
+        if random.random() < args.command_loss:
+            self.fleet.stats['commands_lost'] += 1
+            return
+        if args.command_delay > 0:
+            self.fleet.loop.call_later(random.uniform(0, 2 * args.command_delay), lambda: self.run_command(msg), 'run_command')
+        else:
+            self.run_command(msg)
+
+    def run_command(self, msg):
+        if self.silent:
+            return
+        self.fleet.stats['commands'] += 1
+        if msg.command_id and msg.command_id in self.command_results:
+            result = command_result_t.decode(self.command_results[msg.command_id].encode())
+            result.duplicate = True
+            self.queue_result(result)
+            return
+
+        received = time.monotonic()
+        ok, error = True, ''
+        if msg.command in ('start_process', 'stop_process', 'delete_process', 'resend_output') and msg.name not in self.processes:
+            ok, error = False, f"Process {msg.name} not found"
+        elif msg.command == 'create_process':
+            self.create_process(msg.name, msg.proc_command, msg.auto_restart, msg.realtime, msg.group, settings_from_msg(msg))
+        elif msg.command == 'start_process':
+            self.start_process(msg.name)
+            process = self.processes[msg.name]
+            ok = process.state == 'R'
+            error = '' if ok else process.errors or f"Process {msg.name} is in state {process.state}"
+        elif msg.command == 'stop_process':
+            self.stop_process(msg.name)
+        elif msg.command == 'delete_process':
+            self.delete_process(msg.name)
+        elif msg.command in ('start_group', 'stop_group', 'restart_group'):
+            members = [process for process in self.processes.values() if process.group == msg.group]
+            if not members:
+                ok, error = False, f"No processes in group {msg.group}"
+            for process in members:
+                if msg.command != 'start_group':
+                    self.stop_process(process.name)
+                    self.stopped(process)
+                if msg.command != 'stop_group':
+                    self.start_process(process.name)
+            failed = [process.name for process in members if (process.state == 'R') == (msg.command == 'stop_group')]
+            if failed:
+                ok, error = False, ', '.join(failed)
+        elif msg.command == 'resend_output':
+            self.resend_output(self.processes[msg.name], msg.offset, msg.length)
+        elif msg.command == 'publish_specs':
+            self.publish_specs()
+        elif msg.command in UNSUPPORTED_COMMANDS:
+            ok, error = False, f"{msg.command} is not simulated"
+        else:
+            ok, error = False, f"Unknown command {msg.command}"
+
+        if msg.command_id:
+            result = command_result_t()
+            result.command_id = msg.command_id
+            result.command = msg.command
+            result.name = msg.name
+            result.group = msg.group
+            result.done = True
+            result.ok = ok
+            result.error = error
+            result.duration = int((time.monotonic() - received) * 1e6)
+            self.command_results[msg.command_id] = result
+            while len(self.command_results) > self.fleet.command_history_size:
+                self.command_results.popitem(last=False)
+            self.queue_result(result)
+
+    def queue_result(self, result):
+        if not self.pending_results:
+            self.fleet.loop.call_later(0, self.publish_results, 'publish_results')
+        self.pending_results.append(result)
+
+    def publish_results(self):
+        msg = command_results_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.hostname = self.hostname
+        msg.results = self.pending_results
+        msg.num_results = len(msg.results)
+        self.pending_results = []
+        self.fleet.publish(self.fleet.command_results_channel, msg)
+
+    # publishing
+
+    def update_specs(self):
+        if not self.specs_scheduled:
+            self.specs_scheduled = True
+            self.fleet.loop.call_later(0, self.check_specs, 'check_specs')
+
+    def check_specs(self):
+        self.specs_scheduled = False
+        specs = sorted((p.name, p.group, p.cmd, p.restart, p.realtime, sorted(p.settings.items())) for p in self.processes.values())
+        spec_version = zlib.crc32(repr(specs).encode('utf-8'))
+        if spec_version != self.spec_version:
+            self.spec_version = spec_version
+            self.publish_specs()
+
+    def publish_specs(self):
+        if self.silent:
+            return
+        msg = host_specs_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.hostname = self.hostname
+        msg.spec_version = self.spec_version
+        for process in self.processes.values():
+            spec = proc_spec_t()
+            spec.name = process.name
+            spec.group = process.group
+            spec.cmd = process.cmd
+            spec.auto_restart = process.restart
+            spec.realtime = process.realtime
+            fill_settings(spec, process.settings)
+            msg.specs.append(spec)
+        msg.num_specs = len(msg.specs)
+        self.fleet.publish(self.fleet.deputy_specs_channel, msg)
+
+    def publish_info(self):
+        if self.silent:
+            return
+        now = time.time()
+        running = [p for p in self.processes.values() if p.state in ('R', 'S')]
+        cpu_usage = min(1.0, sum(p.cpu for p in running) / self.cpus + random.uniform(0.0, 0.03))
+        mem_used = min(self.mem_total, 512 * 1024 ** 2 + sum(p.mem_rss for p in running) * 1024)
+
+        msg = host_info_t()
+        msg.timestamp = int(now * 1e6)
+        msg.hostname = self.hostname
+        msg.ip = self.ip
+        msg.cpus = self.cpus
+        msg.cpu_usage = cpu_usage
+        msg.mem_total = self.mem_total
+        msg.mem_used = mem_used
+        msg.mem_free = self.mem_total - mem_used
+        msg.mem_usage = mem_used / self.mem_total
+        msg.network_sent = random.uniform(1, 50) + len(running) * 2.0
+        msg.network_recv = random.uniform(1, 50) + len(running) * 1.5
+        msg.uptime = int(now - self.boot_time)
+        self.fleet.publish(self.fleet.deputy_info_channel, msg)
+
+        stats = host_stats_t()
+        stats.timestamp = msg.timestamp
+        stats.hostname = self.hostname
+        stats.load_avg = [cpu_usage * self.cpus * random.uniform(0.8, 1.2) for _ in range(3)]
+        stats.throttle_count = 0
+        stats.core_usage = [min(1.0, max(0.0, random.gauss(cpu_usage, 0.1))) for _ in range(self.cpus)]
+        stats.core_freq = [random.choice((1800.0, 2400.0, 3600.0)) for _ in range(self.cpus)]
+        stats.num_cores = self.cpus
+        stats.interfaces = ['eth0']
+        stats.net_sent = [msg.network_sent]
+        stats.net_recv = [msg.network_recv]
+        stats.num_interfaces = 1
+        self.fleet.publish(self.fleet.deputy_stats_channel, stats)
+
+    def publish_procs(self):
+        args = self.fleet.args
+        interval = self.fleet.procs_status_interval
+        crash_p = args.crash_rate * interval / 3600
+        for process in list(self.processes.values()):
+            if process.state == 'R':
+                if random.random() < crash_p:
+                    self.crash(process)
+                    continue
+                # metrics wander around their base
+                process.cpu = max(0.0, min(4.0, process.cpu + random.gauss(0, 0.02) + (process.base_cpu - process.cpu) * 0.1))
+                process.mem_rss = max(1024, int(process.mem_rss + random.gauss(0, 256) + (process.base_mem - process.mem_rss) * 0.05))
+        if random.random() < args.host_dropout * interval / 3600:
+            self.silent_until = time.monotonic() + args.dropout_seconds
+            self.fleet.stats['dropouts'] += 1
+        if self.silent:
+            return
+
+        msg = host_procs_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.hostname = self.hostname
+        msg.seq = self.procs_seq
+        msg.keyframe = self.procs_seq % self.fleet.procs_keyframe_every == 0
+        msg.spec_version = self.spec_version
+        self.procs_seq += 1
+        for process in self.processes.values():
+            msg_proc = proc_info_t()
+            msg_proc.name = process.name
+            msg_proc.state = process.state
+            msg_proc.status = process.status
+            msg_proc.errors = process.errors
+            msg_proc.cpu = process.cpu
+            msg_proc.mem_rss = process.mem_rss
+            msg_proc.mem_vms = process.mem_rss * 3 if process.mem_rss else 0
+            msg_proc.pid = process.pid
+            msg_proc.ppid = 1 if process.pid > 0 else -1
+            msg_proc.exit_code = process.exit_code
+            msg_proc.start_time = process.start_time if process.pid > 0 else 0
+            msg_proc.num_tree_procs = 1 if process.pid > 0 else 0
+            msg_proc.mem_cgroup = -1
+            msg_proc.cpu_pressure = msg_proc.mem_pressure = msg_proc.io_pressure = -1.0
+            msg_proc.ready = process.state == 'R'
+            msg_proc.ready_time = process.start_time if process.state == 'R' else 0
+            msg_proc.restart_count = process.restart_count
+            msg_proc.next_restart = int(process.next_restart * 1e6)
+
+            key = proc_info_key(msg_proc)
+            if msg.keyframe or self.last_proc_keys.get(process.name) != key:
+                self.last_proc_keys[process.name] = key
+                msg.procs.append(msg_proc)
+        msg.num_procs = len(msg.procs)
+        self.fleet.publish(self.fleet.deputy_procs_channel, msg)
+
+    def produce_output(self, seconds):
+        for process in self.processes.values():
+            if process.state != 'R' or process.output_rate <= 0:
+                continue
+            lines = process.output_rate * seconds + process.output_carry
+            count = int(lines)
+            process.output_carry = lines - count
+            if not count:
+                continue
+            stamp = time.strftime('%H:%M:%S')
+            text = ''.join(f"[{stamp}] {process.name}: simulated line {process.line + i} "
+                           f"{'.' * max(0, self.fleet.args.line_bytes - 40 - len(process.name))}\n"
+                           for i in range(count))
+            process.line += count
+            process.output.write(text.encode('utf-8'))
+
+    def make_output_msg(self, process, offset, data, resend=False):
+        msg = proc_output_t()
+        msg.timestamp = int(time.time() * 1e6)
+        msg.name = process.name
+        msg.hostname = self.hostname
+        msg.group = process.group
+        msg.stdout = data.decode('utf-8')
+        msg.seq = process.output_seq
+        msg.offset = offset
+        msg.length = len(data)
+        msg.retained_offset = process.output.start_offset
+        msg.resend = resend
+        if not resend:
+            process.output_seq += 1
+        return msg
+
+    def publish_outputs(self):
+        self.produce_output(self.fleet.output_interval)
+        if self.silent:
+            return
+        sync = self.output_publish_count % self.fleet.output_sync_every == 0
+        self.output_publish_count += 1
+        outputs = []
+        for process in self.processes.values():
+            output = process.output
+            if not output.pending() and not sync:
+                continue
+            while True:
+                offset, data = output.read_pending(self.fleet.output_chunk_size)
+                outputs.append(self.make_output_msg(process, offset, data))
+                if not data or not output.pending():
+                    break
+        if outputs:
+            self.publish_output_batches(outputs)
+
+    def resend_output(self, process, offset, length):
+        output = process.output
+        end = output.sent_offset if length <= 0 else min(output.sent_offset, offset + length)
+        outputs = []
+        while offset < end:
+            offset, data = output.read(offset, min(self.fleet.output_chunk_size, end - offset))
+            if not data:
+                break
+            outputs.append(self.make_output_msg(process, offset, data, resend=True))
+            offset += len(data)
+        if outputs:
+            self.publish_output_batches(outputs)
+
+    def publish_output_batches(self, outputs):
+        # host_outputs_t of about output_flush_bytes each, compressed like the deputy does
+        batch, batch_size = [], 0
+        for msg in outputs:
+            encoded = msg.encode()
+            batch.append((msg, encoded))
+            batch_size += len(encoded)
+            if batch_size >= self.fleet.output_flush_bytes or msg is outputs[-1]:
+                out = host_outputs_t()
+                out.timestamp = int(time.time() * 1e6)
+                out.hostname = self.hostname
+                out.seq = self.output_batch_seq
+                self.output_batch_seq += 1
+                raw = b''.join(encoded for _, encoded in batch)
+                out.raw_size = len(raw)
+                data = zlib.compress(raw, 1) if self.fleet.output_compression else raw
+                if len(data) < len(raw):
+                    out.compression = 1
+                    out.data = data
+                    out.data_size = len(data)
+                else:
+                    out.outputs = [output for output, _ in batch]
+                    out.num_outputs = len(out.outputs)
+                self.fleet.publish(self.fleet.proc_outputs_channel, out)
+                batch, batch_size = [], 0
+
+
+class Fleet:
+    def __init__(self, args):
+        self.args = args
+        with open(args.config) as f:
+            config = yaml.safe_load(f)
+        self.config = config
+
+        # the channels and intervals of the real deputies
+        self.command_channel = config['command_channel']
+        self.command_batch_channel = config.get('command_batch_channel', 'procman3/command_batches')
+        self.command_results_channel = config.get('command_results_channel', 'procman3/command_results')
+        self.deputy_info_channel = config['deputy_info_channel']
+        self.proc_outputs_channel = config['proc_outputs_channel']
+        self.deputy_procs_channel = config['deputy_procs_channel']
+        self.deputy_specs_channel = config.get('deputy_specs_channel', 'procman3/host_specs')
+        self.deputy_stats_channel = config.get('deputy_stats_channel', 'procman3/host_stats')
+        self.output_interval = config['output_interval']
+        self.host_status_interval = config['deputy_status_interval']
+        self.procs_status_interval = config['procs_status_interval']
+        self.procs_keyframe_every = max(1, config.get('procs_keyframe_every', 10))
+        self.output_buffer_size = config.get('output_buffer_size', 256 * 1024)
+        self.output_chunk_size = max(4, config.get('output_chunk_size', 8192))
+        self.output_flush_bytes = config.get('output_flush_bytes', 32 * 1024)
+        self.output_compression = config.get('output_compression', True)
+        self.output_sync_every = max(1, config.get('output_sync_every', 10))
+        self.command_history_size = max(1, config.get('command_history_size', 1024))
+
+        self.lc = lcm.LCM(args.lcm_url) if args.lcm_url else lcm.LCM()
+        self.loop = EventLoop()
+        self.loop.add_reader(self.lc.fileno(), lambda fd: self.lc.handle(), 'handle_lcm')
+        self.lc.subscribe(self.command_channel, self.command_handler)
+        self.lc.subscribe(self.command_batch_channel, self.command_batch_handler)
+
+        self.stats = {'msgs': 0, 'bytes': 0, 'commands': 0, 'commands_lost': 0, 'dropouts': 0}
+        self.channel_bytes = {}
+
+        self.hosts = {}
+        for index in range(args.hosts):
+            host = SimHost(self, index)
+            self.hosts[host.hostname] = host
+            for i in range(args.procs):
+                name = f'{host.hostname}-node-{i:03d}'
+                host.create_process(name, f'/opt/sim/bin/node_{i % 20}', random.random() < args.auto_restart,
+                                    False, f'group-{i % args.groups}', dict(DEFAULT_SETTINGS))
+                if random.random() < args.running:
+                    host.start_process(name)
+
+            # every host on its own phase, like deputies started at different times
+            self.every(self.host_status_interval, host.publish_info)
+            self.every(self.procs_status_interval, host.publish_procs)
+            self.every(self.output_interval, host.publish_outputs)
+
+    def every(self, period, callback):
+        self.loop.call_later(random.uniform(0, period), lambda: self.loop.call_every(period, callback), 'phase')
+
+    def publish(self, channel, msg):
+        data = msg.encode()
+        self.stats['msgs'] += 1
+        self.stats['bytes'] += len(data)
+        self.channel_bytes[channel] = self.channel_bytes.get(channel, 0) + len(data)
+        self.lc.publish(channel, data)
+
+    def command_handler(self, channel, data):
+        msg = command_t.decode(data)
+        host = self.hosts.get(msg.hostname)
+        if host is not None:
+            host.execute_command(msg)
+
+    def command_batch_handler(self, channel, data):
+        msg = command_batch_t.decode(data)
+        host = self.hosts.get(msg.hostname)
+        if host is not None:
+            for command in msg.commands:
+                host.execute_command(command)
+
+    def report(self, seconds):
+        stats = self.stats
+        channels = ', '.join(f"{channel} {size / 1024 / seconds:.1f}" for channel, size in sorted(self.channel_bytes.items()))
+        states = {}
+        for host in self.hosts.values():
+            for process in host.processes.values():
+                states[process.state] = states.get(process.state, 0) + 1
+        silent = sum(host.silent for host in self.hosts.values())
+        print(f"{len(self.hosts)} hosts ({silent} silent), processes {states}: {stats['msgs'] / seconds:.0f} msgs/s, "
+              f"{stats['bytes'] / 1024 / seconds:.1f} kB/s, {stats['commands']} commands ({stats['commands_lost']} lost), "
+              f"{stats['dropouts']} dropouts | kB/s {channels}", flush=True)
+        self.stats = dict.fromkeys(stats, 0)
+        self.channel_bytes = {}
+
+    def run(self):
+        start = time.monotonic()
+        last_report = start
+        while not self.args.duration or time.monotonic() - start < self.args.duration:
+            self.loop.run_once()
+            now = time.monotonic()
+            if self.args.report and now - last_report >= self.args.report:
+                self.report(now - last_report)
+                last_report = now
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic fleet of procman3 deputies for load testing sheriffs and monitors")
+    parser.add_argument('--hosts', type=int, default=40, help="simulated deputies")
+    parser.add_argument('--procs', type=int, default=30, help="processes per deputy")
+    parser.add_argument('--groups', type=int, default=5, help="groups per deputy")
+    parser.add_argument('--prefix', default='sim', help="host names are <prefix>-<n>")
+    parser.add_argument('--running', type=float, default=0.9, help="fraction of the processes started at startup")
+    parser.add_argument('--auto-restart', type=float, default=0.5, help="fraction of the processes with auto restart")
+    parser.add_argument('--output-rate', type=float, default=2, help="lines/s of output of a running process")
+    parser.add_argument('--noisy', type=float, default=0.05, help="fraction of the processes writing --noisy-rate lines/s instead")
+    parser.add_argument('--noisy-rate', type=float, default=200, help="lines/s of output of a noisy process")
+    parser.add_argument('--line-bytes', type=int, default=100, help="approximate length of an output line")
+    parser.add_argument('--crash-rate', type=float, default=1, help="crashes per running process per hour")
+    parser.add_argument('--start-failure', type=float, default=0.02, help="fraction of the starts that fail")
+    parser.add_argument('--host-dropout', type=float, default=0.5, help="times per hour a host goes silent")
+    parser.add_argument('--dropout-seconds', type=float, default=10, help="s a silent host publishes and answers nothing")
+    parser.add_argument('--command-loss', type=float, default=0.0, help="fraction of the commands ignored")
+    parser.add_argument('--command-delay', type=float, default=0.0, help="mean s before a command is executed")
+    parser.add_argument('--stop-delay', type=float, default=0.2, help="s a stopping process takes to exit")
+    parser.add_argument('--config', default=CONFIG_FILE, help="procman3.yaml with the channels and intervals")
+    parser.add_argument('--lcm-url', default='', help="LCM provider, LCM's default if empty")
+    parser.add_argument('--duration', type=float, default=0, help="s to run, 0 until interrupted")
+    parser.add_argument('--report', type=float, default=10, help="s between traffic reports on stdout, 0 for none")
+    parser.add_argument('--seed', type=int, help="random seed, for repeatable fleets")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    fleet = Fleet(args)
+    try:
+        fleet.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
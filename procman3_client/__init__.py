@@ -0,0 +1,5 @@
+from .command_tracker import CommandTracker
+from .host_state import HostProcsState
+from .metric_history import metric_history_data
+from .output_stream import OutputAssembler, history_data, unpack_outputs
+from .spawn_settings import DEFAULT_SETTINGS, changed_settings, fill_settings, settings_from_msg, settings_from_yaml
@@ -0,0 +1,75 @@
+import itertools
+import os
+import socket
+import time
+
+
+class CommandTracker:
+    # Gives commands an id and sends them again until the deputy answers on the results channel.
+    # The deputy executes every id once, so a retry after a lost answer is harmless. A command is
+    # sent again after timeout seconds, doubling every attempt, and fails after max_attempts.
+    # An answer that is not done yet (a stop_group waiting for its members) means the deputy has the
+    # command; it is then only sent again now and then to ask for the final answer, without failing.
+    def __init__(self, timeout=0.5, max_attempts=4, max_results=100):
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.max_results = max_results
+        self.client_id = f"{socket.gethostname()}-{os.getpid()}-{int(time.time()) % 100000}"
+        self.sequence = itertools.count(1)
+        self.pending = {}       # command_id -> record of a command without a final answer
+        self.results = []       # records of the latest finished commands, oldest first
+
+    def track(self, hostname, msg, now=None):
+        # sets msg.command_id, the caller publishes msg
+        if now is None:
+            now = time.monotonic()
+        msg.command_id = f"{self.client_id}-{next(self.sequence)}"
+        self.pending[msg.command_id] = {
+            'command_id': msg.command_id, 'hostname': hostname, 'command': msg.command, 'name': msg.name or msg.group,
+            'msg': msg, 'sent': now, 'last_sent': now, 'attempts': 1, 'acked': False,
+            'done': False, 'ok': False, 'error': '', 'latency': None, 'duration': None,
+        }
+        return msg
+
+    def answer(self, hostname, result, now=None):
+        # Returns the record of the command when this answer finished it, None otherwise
+        if now is None:
+            now = time.monotonic()
+        record = self.pending.get(result.command_id)
+        if record is None or record['hostname'] != hostname:
+            # a duplicate answer, or a command of another client
+            return None
+
+        if not result.done:
+            if not record['acked']:
+                record.update(acked=True, last_sent=now, attempts=1)
+            return None
+
+        del self.pending[result.command_id]
+        record.update(done=True, ok=result.ok, error=result.error, latency=now - record['sent'],
+                      duration=result.duration / 1e6)
+        return self.finish(record)
+
+    def due(self, now=None):
+        # Returns (resend, failed): the records whose command should be published again and the
+        # records that ran out of attempts
+        if now is None:
+            now = time.monotonic()
+        resend, failed = [], []
+        for command_id, record in list(self.pending.items()):
+            if now - record['last_sent'] < self.timeout * 2 ** (record['attempts'] - 1):
+                continue
+            if record['attempts'] >= self.max_attempts and not record['acked']:
+                del self.pending[command_id]
+                record.update(done=True, ok=False, error=f"No answer from {record['hostname']} after {record['attempts']} attempts")
+                failed.append(self.finish(record))
+            else:
+                record['attempts'] = min(record['attempts'] + 1, self.max_attempts)
+                record['last_sent'] = now
+                resend.append(record)
+        return resend, failed
+
+    def finish(self, record):
+        self.results.append(record)
+        del self.results[:-self.max_results]
+        return record
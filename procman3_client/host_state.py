@@ -0,0 +1,77 @@
+from .spawn_settings import DEFAULT_SETTINGS, settings_from_msg
+
+
+class HostProcsState:
+    # Rebuilds the process table of one deputy from the static specs published on change
+    # (host_specs_t) and the keyframe/delta host_procs_t stream.
+    def __init__(self):
+        self.specs = {}             # name -> proc_spec_t
+        self.spec_version = None
+        self.procs = {}             # name -> proc_info_t
+        self.last_seq = None
+        self.timestamp = 0
+        self.synced = False         # a keyframe was received
+
+        # counters
+        self.lost_frames = 0
+
+    def apply_specs(self, msg):
+        self.specs = {spec.name: spec for spec in msg.specs}
+        self.spec_version = msg.spec_version
+        for name in list(self.procs):
+            if name not in self.specs:
+                del self.procs[name]
+
+    def apply_procs(self, msg):
+        # Returns True when the message refers to specs we do not have, they should be
+        # requested with a publish_specs command.
+        if msg.keyframe:
+            self.procs = {proc.name: proc for proc in msg.procs}
+            self.synced = True
+        else:
+            if self.last_seq is not None and msg.seq > self.last_seq + 1:
+                # procs changed in the lost frames stay stale until they change again or the next keyframe
+                self.lost_frames += msg.seq - self.last_seq - 1
+            for proc in msg.procs:
+                self.procs[proc.name] = proc
+        self.last_seq = msg.seq
+        self.timestamp = msg.timestamp
+        return msg.spec_version != self.spec_version
+
+    def processes(self, hostname):
+        # merged view of specs and metrics in the shape used by the gui and the terminal
+        processes = {}
+        for name, proc in self.procs.items():
+            spec = self.specs.get(name)
+            running = proc.start_time > 0
+            processes[name] = {
+                "group": spec.group if spec else "",
+                "hostname": hostname,
+                "state": proc.state,
+                "status": proc.status,
+                "errors": proc.errors,
+                "cmd": spec.cmd if spec else "",
+                "cpu": proc.cpu,
+                "mem_rss": proc.mem_rss,
+                "mem_vms": proc.mem_vms,
+                "priority": proc.priority,
+                "pid": proc.pid,
+                "ppid": proc.ppid,
+                "auto_restart": spec.auto_restart if spec else False,
+                "realtime": spec.realtime if spec else False,
+                "settings": settings_from_msg(spec) if spec else dict(DEFAULT_SETTINGS),
+                "exit_code": proc.exit_code,
+                "runtime": max(0, (self.timestamp - proc.start_time) // 1000000) if running else 0,
+                "tree_procs": proc.num_tree_procs,
+                "mem_cgroup": proc.mem_cgroup,
+                "cpu_pressure": proc.cpu_pressure,
+                "mem_pressure": proc.mem_pressure,
+                "io_pressure": proc.io_pressure,
+                "io_read": proc.io_read,
+                "io_write": proc.io_write,
+                "ready": proc.ready,
+                "ready_time": proc.ready_time,
+                "restart_count": proc.restart_count,
+                "next_restart": proc.next_restart,
+            }
+        return processes
@@ -0,0 +1,11 @@
+def metric_history_data(msg):
+    # the series and statistics of a metric_history_t, times in s since the epoch:
+    # {'times': [...], 'series': {field: [...]}, 'stats': {field: {'p50': .., 'p90': .., 'p99': .., 'mean': .., 'max': ..}}}
+    data = {'times': [t / 1e6 for t in msg.times], 'series': {}, 'stats': {}}
+    for i, field in enumerate(msg.fields):
+        data['series'][field] = list(msg.values[i])
+        stats = {f'p{percentile:g}': value for percentile, value in zip(msg.percentiles, msg.percentile_values[i])}
+        stats['mean'] = msg.mean[i]
+        stats['max'] = msg.max[i]
+        data['stats'][field] = stats
+    return data
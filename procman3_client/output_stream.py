@@ -0,0 +1,114 @@
+import time
+import zlib
+from io import BytesIO
+
+from procman3_messages import proc_output_t
+
+
+def unpack_outputs(msg):
+    # proc_output_t messages carried by a host_outputs_t batch
+    if msg.compression == 0:
+        return msg.outputs
+
+    buf = BytesIO(zlib.decompress(msg.data))
+    outputs = []
+    while buf.tell() < msg.raw_size:
+        outputs.append(proc_output_t.decode(buf))
+    return outputs
+
+
+def history_data(msg):
+    # the output bytes carried by an output_history_t
+    if msg.compression == 0:
+        return bytes(msg.data)
+    return zlib.decompress(msg.data)
+
+
+class OutputAssembler:
+    # Rebuilds the ordered output stream of one process from proc_output_t chunks.
+    # Chunks are placed by byte offset, chunks received after a gap are held back until the
+    # gap is filled by a resend or given up on after gap_timeout seconds.
+    def __init__(self, gap_timeout=2.0):
+        self.gap_timeout = gap_timeout
+        self.expected = None    # stream offset of the next byte we need
+        self.last_seq = None
+        self.pending = {}       # offset -> bytes received ahead of a gap
+        self.requested = {}     # gap offset -> time the resend was requested
+
+        # counters
+        self.lost_messages = 0
+        self.lost_bytes = 0
+
+    def reset(self, offset):
+        self.expected = offset
+        self.pending.clear()
+        self.requested.clear()
+
+    def add(self, msg, now=None):
+        # Returns (text, missing): the text that became contiguous with this message and a list
+        # of (offset, length) ranges that should be requested with a resend_output command.
+        if now is None:
+            now = time.monotonic()
+
+        if not msg.resend:
+            if self.last_seq is not None and msg.seq < self.last_seq:
+                # the deputy or the process was restarted, the stream starts over
+                self.reset(msg.offset)
+            elif self.last_seq is not None and msg.seq > self.last_seq + 1:
+                self.lost_messages += msg.seq - self.last_seq - 1
+            self.last_seq = msg.seq
+
+        if self.expected is None:
+            # join the stream where it is now, do not ask for history
+            self.expected = msg.offset
+
+        out = bytearray()
+
+        # bytes the deputy does not retain anymore can not be recovered
+        if msg.retained_offset > self.expected:
+            self.skip(msg.retained_offset, out)
+
+        data = msg.stdout.encode('utf-8')
+        if msg.offset + len(data) > self.expected:
+            if msg.offset <= self.expected:
+                out += data[self.expected - msg.offset:]
+                self.expected = msg.offset + len(data)
+            elif data:
+                self.pending[msg.offset] = data
+            elif msg.offset > self.expected:
+                # an empty message still tells us how far the stream went
+                self.pending.setdefault(msg.offset, b'')
+        self.flush(out)
+
+        missing = []
+        if self.pending:
+            gap_end = min(self.pending)
+            requested = self.requested.get(self.expected)
+            if requested is None:
+                self.requested[self.expected] = now
+                missing.append((self.expected, gap_end - self.expected))
+            elif now - requested > self.gap_timeout:
+                self.skip(gap_end, out)
+                self.flush(out)
+
+        return out.decode('utf-8', 'replace'), missing
+
+    def skip(self, offset, out):
+        self.lost_bytes += offset - self.expected
+        out += f"\n[... {offset - self.expected} bytes lost ...]\n".encode('utf-8')
+        self.requested.pop(self.expected, None)
+        self.expected = offset
+
+    def flush(self, out):
+        # append every held back chunk that is contiguous now
+        while self.pending:
+            offset = min(self.pending)
+            if offset > self.expected:
+                break
+            data = self.pending.pop(offset)
+            if offset + len(data) > self.expected:
+                out += data[self.expected - offset:]
+                self.expected = offset + len(data)
+
+        for offset in [offset for offset in self.requested if offset < self.expected]:
+            del self.requested[offset]
@@ -0,0 +1,74 @@
+# Optional scheduling, resource and readiness settings of a process, as carried by command_t
+# and proc_spec_t and written in the process entries of the gui yaml files.
+DEFAULT_SETTINGS = {
+    'cpu_affinity': [],     # cores the process may run on, empty for all
+    'sched_policy': '',     # other, batch, idle, fifo or rr; empty uses the realtime flag
+    'sched_priority': 0,    # 1-99 for fifo and rr
+    'nice': 0,
+    'ionice_class': 0,      # 0 none, 1 realtime, 2 best-effort, 3 idle
+    'ionice_level': 0,      # 0-7 for realtime and best-effort
+    'cpu_quota': 0.0,       # cgroup cpu quota in cpus, 0 for none
+    'mem_max': 0,           # cgroup memory.max in bytes, 0 for none
+    'ready_probe': '',      # file, tcp, lcm or log; empty for ready once running
+    'ready_arg': '',        # path, [host:]port, channel or regex
+    'ready_timeout': 0.0,   # s to report a process that is not ready yet, 0 for no limit
+}
+
+
+def parse_cpu_list(value):
+    # [0, 2, 3] or "0,2-3" (the taskset/cpuset format) to a sorted list of cores
+    if isinstance(value, int):
+        return [value]
+    if isinstance(value, str):
+        cpus = set()
+        for part in value.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            first, _, last = part.partition('-')
+            cpus.update(range(int(first), int(last or first) + 1))
+        return sorted(cpus)
+    return sorted({int(cpu) for cpu in value or []})
+
+
+def settings_from_msg(msg):
+    # settings of a command_t or proc_spec_t, the reverse of fill_settings
+    settings = {key: getattr(msg, key) for key in DEFAULT_SETTINGS}
+    settings['cpu_affinity'] = sorted(set(msg.cpu_affinity))
+    settings['sched_policy'] = msg.sched_policy.strip().lower()
+    settings['ready_probe'] = msg.ready_probe.strip().lower()
+    return settings
+
+
+def settings_from_yaml(entry):
+    # missing keys keep their defaults
+    settings = dict(DEFAULT_SETTINGS)
+    for key, default in DEFAULT_SETTINGS.items():
+        if entry.get(key) is None:
+            continue
+        if key == 'cpu_affinity':
+            settings[key] = parse_cpu_list(entry[key])
+        else:
+            settings[key] = type(default)(entry[key])
+    return settings
+
+
+def changed_settings(settings):
+    # the settings that differ from the defaults, to keep saved files short
+    return {key: value for key, value in settings.items() if value != DEFAULT_SETTINGS[key]}
+
+
+def fill_settings(msg, settings):
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    msg.cpu_affinity = list(settings['cpu_affinity'])
+    msg.num_cpus = len(msg.cpu_affinity)
+    msg.sched_policy = settings['sched_policy']
+    msg.sched_priority = settings['sched_priority']
+    msg.nice = settings['nice']
+    msg.ionice_class = settings['ionice_class']
+    msg.ionice_level = settings['ionice_level']
+    msg.cpu_quota = settings['cpu_quota']
+    msg.mem_max = settings['mem_max']
+    msg.ready_probe = settings['ready_probe']
+    msg.ready_arg = settings['ready_arg']
+    msg.ready_timeout = settings['ready_timeout']
@@ -1,11 +1,14 @@
 import lcm
 import sys
 import os
+import threading
 import time
 
 # Add the parent directory to the sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
-from procman3_messages import host_info_t, host_procs_t, proc_info_t, proc_output_t, command_t
+from procman3_messages import (command_batch_t, command_results_t, host_info_t, host_outputs_t, host_procs_t, host_specs_t, host_stats_t, output_history_t, proc_info_t,
+                               proc_output_t, command_t)
+from procman3_client import CommandTracker, HostProcsState, OutputAssembler, fill_settings, history_data, unpack_outputs
 from PyQt5.QtCore import QThread, pyqtSignal
 
 
@@ -16,8 +19,12 @@ class LCMHandler(QThread):
     host_info_signal = pyqtSignal(dict)
     process_info_signal = pyqtSignal(dict)
     output_signal = pyqtSignal(dict)
+    history_signal = pyqtSignal(dict)
+    command_signal = pyqtSignal(dict)
 
-    def __init__(self, udpm, hostname, host_info_channel, host_procs_channel, proc_output_channel):
+    def __init__(self, udpm, hostname, host_info_channel, host_procs_channel, proc_output_channel,
+                 host_specs_channel="procman3/host_specs", host_stats_channel="procman3/host_stats",
+                 output_history_channel="procman3/output_history", command_results_channel="procman3/command_results"):
         super().__init__()
         self.hostmname = hostname
         self.lc = lcm.LCM(udpm)
@@ -25,14 +32,33 @@ class LCMHandler(QThread):
         self.processes = {}
         self.outputs = {}
         self.groups ={}
+        self.assemblers = {}
+        self.max_output_chars = 100000
+        self.host_states = {}
+        self.specs_requested = {}
+        self.host_stats = {}
+        self.histories = {}
+        self.max_history_bytes = 4 * 1024 * 1024
+        self.max_batch_commands = 100
+        # commands are sent again until their deputy answers, the tracker is shared with the gui thread
+        self.commands = CommandTracker()
+        self.commands_lock = threading.Lock()
 
         self.host_info_channel = host_info_channel
         self.host_procs_channel = host_procs_channel
         self.proc_output_channel = proc_output_channel
+        self.host_specs_channel = host_specs_channel
+        self.host_stats_channel = host_stats_channel
+        self.output_history_channel = output_history_channel
+        self.command_results_channel = command_results_channel
         
         self.s1 = self.lc.subscribe(self.host_info_channel, self.host_info_handler)
         self.s2 = self.lc.subscribe(self.host_procs_channel, self.host_procs_handler)
         self.s3 = self.lc.subscribe(self.proc_output_channel, self.proc_output_handler)
+        self.s4 = self.lc.subscribe(self.host_specs_channel, self.host_specs_handler)
+        self.s5 = self.lc.subscribe(self.host_stats_channel, self.host_stats_handler)
+        self.s6 = self.lc.subscribe(self.output_history_channel, self.output_history_handler)
+        self.s7 = self.lc.subscribe(self.command_results_channel, self.command_results_handler)
         
     def change_udpm(self, udpm):
         self.lc = lcm.LCM(udpm)
@@ -51,14 +77,26 @@ class LCMHandler(QThread):
         self.lc.unsubscribe(self.s1)
         self.lc.unsubscribe(self.s2)
         self.lc.unsubscribe(self.s3)
+        self.lc.unsubscribe(self.s4)
+        self.lc.unsubscribe(self.s5)
+        self.lc.unsubscribe(self.s6)
+        self.lc.unsubscribe(self.s7)
     
     def suscribe(self, host_info_channel, host_procs_channel, proc_output_channel):  
         #subscribe to the new channels
         self.s1 = self.lc.subscribe(host_info_channel, self.host_info_handler)
         self.s2 = self.lc.subscribe(host_procs_channel, self.host_procs_handler)
         self.s3 = self.lc.subscribe(proc_output_channel, self.proc_output_handler)
+        self.s4 = self.lc.subscribe(self.host_specs_channel, self.host_specs_handler)
+        self.s5 = self.lc.subscribe(self.host_stats_channel, self.host_stats_handler)
+        self.s6 = self.lc.subscribe(self.output_history_channel, self.output_history_handler)
+        self.s7 = self.lc.subscribe(self.command_results_channel, self.command_results_handler)
         
-    def create_process(self, hostname, group, name, auto_restart, cmd, realtieme):
+    def create_process(self, hostname, group, name, auto_restart, cmd, realtieme, settings=None):
+        msg = self.create_command(hostname, group, name, auto_restart, cmd, realtieme, settings)
+        self.send_command(hostname, msg)
+
+    def create_command(self, hostname, group, name, auto_restart, cmd, realtieme, settings=None):
         msg = command_t()
         msg.name = name
         msg.group = group
@@ -67,27 +105,92 @@ class LCMHandler(QThread):
         msg.proc_command = cmd
         msg.auto_restart = auto_restart
         msg.realtime = realtieme
+        fill_settings(msg, settings)
+        return msg
+
+    def send_command(self, hostname, msg):
+        with self.commands_lock:
+            self.commands.track(hostname, msg)
         self.lc.publish("procman3/commands", msg.encode())
+
+    def send_batch(self, hostname, commands, track=True):
+        # many commands for one deputy in a few messages, executed in order
+        if track:
+            with self.commands_lock:
+                for msg in commands:
+                    self.commands.track(hostname, msg)
+        for i in range(0, len(commands), self.max_batch_commands):
+            msg = command_batch_t()
+            msg.timestamp = int(time.time() * 1e6)
+            msg.hostname = hostname
+            msg.commands = commands[i:i + self.max_batch_commands]
+            msg.num_commands = len(msg.commands)
+            self.lc.publish("procman3/command_batches", msg.encode())
         
     def start_process(self, hostname, name):
         msg = command_t()
         msg.name = name
         msg.hostname = hostname
         msg.command = "start_process"
-        self.lc.publish("procman3/commands", msg.encode())
+        self.send_command(hostname, msg)
         
     def stop_process(self, hostname, name):
         msg = command_t()
         msg.name = name
         msg.hostname = hostname
         msg.command = "stop_process"
-        self.lc.publish("procman3/commands", msg.encode())
+        self.send_command(hostname, msg)
+        
+    def group_command(self, hostname, group, command):
+        # start_group, stop_group or restart_group, the deputy handles every member it owns
+        msg = command_t()
+        msg.group = group
+        msg.hostname = hostname
+        msg.command = command
+        self.send_command(hostname, msg)
         
     def delete_process(self, hostname, name):
         msg = command_t()
         msg.name = name
         msg.hostname = hostname
         msg.command = "delete_process"
+        self.send_command(hostname, msg)
+
+    def request_output(self, hostname, name, offset, length):
+        msg = command_t()
+        msg.name = name
+        msg.hostname = hostname
+        msg.command = "resend_output"
+        msg.offset = offset
+        msg.length = length
+        self.lc.publish("procman3/commands", msg.encode())
+
+    def query_output(self, hostname, name, start_time=0, end_time=0, offset=0, length=0):
+        # output spooled by the deputy, times in useconds since Unix Epoch (0 for unbounded);
+        # the history is emitted on history_signal once every part of it arrived
+        self.histories[(hostname, name)] = {"hostname": hostname, "name": name, "text": "", "size": 0, "error": ""}
+        self.send_query(hostname, name, start_time, end_time, offset, length)
+
+    def send_query(self, hostname, name, start_time, end_time, offset, length):
+        msg = command_t()
+        msg.name = name
+        msg.hostname = hostname
+        msg.command = "query_output"
+        msg.start_time = start_time
+        msg.end_time = end_time
+        msg.offset = offset
+        msg.length = length
+        self.lc.publish("procman3/commands", msg.encode())
+
+    def request_specs(self, hostname):
+        # specs are only published on change, ask for them at most once per second
+        now = time.time()
+        if now - self.specs_requested.get(hostname, 0) < 1:
+            return
+        self.specs_requested[hostname] = now
+        msg = command_t()
+        msg.hostname = hostname
+        msg.command = "publish_specs"
         self.lc.publish("procman3/commands", msg.encode())
 
     def host_info_handler(self, channel, data):
@@ -108,38 +211,105 @@ class LCMHandler(QThread):
             "timestamp": msg.timestamp,
             "last_update": now
         }
+        self.hosts[msg.hostname].update(self.host_stats.get(msg.hostname, {}))
         self.host_info_signal.emit(self.hosts)
 
+    def host_stats_handler(self, channel, data):
+        msg = host_stats_t.decode(data)
+        self.host_stats[msg.hostname] = {
+            "core_usage": list(msg.core_usage),
+            "max_core_usage": max(msg.core_usage, default=0.0),
+            "load_avg": list(msg.load_avg),
+            "throttle_count": msg.throttle_count,
+        }
+        if msg.hostname in self.hosts:
+            self.hosts[msg.hostname].update(self.host_stats[msg.hostname])
+
+    def host_specs_handler(self, channel, data):
+        msg = host_specs_t.decode(data)
+        if msg.hostname not in self.host_states:
+            self.host_states[msg.hostname] = HostProcsState()
+        self.host_states[msg.hostname].apply_specs(msg)
+        self.update_processes()
+
     def host_procs_handler(self, channel, data):
         msg = host_procs_t.decode(data)
-        self.processes.clear()
-        for proc in msg.procs:
-            self.processes[proc.name] = {
-                "group": proc.group,
-                "hostname": msg.hostname,
-                "state": proc.state,
-                "status": proc.status,
-                "errors": proc.errors,
-                "cmd": proc.cmd,
-                "cpu": proc.cpu,
-                "mem_rss": proc.mem_rss,
-                "mem_vms": proc.mem_vms,
-                "priority": proc.priority,
-                "pid": proc.pid,
-                "ppid": proc.ppid,
-                "auto_restart": proc.auto_restart,
-                "realtime": proc.realtime,
-                "exit_code": proc.exit_code,
-                "runtime": proc.runtime
-            }
-            self.process_info_signal.emit(self.processes)
+        if msg.hostname not in self.host_states:
+            self.host_states[msg.hostname] = HostProcsState()
+        if self.host_states[msg.hostname].apply_procs(msg):
+            self.request_specs(msg.hostname)
+        self.update_processes()
+
+    def update_processes(self):
+        processes = {}
+        for hostname, state in self.host_states.items():
+            processes.update(state.processes(hostname))
+        self.processes = processes
+        self.process_info_signal.emit(self.processes)
 
     def proc_output_handler(self, channel, data):
-        msg = proc_output_t.decode(data)
-        if msg.stdout.strip():
-            self.outputs[msg.name] = {"stdout": msg.stdout, "timestamp": msg.timestamp}
+        batch = host_outputs_t.decode(data)
+        for msg in unpack_outputs(batch):
+            self.add_output(msg)
         self.output_signal.emit(self.outputs)
 
+    def add_output(self, msg):
+        key = (msg.hostname, msg.name)
+        if key not in self.assemblers:
+            self.assemblers[key] = OutputAssembler()
+        text, missing = self.assemblers[key].add(msg)
+        for offset, length in missing:
+            self.request_output(msg.hostname, msg.name, offset, length)
+
+        if text:
+            output = self.outputs.setdefault(msg.name, {"stdout": "", "timestamp": 0})
+            output["stdout"] = (output["stdout"] + text)[-self.max_output_chars:]
+            output["timestamp"] = msg.timestamp
+
+    def output_history_handler(self, channel, data):
+        msg = output_history_t.decode(data)
+        history = self.histories.get((msg.hostname, msg.name))
+        if history is None:
+            # answer to a query of another client
+            return
+
+        history["error"] = msg.error
+        data = history_data(msg)
+        history["text"] += data.decode('utf-8', 'replace')
+        history["size"] += len(data)
+        if msg.truncated and not msg.error and history["size"] < self.max_history_bytes:
+            # the next part starts where this one ended
+            offset = msg.offset + msg.raw_size
+            length = msg.query_offset + msg.query_length - offset if msg.query_length > 0 else 0
+            self.send_query(msg.hostname, msg.name, msg.start_time, msg.end_time, offset, length)
+            return
+
+        del self.histories[(msg.hostname, msg.name)]
+        self.history_signal.emit(history)
+
+    def command_results_handler(self, channel, data):
+        msg = command_results_t.decode(data)
+        for result in msg.results:
+            with self.commands_lock:
+                record = self.commands.answer(msg.hostname, result)
+            if record is not None:
+                self.command_signal.emit(record)
+
+    def retry_commands(self):
+        with self.commands_lock:
+            resend, failed = self.commands.due()
+        hosts = {}
+        for record in resend:
+            hosts.setdefault(record['hostname'], []).append(record['msg'])
+        for hostname, commands in hosts.items():
+            if len(commands) == 1:
+                self.lc.publish("procman3/commands", commands[0].encode())
+            else:
+                self.send_batch(hostname, commands, track=False)
+        for record in failed:
+            self.command_signal.emit(record)
+
     def run(self):
         while True:
-            self.lc.handle_timeout(500)
+            self.lc.handle_timeout(100)
+            self.retry_commands()
@@ -7,6 +7,7 @@ from PyQt5.QtWidgets import(QApplication, QMainWindow, QTableWidgetItem, QWidget
 from PyQt5.QtGui import QColor
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from lcm_monitor import LCMHandler
+from procman3_client import changed_settings, settings_from_yaml
 import time
 import yaml
 
@@ -43,8 +44,14 @@ def format_traffic(kbps):
         return f"{kbps:.1f} KB/s"
     else:
         return f"{kbps/1024:.1f} MB/s"
-def format_state(state):
-    if state == 'R':
+def format_state(state, ready=True, next_restart=0):
+    if state == 'F' and next_restart:
+        # failed, the auto restart is waiting for its backoff
+        return "Restarting"
+    elif state == 'R' and not ready:
+        # running, its readiness probe did not pass yet
+        return "Not Ready"
+    elif state == 'R':
         return "Running"
     elif state == 'T':
         return "Stopped"
@@ -52,6 +59,10 @@ def format_state(state):
         return "Fail"
     elif state == 'K':
         return "Killed"
+    elif state == 'S':
+        return "Stopping"
+    elif state == 'C':
+        return "Crash Loop"
     else:
         return "Unknown"
 
@@ -314,6 +325,20 @@ class AddProcessDialog(QDialog):
         return (self.processNameInput.text(), self.hostNameInput.currentText(), self.groupInput.text(), self.cmdInput.text(), 
                 self.autoRestartInput.isChecked(), self.realtimeInput.isChecked())
 
+class HistoryDialog(QDialog):
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"History of {history['name']} on {history['hostname']}")
+        self.resize(900, 600)
+
+        self.historyText = QTextEdit()
+        self.historyText.setReadOnly(True)
+        self.historyText.setPlainText(history["error"] or history["text"])
+
+        mainLayout = QVBoxLayout()
+        mainLayout.addWidget(self.historyText)
+        self.setLayout(mainLayout)
+
 class MainWindow(QMainWindow):
     
     def __init__(self):
@@ -324,6 +349,7 @@ class MainWindow(QMainWindow):
         self.host_info_channel = "procman3/host_info"
         self.host_procs_channel = "procman3/host_procs"
         self.proc_output_channel = "procman3/proc_outputs"
+        self.history_window = 3600    # seconds of output shown by History
         
         #setup the GUI 
         self.setupUi(self)
@@ -335,6 +361,8 @@ class MainWindow(QMainWindow):
         self.lcm_handler.host_info_signal.connect(self.set_hosts)
         self.lcm_handler.process_info_signal.connect(self.set_processes)
         self.lcm_handler.output_signal.connect(self.set_outputs)
+        self.lcm_handler.history_signal.connect(self.show_history)
+        self.lcm_handler.command_signal.connect(self.show_command_result)
         self.lcm_handler.start()
 
         #initialize the data structures
@@ -362,6 +390,24 @@ class MainWindow(QMainWindow):
     def set_outputs(self, outputs):
         self.outputs = outputs
              
+    def show_command_result(self, record):
+        # latency is from the first send to the answer, retries included
+        text = f"{record['command']} {record['name']} on {record['hostname']}"
+        if record['ok']:
+            text += f": ok in {record['latency'] * 1000:.0f} ms"
+            if record['attempts'] > 1:
+                text += f" after {record['attempts']} attempts"
+            if record['error']:
+                text += f" ({record['error']})"
+            self.statusBar().setStyleSheet('color: #d3d3d3;')
+        else:
+            text += f": failed, {record['error']}"
+            self.statusBar().setStyleSheet('color: #ff6060;')
+        self.statusBar().showMessage(text, 10000)
+
+    def show_history(self, history):
+        HistoryDialog(history, self).show()
+             
     def open_context_menu(self, position):
         indexes = self.processTree.selectedIndexes()
         if indexes:
@@ -374,6 +420,8 @@ class MainWindow(QMainWindow):
                 delete_action = QAction("Delete", self)
                 edit_action = QAction("Edit", self)
                 add_action = QAction("Add", self)
+                restart_action = QAction("Restart", self)
+                history_action = QAction("History", self)
 
                 selected_process_name = selected_item.text(1)
                 selected_group = selected_item.text(0)
@@ -390,19 +438,24 @@ class MainWindow(QMainWindow):
                     stop_action.triggered.connect(lambda: self.lcm_handler.stop_process(selected_host_name, selected_process_name))
                     delete_action.triggered.connect(lambda: self.lcm_handler.delete_process(selected_host_name, selected_process_name))
                     edit_action.triggered.connect(lambda: self.edit_process(selected_process_name, selected_host_name, selected_group, selected_cmd, selected_auto_restart, selected_realtime))
+                    history_action.triggered.connect(lambda: self.lcm_handler.query_output(
+                        selected_host_name, selected_process_name, start_time=int((time.time() - self.history_window) * 1e6)))
                     
                     menu.addAction(start_action)
                     menu.addAction(stop_action)
                     menu.addAction(delete_action)
                     menu.addAction(edit_action)
+                    menu.addAction(history_action)
 
                 else: #selected item is a group
                     start_action.triggered.connect(lambda: self.start_group(selected_group))
                     stop_action.triggered.connect(lambda: self.stop_group(selected_group))
+                    restart_action.triggered.connect(lambda: self.restart_group(selected_group))
                     add_action.triggered.connect(self.add_process)
                     
                     menu.addAction(start_action)
                     menu.addAction(stop_action)
+                    menu.addAction(restart_action)
                     menu.addAction(add_action)
                     
                 menu.exec_(self.processTree.viewport().mapToGlobal(position))
@@ -413,7 +466,9 @@ class MainWindow(QMainWindow):
             new_process_name, new_host_name, new_group, new_cmd, new_auto_restart, new_realtime = dialog.getValues()
             self.lcm_handler.stop_process(host_name, process_name)
             self.lcm_handler.delete_process(host_name, process_name)
-            self.lcm_handler.create_process(new_host_name, new_group, new_process_name, new_auto_restart, new_cmd, new_realtime)
+            # the dialog does not edit the scheduling and resource settings, keep them
+            settings = self.processes.get(process_name, {}).get("settings")
+            self.lcm_handler.create_process(new_host_name, new_group, new_process_name, new_auto_restart, new_cmd, new_realtime, settings)
             
     def add_process(self):
         dialog = AddProcessDialog(self.hosts.keys(), self)
@@ -421,15 +476,21 @@ class MainWindow(QMainWindow):
             process_name, host_name, group, cmd, auto_restart, realtime = dialog.getValues()
             self.lcm_handler.create_process(host_name, group, process_name, auto_restart, cmd, realtime)
 
+    def group_hosts(self, group):
+        return {process_info["hostname"] for process_info in self.processes.values() if process_info["group"] == group}
+
     def start_group(self, group):
-        for process_name, process_info in self.processes.items():
-            if process_info["group"] == group:
-                self.lcm_handler.start_process(process_info["hostname"], process_name)
+        # one command per host, each deputy starts all its members of the group
+        for host_name in self.group_hosts(group):
+            self.lcm_handler.group_command(host_name, group, "start_group")
     
     def stop_group(self, group):
-        for process_name, process_info in self.processes.items():
-            if process_info["group"] == group:
-                self.lcm_handler.stop_process(process_info["hostname"], process_name)
+        for host_name in self.group_hosts(group):
+            self.lcm_handler.group_command(host_name, group, "stop_group")
+
+    def restart_group(self, group):
+        for host_name in self.group_hosts(group):
+            self.lcm_handler.group_command(host_name, group, "restart_group")
                 
 
     def update_gui(self):
@@ -463,19 +524,36 @@ class MainWindow(QMainWindow):
 
             self.hostTable.setItem(row, 2, cpu_item)
             
+            #set the busiest core, a single saturated core hides in the host average
+            max_core = info.get("max_core_usage", 0.0)
+            core_item = QTableWidgetItem(format_percent(max_core))
+            core_item.setTextAlignment(Qt.AlignCenter)
+            core_item.setToolTip(" ".join(format_percent(usage) for usage in info.get("core_usage", [])))
+            if max_core > 0.9:
+                core_item.setBackground(QColor("red"))
+            self.hostTable.setItem(row, 3, core_item)
+            
+            #set load average
+            load_avg = info.get("load_avg", [0.0, 0.0, 0.0])
+            load_item = QTableWidgetItem(f"{load_avg[0]:.2f}")
+            load_item.setTextAlignment(Qt.AlignCenter)
+            load_item.setToolTip(f"{load_avg[0]:.2f} {load_avg[1]:.2f} {load_avg[2]:.2f}, "
+                                 f"throttle events: {info.get('throttle_count', -1)}")
+            self.hostTable.setItem(row, 4, load_item)
+            
             #set host total memory usage
             mem_item = QTableWidgetItem(format_percent(info["mem_used"]))
             mem_item.setTextAlignment(Qt.AlignCenter)
-            self.hostTable.setItem(row, 3, mem_item)
+            self.hostTable.setItem(row, 5, mem_item)
             
             #set host network traffic
             tx_item = QTableWidgetItem(format_traffic(info["net_tx"]))
             tx_item.setTextAlignment(Qt.AlignCenter)
-            self.hostTable.setItem(row, 4, tx_item)
+            self.hostTable.setItem(row, 6, tx_item)
             
             rx_item = QTableWidgetItem(format_traffic(info["net_rx"]))
             rx_item.setTextAlignment(Qt.AlignCenter)
-            self.hostTable.setItem(row, 5, rx_item)
+            self.hostTable.setItem(row, 7, rx_item)
             
             #set seconds since last time we got a report
             dt = now - info["last_update"]
@@ -485,7 +563,7 @@ class MainWindow(QMainWindow):
             if dt > 5:
                 last_update_item.setBackground(QColor("red"))
                 
-            self.hostTable.setItem(row, 6, last_update_item)
+            self.hostTable.setItem(row, 8, last_update_item)
             
 
         self.hostTable.resizeColumnsToContents()
@@ -543,7 +621,7 @@ class MainWindow(QMainWindow):
                         "",
                         process_name,
                         process_info["cmd"],
-                        format_state(process_info['state']),
+                        format_state(process_info['state'], process_info['ready'], process_info['next_restart']),
                         process_info["hostname"],
                         format_percent(process_info["cpu"]),
                         format_mem(process_info["mem_rss"]),
@@ -557,7 +635,7 @@ class MainWindow(QMainWindow):
             else:
                 process_item.setText(1, process_name)
                 process_item.setText(2, process_info["cmd"])
-                process_item.setText(3, format_state(process_info["state"]))
+                process_item.setText(3, format_state(process_info["state"], process_info["ready"], process_info["next_restart"]))
                 process_item.setText(4, process_info["hostname"])
                 process_item.setText(5, format_percent(process_info["cpu"]))
                 process_item.setText(6, format_mem(process_info["mem_rss"]))
@@ -565,6 +643,23 @@ class MainWindow(QMainWindow):
                 process_item.setText(8, str(process_info["priority"]))
                 process_item.setText(9, format_time(process_info["runtime"]))
                 process_item.setText(10, str(process_info["errors"][:30]))
+                
+                # cpu and memory are summed over the process tree, the tooltips tell what is in it
+                tree_tip = f"{process_info['tree_procs']} processes in the tree"
+                if process_info["mem_cgroup"] >= 0:
+                    tree_tip += (f"\ncgroup memory: {format_mem(process_info['mem_cgroup'])}"
+                                 f"\npressure cpu/mem/io: {process_info['cpu_pressure']:.1f}% / "
+                                 f"{process_info['mem_pressure']:.1f}% / {process_info['io_pressure']:.1f}%"
+                                 f"\nio read/write: {format_traffic(process_info['io_read'])} / "
+                                 f"{format_traffic(process_info['io_write'])}")
+                process_item.setToolTip(5, tree_tip)
+                process_item.setToolTip(6, tree_tip)
+
+                # auto restarts since the last start on purpose, and when the next one is due
+                state_tip = f"{process_info['restart_count']} auto restarts"
+                if process_info["next_restart"]:
+                    state_tip += f"\nnext restart in {max(0.0, process_info['next_restart'] / 1e6 - time.time()):.1f} s"
+                process_item.setToolTip(3, state_tip)
 
             process_item.setTextAlignment(1, Qt.AlignLeft)
             process_item.setTextAlignment(2, Qt.AlignLeft)
@@ -693,8 +788,8 @@ class MainWindow(QMainWindow):
         # Create the host table and add it to the left vertical layout
         self.hostTable = QTableWidget(self.centralwidget)
         self.hostTable.setObjectName("hostTable")
-        self.hostTable.setColumnCount(7)  # Set the number of columns
-        self.hostTable.setHorizontalHeaderLabels(["Host", "IP", "CPU", "Mem", "Net Send", "Net Recv", "Last Update"])  # Set column names
+        self.hostTable.setColumnCount(9)  # Set the number of columns
+        self.hostTable.setHorizontalHeaderLabels(["Host", "IP", "CPU", "Max Core", "Load", "Mem", "Net Send", "Net Recv", "Last Update"])  # Set column names
         self.hostTable.verticalHeader().setVisible(False)  # Hide the vertical header
         self.hostTable.resizeColumnsToContents()
         self.leftVerticalLayout.addWidget(self.hostTable)
@@ -740,9 +835,15 @@ class MainWindow(QMainWindow):
                 udpm = data['ProcmanGuiParameters']['udpm']
                 self.setProperties(self.refresh_rate, self.udpm)
                                 
-                # Add the processes from the file
+                # Add the processes from the file, one batch of commands per host
+                batches = {}
                 for process in data['Processes']:
-                    self.lcm_handler.create_process(process['host'], process['group'], process['name'], process['auto_restart'], process['cmd'], process["realtime"])
+                    # cpu_affinity, sched_policy, sched_priority, nice, ionice_class, ionice_level, cpu_quota and mem_max are optional
+                    batches.setdefault(process['host'], []).append(self.lcm_handler.create_command(
+                        process['host'], process['group'], process['name'], process['auto_restart'], process['cmd'], process["realtime"],
+                        settings_from_yaml(process)))
+                for host_name, commands in batches.items():
+                    self.lcm_handler.send_batch(host_name, commands)
                     
                 # Set the LCM channels from the file 
                 # check if the file has the LCMChannels key
@@ -774,12 +875,13 @@ class MainWindow(QMainWindow):
             for name, process in self.processes.items():
                 process_info = {
                     'name': name,
-                    'host': process['host'],
+                    'host': process['hostname'],
                     'cmd': process['cmd'],
                     'group': process['group'],
                     'auto_restart': process['auto_restart'],
                     'realtime': process['realtime']
                 }
+                process_info.update(changed_settings(process['settings']))
                 data['Processes'].append(process_info)
             
             data['LCMChannels'] = {}
@@ -3,8 +3,19 @@ This file automatically generated by lcm-gen.
 DO NOT MODIFY BY HAND!!!!
 """
 
+from .command_batch_t import command_batch_t
+from .command_result_t import command_result_t
+from .command_results_t import command_results_t
 from .command_t import command_t
+from .histogram_summary_t import histogram_summary_t
+from .host_diagnostics_t import host_diagnostics_t
 from .host_info_t import host_info_t
+from .host_outputs_t import host_outputs_t
 from .host_procs_t import host_procs_t
+from .host_specs_t import host_specs_t
+from .host_stats_t import host_stats_t
+from .metric_history_t import metric_history_t
+from .output_history_t import output_history_t
 from .proc_info_t import proc_info_t
 from .proc_output_t import proc_output_t
+from .proc_spec_t import proc_spec_t
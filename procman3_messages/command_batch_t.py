@@ -0,0 +1,84 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+import procman3_messages.command_t
+
+class command_batch_t(object):
+    __slots__ = ["timestamp", "hostname", "num_commands", "commands"]
+
+    __typenames__ = ["int64_t", "string", "int32_t", "procman3_messages.command_t"]
+
+    __dimensions__ = [None, None, None, ["num_commands"]]
+
+    def __init__(self):
+        self.timestamp = 0
+        self.hostname = ""
+        self.num_commands = 0
+        self.commands = []
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(command_batch_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">q", self.timestamp))
+        __hostname_encoded = self.hostname.encode('utf-8')
+        buf.write(struct.pack('>I', len(__hostname_encoded)+1))
+        buf.write(__hostname_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">i", self.num_commands))
+        for i0 in range(self.num_commands):
+            assert self.commands[i0]._get_packed_fingerprint() == procman3_messages.command_t._get_packed_fingerprint()
+            self.commands[i0]._encode_one(buf)
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != command_batch_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return command_batch_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = command_batch_t()
+        self.timestamp = struct.unpack(">q", buf.read(8))[0]
+        __hostname_len = struct.unpack('>I', buf.read(4))[0]
+        self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
+        self.num_commands = struct.unpack(">i", buf.read(4))[0]
+        self.commands = []
+        for i0 in range(self.num_commands):
+            self.commands.append(procman3_messages.command_t._decode_one(buf))
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if command_batch_t in parents: return 0
+        newparents = parents + [command_batch_t]
+        tmphash = (0xa8c26168a3539032+ procman3_messages.command_t._get_hash_recursive(newparents)) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if command_batch_t._packed_fingerprint is None:
+            command_batch_t._packed_fingerprint = struct.pack(">Q", command_batch_t._get_hash_recursive([]))
+        return command_batch_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", command_batch_t._get_packed_fingerprint())[0]
+
@@ -0,0 +1,106 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+class command_result_t(object):
+    __slots__ = ["command_id", "command", "name", "group", "done", "ok", "error", "duration", "duplicate"]
+
+    __typenames__ = ["string", "string", "string", "string", "boolean", "boolean", "string", "int64_t", "boolean"]
+
+    __dimensions__ = [None, None, None, None, None, None, None, None, None]
+
+    def __init__(self):
+        self.command_id = ""
+        self.command = ""
+        self.name = ""
+        self.group = ""
+        self.done = False
+        self.ok = False
+        self.error = ""
+        self.duration = 0
+        self.duplicate = False
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(command_result_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        __command_id_encoded = self.command_id.encode('utf-8')
+        buf.write(struct.pack('>I', len(__command_id_encoded)+1))
+        buf.write(__command_id_encoded)
+        buf.write(b"\0")
+        __command_encoded = self.command.encode('utf-8')
+        buf.write(struct.pack('>I', len(__command_encoded)+1))
+        buf.write(__command_encoded)
+        buf.write(b"\0")
+        __name_encoded = self.name.encode('utf-8')
+        buf.write(struct.pack('>I', len(__name_encoded)+1))
+        buf.write(__name_encoded)
+        buf.write(b"\0")
+        __group_encoded = self.group.encode('utf-8')
+        buf.write(struct.pack('>I', len(__group_encoded)+1))
+        buf.write(__group_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">bb", self.done, self.ok))
+        __error_encoded = self.error.encode('utf-8')
+        buf.write(struct.pack('>I', len(__error_encoded)+1))
+        buf.write(__error_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">qb", self.duration, self.duplicate))
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != command_result_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return command_result_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = command_result_t()
+        __command_id_len = struct.unpack('>I', buf.read(4))[0]
+        self.command_id = buf.read(__command_id_len)[:-1].decode('utf-8', 'replace')
+        __command_len = struct.unpack('>I', buf.read(4))[0]
+        self.command = buf.read(__command_len)[:-1].decode('utf-8', 'replace')
+        __name_len = struct.unpack('>I', buf.read(4))[0]
+        self.name = buf.read(__name_len)[:-1].decode('utf-8', 'replace')
+        __group_len = struct.unpack('>I', buf.read(4))[0]
+        self.group = buf.read(__group_len)[:-1].decode('utf-8', 'replace')
+        self.done = bool(struct.unpack('b', buf.read(1))[0])
+        self.ok = bool(struct.unpack('b', buf.read(1))[0])
+        __error_len = struct.unpack('>I', buf.read(4))[0]
+        self.error = buf.read(__error_len)[:-1].decode('utf-8', 'replace')
+        self.duration = struct.unpack(">q", buf.read(8))[0]
+        self.duplicate = bool(struct.unpack('b', buf.read(1))[0])
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if command_result_t in parents: return 0
+        tmphash = (0x9d32325ff0c072a2) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if command_result_t._packed_fingerprint is None:
+            command_result_t._packed_fingerprint = struct.pack(">Q", command_result_t._get_hash_recursive([]))
+        return command_result_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", command_result_t._get_packed_fingerprint())[0]
+
@@ -10,20 +10,38 @@ except ImportError:
 import struct
 
 class command_t(object):
-    __slots__ = ["name", "group", "hostname", "command", "proc_command", "auto_restart", "realtime"]
+    __slots__ = ["name", "group", "hostname", "command", "command_id", "proc_command", "auto_restart", "realtime", "offset", "length", "start_time", "end_time", "max_points", "num_cpus", "cpu_affinity", "sched_policy", "sched_priority", "nice", "ionice_class", "ionice_level", "cpu_quota", "mem_max", "ready_probe", "ready_arg", "ready_timeout"]
 
-    __typenames__ = ["string", "string", "string", "string", "string", "boolean", "boolean"]
+    __typenames__ = ["string", "string", "string", "string", "string", "string", "boolean", "boolean", "int64_t", "int64_t", "int64_t", "int64_t", "int32_t", "int16_t", "int16_t", "string", "int16_t", "int8_t", "int8_t", "int8_t", "float", "int64_t", "string", "string", "float"]
 
-    __dimensions__ = [None, None, None, None, None, None, None]
+    __dimensions__ = [None, None, None, None, None, None, None, None, None, None, None, None, None, None, ["num_cpus"], None, None, None, None, None, None, None, None, None, None]
 
     def __init__(self):
         self.name = ""
         self.group = ""
         self.hostname = ""
         self.command = ""
+        self.command_id = ""
         self.proc_command = ""
         self.auto_restart = False
         self.realtime = False
+        self.offset = 0
+        self.length = 0
+        self.start_time = 0
+        self.end_time = 0
+        self.max_points = 0
+        self.num_cpus = 0
+        self.cpu_affinity = []
+        self.sched_policy = ""
+        self.sched_priority = 0
+        self.nice = 0
+        self.ionice_class = 0
+        self.ionice_level = 0
+        self.cpu_quota = 0.0
+        self.mem_max = 0
+        self.ready_probe = ""
+        self.ready_arg = ""
+        self.ready_timeout = 0.0
 
     def encode(self):
         buf = BytesIO()
@@ -48,11 +66,30 @@ class command_t(object):
         buf.write(struct.pack('>I', len(__command_encoded)+1))
         buf.write(__command_encoded)
         buf.write(b"\0")
+        __command_id_encoded = self.command_id.encode('utf-8')
+        buf.write(struct.pack('>I', len(__command_id_encoded)+1))
+        buf.write(__command_id_encoded)
+        buf.write(b"\0")
         __proc_command_encoded = self.proc_command.encode('utf-8')
         buf.write(struct.pack('>I', len(__proc_command_encoded)+1))
         buf.write(__proc_command_encoded)
         buf.write(b"\0")
-        buf.write(struct.pack(">bb", self.auto_restart, self.realtime))
+        buf.write(struct.pack(">bbqqqqih", self.auto_restart, self.realtime, self.offset, self.length, self.start_time, self.end_time, self.max_points, self.num_cpus))
+        buf.write(struct.pack('>%dh' % self.num_cpus, *self.cpu_affinity[:self.num_cpus]))
+        __sched_policy_encoded = self.sched_policy.encode('utf-8')
+        buf.write(struct.pack('>I', len(__sched_policy_encoded)+1))
+        buf.write(__sched_policy_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">hbbbfq", self.sched_priority, self.nice, self.ionice_class, self.ionice_level, self.cpu_quota, self.mem_max))
+        __ready_probe_encoded = self.ready_probe.encode('utf-8')
+        buf.write(struct.pack('>I', len(__ready_probe_encoded)+1))
+        buf.write(__ready_probe_encoded)
+        buf.write(b"\0")
+        __ready_arg_encoded = self.ready_arg.encode('utf-8')
+        buf.write(struct.pack('>I', len(__ready_arg_encoded)+1))
+        buf.write(__ready_arg_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">f", self.ready_timeout))
 
     def decode(data):
         if hasattr(data, 'read'):
@@ -74,16 +111,28 @@ class command_t(object):
         self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
         __command_len = struct.unpack('>I', buf.read(4))[0]
         self.command = buf.read(__command_len)[:-1].decode('utf-8', 'replace')
+        __command_id_len = struct.unpack('>I', buf.read(4))[0]
+        self.command_id = buf.read(__command_id_len)[:-1].decode('utf-8', 'replace')
         __proc_command_len = struct.unpack('>I', buf.read(4))[0]
         self.proc_command = buf.read(__proc_command_len)[:-1].decode('utf-8', 'replace')
         self.auto_restart = bool(struct.unpack('b', buf.read(1))[0])
         self.realtime = bool(struct.unpack('b', buf.read(1))[0])
+        self.offset, self.length, self.start_time, self.end_time, self.max_points, self.num_cpus = struct.unpack(">qqqqih", buf.read(38))
+        self.cpu_affinity = struct.unpack('>%dh' % self.num_cpus, buf.read(self.num_cpus * 2))
+        __sched_policy_len = struct.unpack('>I', buf.read(4))[0]
+        self.sched_policy = buf.read(__sched_policy_len)[:-1].decode('utf-8', 'replace')
+        self.sched_priority, self.nice, self.ionice_class, self.ionice_level, self.cpu_quota, self.mem_max = struct.unpack(">hbbbfq", buf.read(17))
+        __ready_probe_len = struct.unpack('>I', buf.read(4))[0]
+        self.ready_probe = buf.read(__ready_probe_len)[:-1].decode('utf-8', 'replace')
+        __ready_arg_len = struct.unpack('>I', buf.read(4))[0]
+        self.ready_arg = buf.read(__ready_arg_len)[:-1].decode('utf-8', 'replace')
+        self.ready_timeout = struct.unpack(">f", buf.read(4))[0]
         return self
     _decode_one = staticmethod(_decode_one)
 
     def _get_hash_recursive(parents):
         if command_t in parents: return 0
-        tmphash = (0x36459f0534860637) & 0xffffffffffffffff
+        tmphash = (0xc15770952eb709) & 0xffffffffffffffff
         tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
         return tmphash
     _get_hash_recursive = staticmethod(_get_hash_recursive)
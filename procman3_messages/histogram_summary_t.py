@@ -0,0 +1,78 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+class histogram_summary_t(object):
+    __slots__ = ["name", "count", "total", "min", "p50", "p90", "p99", "p999", "max"]
+
+    __typenames__ = ["string", "int64_t", "int64_t", "int64_t", "int64_t", "int64_t", "int64_t", "int64_t", "int64_t"]
+
+    __dimensions__ = [None, None, None, None, None, None, None, None, None]
+
+    def __init__(self):
+        self.name = ""
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.p50 = 0
+        self.p90 = 0
+        self.p99 = 0
+        self.p999 = 0
+        self.max = 0
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(histogram_summary_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        __name_encoded = self.name.encode('utf-8')
+        buf.write(struct.pack('>I', len(__name_encoded)+1))
+        buf.write(__name_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">qqqqqqqq", self.count, self.total, self.min, self.p50, self.p90, self.p99, self.p999, self.max))
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != histogram_summary_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return histogram_summary_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = histogram_summary_t()
+        __name_len = struct.unpack('>I', buf.read(4))[0]
+        self.name = buf.read(__name_len)[:-1].decode('utf-8', 'replace')
+        self.count, self.total, self.min, self.p50, self.p90, self.p99, self.p999, self.max = struct.unpack(">qqqqqqqq", buf.read(64))
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if histogram_summary_t in parents: return 0
+        tmphash = (0x3f7dd617ae0ab490) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if histogram_summary_t._packed_fingerprint is None:
+            histogram_summary_t._packed_fingerprint = struct.pack(">Q", histogram_summary_t._get_hash_recursive([]))
+        return histogram_summary_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", histogram_summary_t._get_packed_fingerprint())[0]
+
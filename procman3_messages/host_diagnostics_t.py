@@ -0,0 +1,111 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+import procman3_messages.histogram_summary_t
+
+class host_diagnostics_t(object):
+    __slots__ = ["timestamp", "hostname", "interval", "cpu", "mem_rss", "mem_vms", "num_threads", "num_fds", "loop_iterations", "num_phases", "phases", "num_commands", "commands", "num_channels", "channels"]
+
+    __typenames__ = ["int64_t", "string", "float", "float", "int32_t", "int32_t", "int32_t", "int32_t", "int32_t", "int16_t", "procman3_messages.histogram_summary_t", "int16_t", "procman3_messages.histogram_summary_t", "int16_t", "procman3_messages.histogram_summary_t"]
+
+    __dimensions__ = [None, None, None, None, None, None, None, None, None, None, ["num_phases"], None, ["num_commands"], None, ["num_channels"]]
+
+    def __init__(self):
+        self.timestamp = 0
+        self.hostname = ""
+        self.interval = 0.0
+        self.cpu = 0.0
+        self.mem_rss = 0
+        self.mem_vms = 0
+        self.num_threads = 0
+        self.num_fds = 0
+        self.loop_iterations = 0
+        self.num_phases = 0
+        self.phases = []
+        self.num_commands = 0
+        self.commands = []
+        self.num_channels = 0
+        self.channels = []
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(host_diagnostics_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">q", self.timestamp))
+        __hostname_encoded = self.hostname.encode('utf-8')
+        buf.write(struct.pack('>I', len(__hostname_encoded)+1))
+        buf.write(__hostname_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">ffiiiiih", self.interval, self.cpu, self.mem_rss, self.mem_vms, self.num_threads, self.num_fds, self.loop_iterations, self.num_phases))
+        for i0 in range(self.num_phases):
+            assert self.phases[i0]._get_packed_fingerprint() == procman3_messages.histogram_summary_t._get_packed_fingerprint()
+            self.phases[i0]._encode_one(buf)
+        buf.write(struct.pack(">h", self.num_commands))
+        for i0 in range(self.num_commands):
+            assert self.commands[i0]._get_packed_fingerprint() == procman3_messages.histogram_summary_t._get_packed_fingerprint()
+            self.commands[i0]._encode_one(buf)
+        buf.write(struct.pack(">h", self.num_channels))
+        for i0 in range(self.num_channels):
+            assert self.channels[i0]._get_packed_fingerprint() == procman3_messages.histogram_summary_t._get_packed_fingerprint()
+            self.channels[i0]._encode_one(buf)
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != host_diagnostics_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return host_diagnostics_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = host_diagnostics_t()
+        self.timestamp = struct.unpack(">q", buf.read(8))[0]
+        __hostname_len = struct.unpack('>I', buf.read(4))[0]
+        self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
+        self.interval, self.cpu, self.mem_rss, self.mem_vms, self.num_threads, self.num_fds, self.loop_iterations, self.num_phases = struct.unpack(">ffiiiiih", buf.read(30))
+        self.phases = []
+        for i0 in range(self.num_phases):
+            self.phases.append(procman3_messages.histogram_summary_t._decode_one(buf))
+        self.num_commands = struct.unpack(">h", buf.read(2))[0]
+        self.commands = []
+        for i0 in range(self.num_commands):
+            self.commands.append(procman3_messages.histogram_summary_t._decode_one(buf))
+        self.num_channels = struct.unpack(">h", buf.read(2))[0]
+        self.channels = []
+        for i0 in range(self.num_channels):
+            self.channels.append(procman3_messages.histogram_summary_t._decode_one(buf))
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if host_diagnostics_t in parents: return 0
+        newparents = parents + [host_diagnostics_t]
+        tmphash = (0x81f644cfa8d280cd+ procman3_messages.histogram_summary_t._get_hash_recursive(newparents)+ procman3_messages.histogram_summary_t._get_hash_recursive(newparents)+ procman3_messages.histogram_summary_t._get_hash_recursive(newparents)) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if host_diagnostics_t._packed_fingerprint is None:
+            host_diagnostics_t._packed_fingerprint = struct.pack(">Q", host_diagnostics_t._get_hash_recursive([]))
+        return host_diagnostics_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", host_diagnostics_t._get_packed_fingerprint())[0]
+
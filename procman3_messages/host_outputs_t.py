@@ -0,0 +1,93 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+import procman3_messages.proc_output_t
+
+class host_outputs_t(object):
+    __slots__ = ["timestamp", "hostname", "seq", "compression", "num_outputs", "outputs", "raw_size", "data_size", "data"]
+
+    __typenames__ = ["int64_t", "string", "int64_t", "int8_t", "int32_t", "procman3_messages.proc_output_t", "int32_t", "int32_t", "byte"]
+
+    __dimensions__ = [None, None, None, None, None, ["num_outputs"], None, None, ["data_size"]]
+
+    def __init__(self):
+        self.timestamp = 0
+        self.hostname = ""
+        self.seq = 0
+        self.compression = 0
+        self.num_outputs = 0
+        self.outputs = []
+        self.raw_size = 0
+        self.data_size = 0
+        self.data = b""
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(host_outputs_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">q", self.timestamp))
+        __hostname_encoded = self.hostname.encode('utf-8')
+        buf.write(struct.pack('>I', len(__hostname_encoded)+1))
+        buf.write(__hostname_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">qbi", self.seq, self.compression, self.num_outputs))
+        for i0 in range(self.num_outputs):
+            assert self.outputs[i0]._get_packed_fingerprint() == procman3_messages.proc_output_t._get_packed_fingerprint()
+            self.outputs[i0]._encode_one(buf)
+        buf.write(struct.pack(">ii", self.raw_size, self.data_size))
+        buf.write(bytearray(self.data[:self.data_size]))
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != host_outputs_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return host_outputs_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = host_outputs_t()
+        self.timestamp = struct.unpack(">q", buf.read(8))[0]
+        __hostname_len = struct.unpack('>I', buf.read(4))[0]
+        self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
+        self.seq, self.compression, self.num_outputs = struct.unpack(">qbi", buf.read(13))
+        self.outputs = []
+        for i0 in range(self.num_outputs):
+            self.outputs.append(procman3_messages.proc_output_t._decode_one(buf))
+        self.raw_size, self.data_size = struct.unpack(">ii", buf.read(8))
+        self.data = buf.read(self.data_size)
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if host_outputs_t in parents: return 0
+        newparents = parents + [host_outputs_t]
+        tmphash = (0x848d6139e0fa6333+ procman3_messages.proc_output_t._get_hash_recursive(newparents)) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if host_outputs_t._packed_fingerprint is None:
+            host_outputs_t._packed_fingerprint = struct.pack(">Q", host_outputs_t._get_hash_recursive([]))
+        return host_outputs_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", host_outputs_t._get_packed_fingerprint())[0]
+
@@ -12,15 +12,18 @@ import struct
 import procman3_messages.proc_info_t
 
 class host_procs_t(object):
-    __slots__ = ["timestamp", "hostname", "num_procs", "procs"]
+    __slots__ = ["timestamp", "hostname", "seq", "keyframe", "spec_version", "num_procs", "procs"]
 
-    __typenames__ = ["int64_t", "string", "int32_t", "procman3_messages.proc_info_t"]
+    __typenames__ = ["int64_t", "string", "int64_t", "boolean", "int64_t", "int32_t", "procman3_messages.proc_info_t"]
 
-    __dimensions__ = [None, None, None, ["num_procs"]]
+    __dimensions__ = [None, None, None, None, None, None, ["num_procs"]]
 
     def __init__(self):
         self.timestamp = 0
         self.hostname = ""
+        self.seq = 0
+        self.keyframe = False
+        self.spec_version = 0
         self.num_procs = 0
         self.procs = []
 
@@ -36,7 +39,7 @@ class host_procs_t(object):
         buf.write(struct.pack('>I', len(__hostname_encoded)+1))
         buf.write(__hostname_encoded)
         buf.write(b"\0")
-        buf.write(struct.pack(">i", self.num_procs))
+        buf.write(struct.pack(">qbqi", self.seq, self.keyframe, self.spec_version, self.num_procs))
         for i0 in range(self.num_procs):
             assert self.procs[i0]._get_packed_fingerprint() == procman3_messages.proc_info_t._get_packed_fingerprint()
             self.procs[i0]._encode_one(buf)
@@ -56,7 +59,9 @@ class host_procs_t(object):
         self.timestamp = struct.unpack(">q", buf.read(8))[0]
         __hostname_len = struct.unpack('>I', buf.read(4))[0]
         self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
-        self.num_procs = struct.unpack(">i", buf.read(4))[0]
+        self.seq = struct.unpack(">q", buf.read(8))[0]
+        self.keyframe = bool(struct.unpack('b', buf.read(1))[0])
+        self.spec_version, self.num_procs = struct.unpack(">qi", buf.read(12))
         self.procs = []
         for i0 in range(self.num_procs):
             self.procs.append(procman3_messages.proc_info_t._decode_one(buf))
@@ -66,7 +71,7 @@ class host_procs_t(object):
     def _get_hash_recursive(parents):
         if host_procs_t in parents: return 0
         newparents = parents + [host_procs_t]
-        tmphash = (0x40e0393990ab6db5+ procman3_messages.proc_info_t._get_hash_recursive(newparents)) & 0xffffffffffffffff
+        tmphash = (0xecd6b757cae48de4+ procman3_messages.proc_info_t._get_hash_recursive(newparents)) & 0xffffffffffffffff
         tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
         return tmphash
     _get_hash_recursive = staticmethod(_get_hash_recursive)
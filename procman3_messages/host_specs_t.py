@@ -0,0 +1,85 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+import procman3_messages.proc_spec_t
+
+class host_specs_t(object):
+    __slots__ = ["timestamp", "hostname", "spec_version", "num_specs", "specs"]
+
+    __typenames__ = ["int64_t", "string", "int64_t", "int32_t", "procman3_messages.proc_spec_t"]
+
+    __dimensions__ = [None, None, None, None, ["num_specs"]]
+
+    def __init__(self):
+        self.timestamp = 0
+        self.hostname = ""
+        self.spec_version = 0
+        self.num_specs = 0
+        self.specs = []
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(host_specs_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">q", self.timestamp))
+        __hostname_encoded = self.hostname.encode('utf-8')
+        buf.write(struct.pack('>I', len(__hostname_encoded)+1))
+        buf.write(__hostname_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">qi", self.spec_version, self.num_specs))
+        for i0 in range(self.num_specs):
+            assert self.specs[i0]._get_packed_fingerprint() == procman3_messages.proc_spec_t._get_packed_fingerprint()
+            self.specs[i0]._encode_one(buf)
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != host_specs_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return host_specs_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = host_specs_t()
+        self.timestamp = struct.unpack(">q", buf.read(8))[0]
+        __hostname_len = struct.unpack('>I', buf.read(4))[0]
+        self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
+        self.spec_version, self.num_specs = struct.unpack(">qi", buf.read(12))
+        self.specs = []
+        for i0 in range(self.num_specs):
+            self.specs.append(procman3_messages.proc_spec_t._decode_one(buf))
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if host_specs_t in parents: return 0
+        newparents = parents + [host_specs_t]
+        tmphash = (0x86807963ca5d03a6+ procman3_messages.proc_spec_t._get_hash_recursive(newparents)) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if host_specs_t._packed_fingerprint is None:
+            host_specs_t._packed_fingerprint = struct.pack(">Q", host_specs_t._get_hash_recursive([]))
+        return host_specs_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", host_specs_t._get_packed_fingerprint())[0]
+
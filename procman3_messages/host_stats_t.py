@@ -0,0 +1,125 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+class host_stats_t(object):
+    __slots__ = ["timestamp", "hostname", "load_avg", "throttle_count", "num_cores", "core_usage", "core_freq", "num_interfaces", "interfaces", "net_sent", "net_recv", "num_disks", "disks", "disk_read", "disk_write", "disk_busy"]
+
+    __typenames__ = ["int64_t", "string", "float", "int64_t", "int16_t", "float", "float", "int16_t", "string", "float", "float", "int16_t", "string", "float", "float", "float"]
+
+    __dimensions__ = [None, None, [3], None, None, ["num_cores"], ["num_cores"], None, ["num_interfaces"], ["num_interfaces"], ["num_interfaces"], None, ["num_disks"], ["num_disks"], ["num_disks"], ["num_disks"]]
+
+    def __init__(self):
+        self.timestamp = 0
+        self.hostname = ""
+        self.load_avg = [ 0.0 for dim0 in range(3) ]
+        self.throttle_count = 0
+        self.num_cores = 0
+        self.core_usage = []
+        self.core_freq = []
+        self.num_interfaces = 0
+        self.interfaces = []
+        self.net_sent = []
+        self.net_recv = []
+        self.num_disks = 0
+        self.disks = []
+        self.disk_read = []
+        self.disk_write = []
+        self.disk_busy = []
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(host_stats_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">q", self.timestamp))
+        __hostname_encoded = self.hostname.encode('utf-8')
+        buf.write(struct.pack('>I', len(__hostname_encoded)+1))
+        buf.write(__hostname_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack('>3f', *self.load_avg[:3]))
+        buf.write(struct.pack(">qh", self.throttle_count, self.num_cores))
+        buf.write(struct.pack('>%df' % self.num_cores, *self.core_usage[:self.num_cores]))
+        buf.write(struct.pack('>%df' % self.num_cores, *self.core_freq[:self.num_cores]))
+        buf.write(struct.pack(">h", self.num_interfaces))
+        for i0 in range(self.num_interfaces):
+            __interfaces_encoded = self.interfaces[i0].encode('utf-8')
+            buf.write(struct.pack('>I', len(__interfaces_encoded)+1))
+            buf.write(__interfaces_encoded)
+            buf.write(b"\0")
+        buf.write(struct.pack('>%df' % self.num_interfaces, *self.net_sent[:self.num_interfaces]))
+        buf.write(struct.pack('>%df' % self.num_interfaces, *self.net_recv[:self.num_interfaces]))
+        buf.write(struct.pack(">h", self.num_disks))
+        for i0 in range(self.num_disks):
+            __disks_encoded = self.disks[i0].encode('utf-8')
+            buf.write(struct.pack('>I', len(__disks_encoded)+1))
+            buf.write(__disks_encoded)
+            buf.write(b"\0")
+        buf.write(struct.pack('>%df' % self.num_disks, *self.disk_read[:self.num_disks]))
+        buf.write(struct.pack('>%df' % self.num_disks, *self.disk_write[:self.num_disks]))
+        buf.write(struct.pack('>%df' % self.num_disks, *self.disk_busy[:self.num_disks]))
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != host_stats_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return host_stats_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = host_stats_t()
+        self.timestamp = struct.unpack(">q", buf.read(8))[0]
+        __hostname_len = struct.unpack('>I', buf.read(4))[0]
+        self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
+        self.load_avg = struct.unpack('>3f', buf.read(12))
+        self.throttle_count, self.num_cores = struct.unpack(">qh", buf.read(10))
+        self.core_usage = struct.unpack('>%df' % self.num_cores, buf.read(self.num_cores * 4))
+        self.core_freq = struct.unpack('>%df' % self.num_cores, buf.read(self.num_cores * 4))
+        self.num_interfaces = struct.unpack(">h", buf.read(2))[0]
+        self.interfaces = []
+        for i0 in range(self.num_interfaces):
+            __interfaces_len = struct.unpack('>I', buf.read(4))[0]
+            self.interfaces.append(buf.read(__interfaces_len)[:-1].decode('utf-8', 'replace'))
+        self.net_sent = struct.unpack('>%df' % self.num_interfaces, buf.read(self.num_interfaces * 4))
+        self.net_recv = struct.unpack('>%df' % self.num_interfaces, buf.read(self.num_interfaces * 4))
+        self.num_disks = struct.unpack(">h", buf.read(2))[0]
+        self.disks = []
+        for i0 in range(self.num_disks):
+            __disks_len = struct.unpack('>I', buf.read(4))[0]
+            self.disks.append(buf.read(__disks_len)[:-1].decode('utf-8', 'replace'))
+        self.disk_read = struct.unpack('>%df' % self.num_disks, buf.read(self.num_disks * 4))
+        self.disk_write = struct.unpack('>%df' % self.num_disks, buf.read(self.num_disks * 4))
+        self.disk_busy = struct.unpack('>%df' % self.num_disks, buf.read(self.num_disks * 4))
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if host_stats_t in parents: return 0
+        tmphash = (0xe80bb7c1e0f2572a) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if host_stats_t._packed_fingerprint is None:
+            host_stats_t._packed_fingerprint = struct.pack(">Q", host_stats_t._get_hash_recursive([]))
+        return host_stats_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", host_stats_t._get_packed_fingerprint())[0]
+
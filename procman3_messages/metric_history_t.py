@@ -0,0 +1,135 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+class metric_history_t(object):
+    __slots__ = ["timestamp", "hostname", "name", "start_time", "end_time", "error", "num_samples", "first_time", "last_time", "num_fields", "fields", "num_points", "times", "values", "num_percentiles", "percentiles", "percentile_values", "mean", "max"]
+
+    __typenames__ = ["int64_t", "string", "string", "int64_t", "int64_t", "string", "int32_t", "int64_t", "int64_t", "int16_t", "string", "int32_t", "int64_t", "float", "int8_t", "float", "float", "float", "float"]
+
+    __dimensions__ = [None, None, None, None, None, None, None, None, None, None, ["num_fields"], None, ["num_points"], ["num_fields", "num_points"], None, ["num_percentiles"], ["num_fields", "num_percentiles"], ["num_fields"], ["num_fields"]]
+
+    def __init__(self):
+        self.timestamp = 0
+        self.hostname = ""
+        self.name = ""
+        self.start_time = 0
+        self.end_time = 0
+        self.error = ""
+        self.num_samples = 0
+        self.first_time = 0
+        self.last_time = 0
+        self.num_fields = 0
+        self.fields = []
+        self.num_points = 0
+        self.times = []
+        self.values = []
+        self.num_percentiles = 0
+        self.percentiles = []
+        self.percentile_values = []
+        self.mean = []
+        self.max = []
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(metric_history_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">q", self.timestamp))
+        __hostname_encoded = self.hostname.encode('utf-8')
+        buf.write(struct.pack('>I', len(__hostname_encoded)+1))
+        buf.write(__hostname_encoded)
+        buf.write(b"\0")
+        __name_encoded = self.name.encode('utf-8')
+        buf.write(struct.pack('>I', len(__name_encoded)+1))
+        buf.write(__name_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">qq", self.start_time, self.end_time))
+        __error_encoded = self.error.encode('utf-8')
+        buf.write(struct.pack('>I', len(__error_encoded)+1))
+        buf.write(__error_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">iqqh", self.num_samples, self.first_time, self.last_time, self.num_fields))
+        for i0 in range(self.num_fields):
+            __fields_encoded = self.fields[i0].encode('utf-8')
+            buf.write(struct.pack('>I', len(__fields_encoded)+1))
+            buf.write(__fields_encoded)
+            buf.write(b"\0")
+        buf.write(struct.pack(">i", self.num_points))
+        buf.write(struct.pack('>%dq' % self.num_points, *self.times[:self.num_points]))
+        for i0 in range(self.num_fields):
+            buf.write(struct.pack('>%df' % self.num_points, *self.values[i0][:self.num_points]))
+        buf.write(struct.pack(">b", self.num_percentiles))
+        buf.write(struct.pack('>%df' % self.num_percentiles, *self.percentiles[:self.num_percentiles]))
+        for i0 in range(self.num_fields):
+            buf.write(struct.pack('>%df' % self.num_percentiles, *self.percentile_values[i0][:self.num_percentiles]))
+        buf.write(struct.pack('>%df' % self.num_fields, *self.mean[:self.num_fields]))
+        buf.write(struct.pack('>%df' % self.num_fields, *self.max[:self.num_fields]))
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != metric_history_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return metric_history_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = metric_history_t()
+        self.timestamp = struct.unpack(">q", buf.read(8))[0]
+        __hostname_len = struct.unpack('>I', buf.read(4))[0]
+        self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
+        __name_len = struct.unpack('>I', buf.read(4))[0]
+        self.name = buf.read(__name_len)[:-1].decode('utf-8', 'replace')
+        self.start_time, self.end_time = struct.unpack(">qq", buf.read(16))
+        __error_len = struct.unpack('>I', buf.read(4))[0]
+        self.error = buf.read(__error_len)[:-1].decode('utf-8', 'replace')
+        self.num_samples, self.first_time, self.last_time, self.num_fields = struct.unpack(">iqqh", buf.read(22))
+        self.fields = []
+        for i0 in range(self.num_fields):
+            __fields_len = struct.unpack('>I', buf.read(4))[0]
+            self.fields.append(buf.read(__fields_len)[:-1].decode('utf-8', 'replace'))
+        self.num_points = struct.unpack(">i", buf.read(4))[0]
+        self.times = struct.unpack('>%dq' % self.num_points, buf.read(self.num_points * 8))
+        self.values = []
+        for i0 in range(self.num_fields):
+            self.values.append(struct.unpack('>%df' % self.num_points, buf.read(self.num_points * 4)))
+        self.num_percentiles = struct.unpack(">b", buf.read(1))[0]
+        self.percentiles = struct.unpack('>%df' % self.num_percentiles, buf.read(self.num_percentiles * 4))
+        self.percentile_values = []
+        for i0 in range(self.num_fields):
+            self.percentile_values.append(struct.unpack('>%df' % self.num_percentiles, buf.read(self.num_percentiles * 4)))
+        self.mean = struct.unpack('>%df' % self.num_fields, buf.read(self.num_fields * 4))
+        self.max = struct.unpack('>%df' % self.num_fields, buf.read(self.num_fields * 4))
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if metric_history_t in parents: return 0
+        tmphash = (0x6e9eda8e3acecab8) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if metric_history_t._packed_fingerprint is None:
+            metric_history_t._packed_fingerprint = struct.pack(">Q", metric_history_t._get_hash_recursive([]))
+        return metric_history_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", metric_history_t._get_packed_fingerprint())[0]
+
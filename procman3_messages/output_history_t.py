@@ -0,0 +1,113 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+class output_history_t(object):
+    __slots__ = ["timestamp", "hostname", "name", "start_time", "end_time", "query_offset", "query_length", "first_offset", "end_offset", "offset", "truncated", "error", "num_marks", "mark_offsets", "mark_times", "compression", "raw_size", "data_size", "data"]
+
+    __typenames__ = ["int64_t", "string", "string", "int64_t", "int64_t", "int64_t", "int64_t", "int64_t", "int64_t", "int64_t", "boolean", "string", "int32_t", "int64_t", "int64_t", "int8_t", "int32_t", "int32_t", "byte"]
+
+    __dimensions__ = [None, None, None, None, None, None, None, None, None, None, None, None, None, ["num_marks"], ["num_marks"], None, None, None, ["data_size"]]
+
+    def __init__(self):
+        self.timestamp = 0
+        self.hostname = ""
+        self.name = ""
+        self.start_time = 0
+        self.end_time = 0
+        self.query_offset = 0
+        self.query_length = 0
+        self.first_offset = 0
+        self.end_offset = 0
+        self.offset = 0
+        self.truncated = False
+        self.error = ""
+        self.num_marks = 0
+        self.mark_offsets = []
+        self.mark_times = []
+        self.compression = 0
+        self.raw_size = 0
+        self.data_size = 0
+        self.data = b""
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(output_history_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        buf.write(struct.pack(">q", self.timestamp))
+        __hostname_encoded = self.hostname.encode('utf-8')
+        buf.write(struct.pack('>I', len(__hostname_encoded)+1))
+        buf.write(__hostname_encoded)
+        buf.write(b"\0")
+        __name_encoded = self.name.encode('utf-8')
+        buf.write(struct.pack('>I', len(__name_encoded)+1))
+        buf.write(__name_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">qqqqqqqb", self.start_time, self.end_time, self.query_offset, self.query_length, self.first_offset, self.end_offset, self.offset, self.truncated))
+        __error_encoded = self.error.encode('utf-8')
+        buf.write(struct.pack('>I', len(__error_encoded)+1))
+        buf.write(__error_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">i", self.num_marks))
+        buf.write(struct.pack('>%dq' % self.num_marks, *self.mark_offsets[:self.num_marks]))
+        buf.write(struct.pack('>%dq' % self.num_marks, *self.mark_times[:self.num_marks]))
+        buf.write(struct.pack(">bii", self.compression, self.raw_size, self.data_size))
+        buf.write(bytearray(self.data[:self.data_size]))
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != output_history_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return output_history_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = output_history_t()
+        self.timestamp = struct.unpack(">q", buf.read(8))[0]
+        __hostname_len = struct.unpack('>I', buf.read(4))[0]
+        self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
+        __name_len = struct.unpack('>I', buf.read(4))[0]
+        self.name = buf.read(__name_len)[:-1].decode('utf-8', 'replace')
+        self.start_time, self.end_time, self.query_offset, self.query_length, self.first_offset, self.end_offset, self.offset = struct.unpack(">qqqqqqq", buf.read(56))
+        self.truncated = bool(struct.unpack('b', buf.read(1))[0])
+        __error_len = struct.unpack('>I', buf.read(4))[0]
+        self.error = buf.read(__error_len)[:-1].decode('utf-8', 'replace')
+        self.num_marks = struct.unpack(">i", buf.read(4))[0]
+        self.mark_offsets = struct.unpack('>%dq' % self.num_marks, buf.read(self.num_marks * 8))
+        self.mark_times = struct.unpack('>%dq' % self.num_marks, buf.read(self.num_marks * 8))
+        self.compression, self.raw_size, self.data_size = struct.unpack(">bii", buf.read(9))
+        self.data = buf.read(self.data_size)
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if output_history_t in parents: return 0
+        tmphash = (0xd947b8eac765b4b8) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if output_history_t._packed_fingerprint is None:
+            output_history_t._packed_fingerprint = struct.pack(">Q", output_history_t._get_hash_recursive([]))
+        return output_history_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", output_history_t._get_packed_fingerprint())[0]
+
@@ -10,30 +10,37 @@ except ImportError:
 import struct
 
 class proc_info_t(object):
-    __slots__ = ["name", "group", "hostname", "state", "status", "errors", "cmd", "cpu", "mem_rss", "mem_vms", "priority", "pid", "ppid", "auto_restart", "realtime", "exit_code", "runtime"]
+    __slots__ = ["name", "hostname", "state", "status", "errors", "cpu", "mem_rss", "mem_vms", "priority", "pid", "ppid", "exit_code", "start_time", "num_tree_procs", "mem_cgroup", "cpu_pressure", "mem_pressure", "io_pressure", "io_read", "io_write", "ready", "ready_time", "restart_count", "next_restart"]
 
-    __typenames__ = ["string", "string", "string", "string", "string", "string", "string", "float", "int32_t", "int32_t", "int32_t", "int32_t", "int32_t", "boolean", "boolean", "int8_t", "int32_t"]
+    __typenames__ = ["string", "string", "string", "string", "string", "float", "int32_t", "int32_t", "int32_t", "int32_t", "int32_t", "int8_t", "int64_t", "int32_t", "int32_t", "float", "float", "float", "float", "float", "boolean", "int64_t", "int32_t", "int64_t"]
 
-    __dimensions__ = [None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None]
+    __dimensions__ = [None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None, None]
 
     def __init__(self):
         self.name = ""
-        self.group = ""
         self.hostname = ""
         self.state = ""
         self.status = ""
         self.errors = ""
-        self.cmd = ""
         self.cpu = 0.0
         self.mem_rss = 0
         self.mem_vms = 0
         self.priority = 0
         self.pid = 0
         self.ppid = 0
-        self.auto_restart = False
-        self.realtime = False
         self.exit_code = 0
-        self.runtime = 0
+        self.start_time = 0
+        self.num_tree_procs = 0
+        self.mem_cgroup = 0
+        self.cpu_pressure = 0.0
+        self.mem_pressure = 0.0
+        self.io_pressure = 0.0
+        self.io_read = 0.0
+        self.io_write = 0.0
+        self.ready = False
+        self.ready_time = 0
+        self.restart_count = 0
+        self.next_restart = 0
 
     def encode(self):
         buf = BytesIO()
@@ -46,10 +53,6 @@ class proc_info_t(object):
         buf.write(struct.pack('>I', len(__name_encoded)+1))
         buf.write(__name_encoded)
         buf.write(b"\0")
-        __group_encoded = self.group.encode('utf-8')
-        buf.write(struct.pack('>I', len(__group_encoded)+1))
-        buf.write(__group_encoded)
-        buf.write(b"\0")
         __hostname_encoded = self.hostname.encode('utf-8')
         buf.write(struct.pack('>I', len(__hostname_encoded)+1))
         buf.write(__hostname_encoded)
@@ -66,11 +69,7 @@ class proc_info_t(object):
         buf.write(struct.pack('>I', len(__errors_encoded)+1))
         buf.write(__errors_encoded)
         buf.write(b"\0")
-        __cmd_encoded = self.cmd.encode('utf-8')
-        buf.write(struct.pack('>I', len(__cmd_encoded)+1))
-        buf.write(__cmd_encoded)
-        buf.write(b"\0")
-        buf.write(struct.pack(">fiiiiibbbi", self.cpu, self.mem_rss, self.mem_vms, self.priority, self.pid, self.ppid, self.auto_restart, self.realtime, self.exit_code, self.runtime))
+        buf.write(struct.pack(">fiiiiibqiifffffbqiq", self.cpu, self.mem_rss, self.mem_vms, self.priority, self.pid, self.ppid, self.exit_code, self.start_time, self.num_tree_procs, self.mem_cgroup, self.cpu_pressure, self.mem_pressure, self.io_pressure, self.io_read, self.io_write, self.ready, self.ready_time, self.restart_count, self.next_restart))
 
     def decode(data):
         if hasattr(data, 'read'):
@@ -86,8 +85,6 @@ class proc_info_t(object):
         self = proc_info_t()
         __name_len = struct.unpack('>I', buf.read(4))[0]
         self.name = buf.read(__name_len)[:-1].decode('utf-8', 'replace')
-        __group_len = struct.unpack('>I', buf.read(4))[0]
-        self.group = buf.read(__group_len)[:-1].decode('utf-8', 'replace')
         __hostname_len = struct.unpack('>I', buf.read(4))[0]
         self.hostname = buf.read(__hostname_len)[:-1].decode('utf-8', 'replace')
         __state_len = struct.unpack('>I', buf.read(4))[0]
@@ -96,18 +93,15 @@ class proc_info_t(object):
         self.status = buf.read(__status_len)[:-1].decode('utf-8', 'replace')
         __errors_len = struct.unpack('>I', buf.read(4))[0]
         self.errors = buf.read(__errors_len)[:-1].decode('utf-8', 'replace')
-        __cmd_len = struct.unpack('>I', buf.read(4))[0]
-        self.cmd = buf.read(__cmd_len)[:-1].decode('utf-8', 'replace')
-        self.cpu, self.mem_rss, self.mem_vms, self.priority, self.pid, self.ppid = struct.unpack(">fiiiii", buf.read(24))
-        self.auto_restart = bool(struct.unpack('b', buf.read(1))[0])
-        self.realtime = bool(struct.unpack('b', buf.read(1))[0])
-        self.exit_code, self.runtime = struct.unpack(">bi", buf.read(5))
+        self.cpu, self.mem_rss, self.mem_vms, self.priority, self.pid, self.ppid, self.exit_code, self.start_time, self.num_tree_procs, self.mem_cgroup, self.cpu_pressure, self.mem_pressure, self.io_pressure, self.io_read, self.io_write = struct.unpack(">fiiiiibqiifffff", buf.read(61))
+        self.ready = bool(struct.unpack('b', buf.read(1))[0])
+        self.ready_time, self.restart_count, self.next_restart = struct.unpack(">qiq", buf.read(20))
         return self
     _decode_one = staticmethod(_decode_one)
 
     def _get_hash_recursive(parents):
         if proc_info_t in parents: return 0
-        tmphash = (0x9c4e823f87abbd5c) & 0xffffffffffffffff
+        tmphash = (0x586433dcb0ba6ad0) & 0xffffffffffffffff
         tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
         return tmphash
     _get_hash_recursive = staticmethod(_get_hash_recursive)
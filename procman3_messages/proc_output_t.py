@@ -10,11 +10,11 @@ except ImportError:
 import struct
 
 class proc_output_t(object):
-    __slots__ = ["timestamp", "name", "hostname", "group", "stdout", "stderr"]
+    __slots__ = ["timestamp", "name", "hostname", "group", "stdout", "stderr", "seq", "offset", "length", "retained_offset", "resend"]
 
-    __typenames__ = ["int64_t", "string", "string", "string", "string", "string"]
+    __typenames__ = ["int64_t", "string", "string", "string", "string", "string", "int64_t", "int64_t", "int32_t", "int64_t", "boolean"]
 
-    __dimensions__ = [None, None, None, None, None, None]
+    __dimensions__ = [None, None, None, None, None, None, None, None, None, None, None]
 
     def __init__(self):
         self.timestamp = 0
@@ -23,6 +23,11 @@ class proc_output_t(object):
         self.group = ""
         self.stdout = ""
         self.stderr = ""
+        self.seq = 0
+        self.offset = 0
+        self.length = 0
+        self.retained_offset = 0
+        self.resend = False
 
     def encode(self):
         buf = BytesIO()
@@ -52,6 +57,7 @@ class proc_output_t(object):
         buf.write(struct.pack('>I', len(__stderr_encoded)+1))
         buf.write(__stderr_encoded)
         buf.write(b"\0")
+        buf.write(struct.pack(">qqiqb", self.seq, self.offset, self.length, self.retained_offset, self.resend))
 
     def decode(data):
         if hasattr(data, 'read'):
@@ -76,12 +82,14 @@ class proc_output_t(object):
         self.stdout = buf.read(__stdout_len)[:-1].decode('utf-8', 'replace')
         __stderr_len = struct.unpack('>I', buf.read(4))[0]
         self.stderr = buf.read(__stderr_len)[:-1].decode('utf-8', 'replace')
+        self.seq, self.offset, self.length, self.retained_offset = struct.unpack(">qqiq", buf.read(28))
+        self.resend = bool(struct.unpack('b', buf.read(1))[0])
         return self
     _decode_one = staticmethod(_decode_one)
 
     def _get_hash_recursive(parents):
         if proc_output_t in parents: return 0
-        tmphash = (0x9569803e08ba9887) & 0xffffffffffffffff
+        tmphash = (0xe509b6bbdec07c23) & 0xffffffffffffffff
         tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
         return tmphash
     _get_hash_recursive = staticmethod(_get_hash_recursive)
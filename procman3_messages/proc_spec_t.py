@@ -0,0 +1,124 @@
+"""LCM type definitions
+This file automatically generated by lcm.
+DO NOT MODIFY BY HAND!!!!
+"""
+
+try:
+    import cStringIO.StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
+import struct
+
+class proc_spec_t(object):
+    __slots__ = ["name", "group", "cmd", "auto_restart", "realtime", "num_cpus", "cpu_affinity", "sched_policy", "sched_priority", "nice", "ionice_class", "ionice_level", "cpu_quota", "mem_max", "ready_probe", "ready_arg", "ready_timeout"]
+
+    __typenames__ = ["string", "string", "string", "boolean", "boolean", "int16_t", "int16_t", "string", "int16_t", "int8_t", "int8_t", "int8_t", "float", "int64_t", "string", "string", "float"]
+
+    __dimensions__ = [None, None, None, None, None, None, ["num_cpus"], None, None, None, None, None, None, None, None, None, None]
+
+    def __init__(self):
+        self.name = ""
+        self.group = ""
+        self.cmd = ""
+        self.auto_restart = False
+        self.realtime = False
+        self.num_cpus = 0
+        self.cpu_affinity = []
+        self.sched_policy = ""
+        self.sched_priority = 0
+        self.nice = 0
+        self.ionice_class = 0
+        self.ionice_level = 0
+        self.cpu_quota = 0.0
+        self.mem_max = 0
+        self.ready_probe = ""
+        self.ready_arg = ""
+        self.ready_timeout = 0.0
+
+    def encode(self):
+        buf = BytesIO()
+        buf.write(proc_spec_t._get_packed_fingerprint())
+        self._encode_one(buf)
+        return buf.getvalue()
+
+    def _encode_one(self, buf):
+        __name_encoded = self.name.encode('utf-8')
+        buf.write(struct.pack('>I', len(__name_encoded)+1))
+        buf.write(__name_encoded)
+        buf.write(b"\0")
+        __group_encoded = self.group.encode('utf-8')
+        buf.write(struct.pack('>I', len(__group_encoded)+1))
+        buf.write(__group_encoded)
+        buf.write(b"\0")
+        __cmd_encoded = self.cmd.encode('utf-8')
+        buf.write(struct.pack('>I', len(__cmd_encoded)+1))
+        buf.write(__cmd_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">bbh", self.auto_restart, self.realtime, self.num_cpus))
+        buf.write(struct.pack('>%dh' % self.num_cpus, *self.cpu_affinity[:self.num_cpus]))
+        __sched_policy_encoded = self.sched_policy.encode('utf-8')
+        buf.write(struct.pack('>I', len(__sched_policy_encoded)+1))
+        buf.write(__sched_policy_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">hbbbfq", self.sched_priority, self.nice, self.ionice_class, self.ionice_level, self.cpu_quota, self.mem_max))
+        __ready_probe_encoded = self.ready_probe.encode('utf-8')
+        buf.write(struct.pack('>I', len(__ready_probe_encoded)+1))
+        buf.write(__ready_probe_encoded)
+        buf.write(b"\0")
+        __ready_arg_encoded = self.ready_arg.encode('utf-8')
+        buf.write(struct.pack('>I', len(__ready_arg_encoded)+1))
+        buf.write(__ready_arg_encoded)
+        buf.write(b"\0")
+        buf.write(struct.pack(">f", self.ready_timeout))
+
+    def decode(data):
+        if hasattr(data, 'read'):
+            buf = data
+        else:
+            buf = BytesIO(data)
+        if buf.read(8) != proc_spec_t._get_packed_fingerprint():
+            raise ValueError("Decode error")
+        return proc_spec_t._decode_one(buf)
+    decode = staticmethod(decode)
+
+    def _decode_one(buf):
+        self = proc_spec_t()
+        __name_len = struct.unpack('>I', buf.read(4))[0]
+        self.name = buf.read(__name_len)[:-1].decode('utf-8', 'replace')
+        __group_len = struct.unpack('>I', buf.read(4))[0]
+        self.group = buf.read(__group_len)[:-1].decode('utf-8', 'replace')
+        __cmd_len = struct.unpack('>I', buf.read(4))[0]
+        self.cmd = buf.read(__cmd_len)[:-1].decode('utf-8', 'replace')
+        self.auto_restart = bool(struct.unpack('b', buf.read(1))[0])
+        self.realtime = bool(struct.unpack('b', buf.read(1))[0])
+        self.num_cpus = struct.unpack(">h", buf.read(2))[0]
+        self.cpu_affinity = struct.unpack('>%dh' % self.num_cpus, buf.read(self.num_cpus * 2))
+        __sched_policy_len = struct.unpack('>I', buf.read(4))[0]
+        self.sched_policy = buf.read(__sched_policy_len)[:-1].decode('utf-8', 'replace')
+        self.sched_priority, self.nice, self.ionice_class, self.ionice_level, self.cpu_quota, self.mem_max = struct.unpack(">hbbbfq", buf.read(17))
+        __ready_probe_len = struct.unpack('>I', buf.read(4))[0]
+        self.ready_probe = buf.read(__ready_probe_len)[:-1].decode('utf-8', 'replace')
+        __ready_arg_len = struct.unpack('>I', buf.read(4))[0]
+        self.ready_arg = buf.read(__ready_arg_len)[:-1].decode('utf-8', 'replace')
+        self.ready_timeout = struct.unpack(">f", buf.read(4))[0]
+        return self
+    _decode_one = staticmethod(_decode_one)
+
+    def _get_hash_recursive(parents):
+        if proc_spec_t in parents: return 0
+        tmphash = (0x88ee9a84b65b7c31) & 0xffffffffffffffff
+        tmphash  = (((tmphash<<1)&0xffffffffffffffff) + (tmphash>>63)) & 0xffffffffffffffff
+        return tmphash
+    _get_hash_recursive = staticmethod(_get_hash_recursive)
+    _packed_fingerprint = None
+
+    def _get_packed_fingerprint():
+        if proc_spec_t._packed_fingerprint is None:
+            proc_spec_t._packed_fingerprint = struct.pack(">Q", proc_spec_t._get_hash_recursive([]))
+        return proc_spec_t._packed_fingerprint
+    _get_packed_fingerprint = staticmethod(_get_packed_fingerprint)
+
+    def get_hash(self):
+        """Get the LCM hash of the struct"""
+        return struct.unpack(">Q", proc_spec_t._get_packed_fingerprint())[0]
+
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 # filepath: monitor.py
 
+import argparse
 import lcm
 import time
 from tabulate import tabulate
@@ -9,23 +10,43 @@ import os
 import sys
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from procman3_messages import host_info_t, host_procs_t, proc_output_t
+from procman3_messages import host_diagnostics_t, host_info_t, host_outputs_t, host_procs_t, host_specs_t, host_stats_t, command_t
+from procman3_client import HostProcsState, OutputAssembler, unpack_outputs
 
 class ProcmanMonitor:
-    def __init__(self):
+    def __init__(self, show_diagnostics=False, show_outputs=False):
         self.lc = lcm.LCM()
         self.hosts = {}  
         self.processes = {} 
         self.outputs = {}   
+        self.assemblers = {}
+        self.max_output_chars = 20000
+        self.host_states = {}
+        self.specs_requested = {}
+        self.host_stats = {}
+        self.show_diagnostics = show_diagnostics
+        self.show_outputs = show_outputs
+        self.diagnostics = {}
         
         # Subscribe to status channels
         s1 = self.lc.subscribe("procman3/host_info", self.host_info_handler)
         s2 = self.lc.subscribe("procman3/host_procs", self.host_procs_handler)
-        s3 = self.lc.subscribe("procman3/proc_outputs", self.proc_output_handler)
+        s4 = self.lc.subscribe("procman3/host_specs", self.host_specs_handler)
+        s5 = self.lc.subscribe("procman3/host_stats", self.host_stats_handler)
+        s6 = self.lc.subscribe("procman3/host_diagnostics", self.host_diagnostics_handler)
         
         s1.set_queue_capacity(1)
-        s2.set_queue_capacity(1)
-        s3.set_queue_capacity(3)
+        # host_procs is a keyframe/delta stream of every deputy, a dropped delta leaves the table
+        # wrong until the next keyframe
+        s2.set_queue_capacity(100)
+        s4.set_queue_capacity(3)
+        s5.set_queue_capacity(1)
+        s6.set_queue_capacity(1)
+
+        # outputs are only assembled, and lost chunks only asked for again, when they are shown
+        if self.show_outputs:
+            s3 = self.lc.subscribe("procman3/proc_outputs", self.proc_output_handler)
+            s3.set_queue_capacity(100)
 
     def host_info_handler(self, channel, data):
         msg = host_info_t.decode(data)
@@ -42,45 +63,89 @@ class ProcmanMonitor:
             'uptime': msg.uptime
         }
 
+    def host_stats_handler(self, channel, data):
+        msg = host_stats_t.decode(data)
+        self.host_stats[msg.hostname] = {
+            'max_core_usage': max(msg.core_usage, default=0.0),
+            'load_avg': list(msg.load_avg),
+            'throttle_count': msg.throttle_count
+        }
+
+    def host_diagnostics_handler(self, channel, data):
+        msg = host_diagnostics_t.decode(data)
+        self.diagnostics[msg.hostname] = msg
+
+    def host_specs_handler(self, channel, data):
+        msg = host_specs_t.decode(data)
+        if msg.hostname not in self.host_states:
+            self.host_states[msg.hostname] = HostProcsState()
+        self.host_states[msg.hostname].apply_specs(msg)
+        self.update_processes()
+
     def host_procs_handler(self, channel, data):
         msg = host_procs_t.decode(data)
+        if msg.hostname not in self.host_states:
+            self.host_states[msg.hostname] = HostProcsState()
+        if self.host_states[msg.hostname].apply_procs(msg):
+            self.request_specs(msg.hostname)
+        self.update_processes()
+
+    def update_processes(self):
         self.processes.clear()
-        for proc in msg.procs:
-            self.processes[proc.name] = {
-                'group': proc.group,
-                'hostname': msg.hostname,
-                'status': proc.status,
-                'state': proc.state,
-                'errors': proc.errors,
-                'cmd': proc.cmd,
-                'cpu': proc.cpu,
-                'mem_rss': proc.mem_rss,
-                'mem_vms': proc.mem_vms,
-                'priority': proc.priority,
-                'pid': proc.pid,
-                'ppid': proc.ppid,
-                'auto_restart': proc.auto_restart,
-                'realtime': proc.realtime,
-            }
+        for hostname, state in self.host_states.items():
+            self.processes.update(state.processes(hostname))
+
+    def request_specs(self, hostname):
+        # specs are only published on change, ask for them at most once per second
+        now = time.time()
+        if now - self.specs_requested.get(hostname, 0) < 1:
+            return
+        self.specs_requested[hostname] = now
+        msg = command_t()
+        msg.hostname = hostname
+        msg.command = "publish_specs"
+        self.lc.publish("procman3/commands", msg.encode())
 
     def proc_output_handler(self, channel, data):
-        msg = proc_output_t.decode(data)
-        if msg.stdout.strip():
-            self.outputs[msg.name] = {
-                'stdout': msg.stdout,
-                'stderr': msg.stderr,
-                'timestamp': msg.timestamp
-            }
+        batch = host_outputs_t.decode(data)
+        for msg in unpack_outputs(batch):
+            self.add_output(msg)
+
+    def add_output(self, msg):
+        key = (msg.hostname, msg.name)
+        if key not in self.assemblers:
+            self.assemblers[key] = OutputAssembler()
+        text, missing = self.assemblers[key].add(msg)
+        for offset, length in missing:
+            self.request_output(msg.hostname, msg.name, offset, length)
+
+        if text:
+            output = self.outputs.setdefault(msg.name, {'stdout': '', 'stderr': '', 'timestamp': 0})
+            output['stdout'] = (output['stdout'] + text)[-self.max_output_chars:]
+            output['timestamp'] = msg.timestamp
+
+    def request_output(self, hostname, name, offset, length):
+        msg = command_t()
+        msg.name = name
+        msg.hostname = hostname
+        msg.command = "resend_output"
+        msg.offset = offset
+        msg.length = length
+        self.lc.publish("procman3/commands", msg.encode())
 
     def display_hosts(self):
         table = []
-        headers = ['Deputy', 'IP', 'CPU%', 'Mem%', 'Net TX(kB/s)', 'Net RX(kB/s)', 'Uptime(s)']
+        headers = ['Deputy', 'IP', 'CPU%', 'MaxCore%', 'Load', 'Throttle', 'Mem%', 'Net TX(kB/s)', 'Net RX(kB/s)', 'Uptime(s)']
         
         for name, info in self.hosts.items():
+            stats = self.host_stats.get(name, {})
             table.append([
                 name,
                 info['ip'],
                 f"{info['cpu_usage']*100:.1f}",
+                f"{stats.get('max_core_usage', 0.0)*100:.1f}",
+                f"{stats.get('load_avg', [0.0])[0]:.2f}",
+                stats.get('throttle_count', -1),
                 f"{info['mem_usage']*100:.1f}",
                 f"{info['net_tx']:.1f}",
                 f"{info['net_rx']:.1f}",
@@ -124,7 +189,7 @@ class ProcmanMonitor:
                     '',  # Empty cell for group
                     f"  {name}",  # Indent process name
                     info['hostname'],
-                    info['state'],
+                    info['state'] if info['ready'] or info['state'] != 'R' else 'R (not ready)',
                     f"{info['cpu']*100:.1f}",
                     info['mem_rss']*1,
                     info['pid']*1,
@@ -137,11 +202,34 @@ class ProcmanMonitor:
         output += table
         return output
 
+    def display_diagnostics(self):
+        # the deputies' own usage, latencies of their loop callbacks and commands, and message sizes
+        usage = []
+        latencies = []
+        sizes = []
+        for name, msg in self.diagnostics.items():
+            interval = max(msg.interval, 1e-3)
+            usage.append([name, f"{msg.cpu*100:.1f}", msg.mem_rss, msg.num_threads, msg.num_fds,
+                          f"{msg.loop_iterations / interval:.1f}"])
+            for kind, summaries in (('loop', msg.phases), ('command', msg.commands)):
+                for summary in summaries:
+                    latencies.append([name, kind, summary.name, summary.count, f"{summary.p50 / 1000:.2f}",
+                                      f"{summary.p99 / 1000:.2f}", f"{summary.p999 / 1000:.2f}", f"{summary.max / 1000:.2f}"])
+            for summary in msg.channels:
+                sizes.append([name, summary.name, summary.count, summary.p50, summary.p99, summary.max,
+                              f"{summary.total / 1024 / interval:.1f}"])
+
+        return '\n\n'.join([
+            tabulate(usage, headers=['Deputy', 'CPU%', 'Mem(KB)', 'Threads', 'FDs', 'Wakeups/s']),
+            tabulate(latencies, headers=['Deputy', 'Kind', 'Name', 'Count', 'p50(ms)', 'p99(ms)', 'p99.9(ms)', 'Max(ms)']),
+            tabulate(sizes, headers=['Deputy', 'Channel', 'Msgs', 'p50(B)', 'p99(B)', 'Max(B)', 'kB/s']),
+        ])
+
     def display_outputs(self, num_lines=7):
         output_text = "\nProcess Outputs:\n"
         for name, info in self.outputs.items():
             if info['stdout'].strip():
-                truncated_output = '\n'.join(info['stdout'].splitlines()[:num_lines])  # Get the first num_lines of the output
+                truncated_output = '\n'.join(info['stdout'].splitlines()[-num_lines:])  # Get the last num_lines of the output
                 output_text += f"\n=== {name} ===\n{truncated_output}\n"
         return output_text
     
@@ -152,8 +240,11 @@ class ProcmanMonitor:
     def run(self):
         try:
             while True:
-                # Handle LCM messages
-                self.lc.handle_timeout(50)
+                # Handle LCM messages, all that are queued before drawing again
+                if self.lc.handle_timeout(50) > 0:
+                    for _ in range(1000):
+                        if self.lc.handle_timeout(0) <= 0:
+                            break
 
                 # Clear screen
                 print("\033[2J\033[H", end="")
@@ -163,14 +254,23 @@ class ProcmanMonitor:
                 print(self.display_hosts())
                 print("\nProcess Status:")
                 print(self.display_processes())
-                #print("\nProcess Outputs:")
-                #print(self.display_outputs())
+                if self.show_diagnostics:
+                    print("\nDeputy Diagnostics:")
+                    print(self.display_diagnostics())
+                if self.show_outputs:
+                    print(self.display_outputs())
 
         except KeyboardInterrupt:
             print("\nExiting monitor...")
 
 def main():
-    monitor = ProcmanMonitor()
+    parser = argparse.ArgumentParser(description="Terminal monitor of the procman3 deputies")
+    parser.add_argument('-d', '--diagnostics', action='store_true',
+                        help="also show the deputies' own usage, loop and command latencies and message sizes")
+    parser.add_argument('-o', '--outputs', action='store_true',
+                        help="also show the last lines of output of every process")
+    args = parser.parse_args()
+    monitor = ProcmanMonitor(args.diagnostics, args.outputs)
     monitor.run()
 
 if __name__ == "__main__":